@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Query
+from typing import Optional
+from app.core import slow_queries
+
+router = APIRouter()
+
+@router.get("/slow-queries")
+def read_slow_queries(
+    limit: int = Query(default=50, le=1000),
+    caller: Optional[str] = Query(default=None, description="Only entries from this CRUD function, e.g. crud_sales.get_sales_data")
+):
+    """
+    Most recent statements slower than SLOW_QUERY_THRESHOLD_MS, newest first, with their parameter
+    shape and EXPLAIN plan (`full_scans` lists tables read without an index).
+    """
+    return {**slow_queries.stats(), "entries": slow_queries.get_entries(limit=limit, caller=caller)}
+
+@router.delete("/slow-queries")
+def clear_slow_queries():
+    return {"cleared": slow_queries.clear()}
@@ -1,30 +1,132 @@
-from fastapi import APIRouter, HTTPException, Query, status
-from typing import List, Optional
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from datetime import date
+from typing import List, Literal, Optional, Union
+from app.core import config, pagination, responses
 from app.crud import crud_inventory
 from app.models import schemas
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Inventory])
-def read_all_inventory_status(skip: int = 0, limit: int = Query(default=100, le=200)):
-    inventory_list = crud_inventory.get_all_inventory_status(skip=skip, limit=limit)
-    return inventory_list
+async def read_all_inventory_status(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(default=100, le=200),
+    cursor: Optional[str] = Query(default=None, description="Token from the X-Next-Cursor header of the previous page")
+):
+    try:
+        inventory_list = await crud_inventory.get_all_inventory_status_async(
+            skip=skip, limit=limit, page_cursor=cursor, as_dicts=config.FAST_JSON_RESPONSES
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    token = pagination.next_cursor(inventory_list, limit, responses.fields_of("product.name", "product_id"))
+    return responses.list_response(inventory_list, response, {pagination.NEXT_CURSOR_HEADER: token} if token else None)
 
 @router.get("/low-stock", response_model=List[schemas.LowStockProduct])
-def get_low_stock_alerts_endpoint():
-    low_stock_items = crud_inventory.get_low_stock_alerts()
+async def get_low_stock_alerts_endpoint():
+    low_stock_items = await crud_inventory.get_low_stock_alerts_async()
     return low_stock_items
 
+@router.get("/low-stock/stream")
+async def stream_low_stock_alerts(request: Request, include_current: bool = True):
+    """
+    Server-Sent Events stream of `low-stock` events, pushed as soon as a write takes a product
+    to or below its threshold. With `include_current`, the current alerts are sent first.
+    """
+    queue = crud_inventory.low_stock_events.subscribe()
+
+    async def event_stream():
+        try:
+            if include_current:
+                for item in await crud_inventory.get_low_stock_alerts_async():
+                    yield f"event: low-stock\ndata: {item.model_dump_json()}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=config.LOW_STOCK_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n" # Comment line keeps proxies from closing an idle stream
+                    continue
+                yield f"event: low-stock\ndata: {item.model_dump_json()}\n\n"
+        finally:
+            crud_inventory.low_stock_events.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.put("/batch", response_model=List[schemas.Inventory])
+def batch_update_inventory(batch_in: schemas.InventoryBatchUpdate):
+    """
+    Set (`mode=set`) or adjust (`mode=delta`) stock for many products in one transaction.
+    Each quantity change is written to inventory_log. Only rows that actually changed are returned.
+    """
+    try:
+        return crud_inventory.batch_update_inventory(batch_in)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
 @router.get("/{product_id}", response_model=schemas.Inventory)
-def read_inventory_for_product(product_id: int):
-    inventory_item = crud_inventory.get_inventory_by_product_id(product_id=product_id)
+async def read_inventory_for_product(product_id: int):
+    inventory_item = await crud_inventory.get_inventory_by_product_id_async(product_id=product_id)
     if inventory_item is None:
         raise HTTPException(status_code=404, detail=f"Inventory for product ID {product_id} not found")
     return inventory_item
 
+@router.get(
+    "/{product_id}/history",
+    response_model=Union[List[schemas.InventoryLogEntry], List[schemas.InventoryHistoryBucket]]
+)
+async def read_inventory_history(
+    product_id: int,
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    bucket: Optional[Literal["hour", "day"]] = Query(
+        default=None, description="Aggregate the net change per hour or day instead of listing entries"
+    ),
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: Optional[str] = Query(default=None, description="Token from the X-Next-Cursor header of the previous page")
+):
+    """
+    Stock movements of a product from inventory_log, newest first and keyset-paginated. With
+    `bucket`, one row per hour/day (oldest first) with units in/out, net change and the stock
+    level at the end of the bucket; the range defaults to the last 7 days.
+    """
+    try:
+        if bucket:
+            history = await crud_inventory.get_inventory_history_buckets_async(product_id, bucket, date_from, date_to)
+        else:
+            history = await crud_inventory.get_inventory_history_async(
+                product_id, date_from=date_from, date_to=date_to, limit=limit, page_cursor=cursor
+            )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    if history is None:
+        raise HTTPException(status_code=404, detail=f"Inventory for product ID {product_id} not found")
+    if not bucket:
+        token = pagination.next_cursor(history, limit, lambda entry: (entry.timestamp, entry.id))
+        if token:
+            response.headers[pagination.NEXT_CURSOR_HEADER] = token
+    return history
+
 @router.put("/{product_id}", response_model=schemas.Inventory)
 def update_inventory_for_product(product_id: int, inventory_in: schemas.InventoryUpdate):
     updated_inventory = crud_inventory.update_inventory(product_id=product_id, inventory_update=inventory_in)
     if updated_inventory is None:
         raise HTTPException(status_code=404, detail=f"Inventory for product ID {product_id} not found or update failed")
     return updated_inventory
+
+@router.put("/{product_id}/shards", response_model=schemas.Inventory)
+def set_inventory_shards(product_id: int, sharding_in: schemas.InventorySharding):
+    """
+    Spread a hot product's stock over `shards` sub-counter rows so concurrent sales don't all
+    wait on one row lock (`shards=0` turns it off). Reported quantities are unaffected.
+    """
+    inventory_item = crud_inventory.set_product_shards(product_id, sharding_in.shards)
+    if inventory_item is None:
+        raise HTTPException(status_code=404, detail=f"Inventory for product ID {product_id} not found")
+    return inventory_item
@@ -1,5 +1,11 @@
-from fastapi import APIRouter, HTTPException, Query, Depends, status
-from typing import List, Optional
+import csv
+import io
+import json
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from typing import List, Optional, Tuple
+from app.core import config, pagination, responses
 from app.crud import crud_products
 from app.crud import crud_categories
 from app.models import schemas
@@ -16,24 +22,85 @@ def create_product_endpoint(product_in: schemas.ProductCreate):
         raise HTTPException(status_code=400, detail="Product could not be created.")
     return product
 
+def _parse_import_payload(body: bytes, content_type: str) -> List[Tuple[int, dict]]:
+    text = body.decode("utf-8-sig")
+    if "csv" in content_type:
+        records = []
+        for row in csv.DictReader(io.StringIO(text)):
+            # Empty cells mean "not provided" so schema defaults apply
+            records.append({key: value for key, value in row.items() if key and value not in (None, "")})
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        records = json.loads(text)
+        if not isinstance(records, list):
+            raise ValueError("Expected a JSON array of products.")
+    return list(enumerate(records, start=1))
+
+def _validate_import_records(
+    records: List[Tuple[int, dict]]
+) -> Tuple[List[Tuple[int, schemas.ProductCreate]], List[schemas.ProductImportRowResult]]:
+    valid_rows = []
+    errors = []
+    for row_number, record in records:
+        try:
+            valid_rows.append((row_number, schemas.ProductCreate.model_validate(record)))
+        except ValidationError as e:
+            messages = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            errors.append(schemas.ProductImportRowResult(row=row_number, status="error", error=messages))
+    return valid_rows, errors
+
+@router.post("/import", response_model=schemas.ProductImportReport)
+async def import_products_endpoint(request: Request):
+    """
+    Bulk-create products with their initial inventory. The request body is the uploaded file:
+    a JSON array (`application/json`), one JSON object per line (`application/x-ndjson`) or a CSV
+    with a header row (`text/csv`), each record using the ProductCreate fields.
+    """
+    content_type = request.headers.get("content-type", "application/json").lower()
+    body = await request.body()
+    # Parsing and validating a large upload is CPU-bound: keep it off the event loop
+    try:
+        records = await run_in_threadpool(_parse_import_payload, body, content_type)
+    except (ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse import payload: {e}")
+    valid_rows, results = await run_in_threadpool(_validate_import_records, records)
+
+    results.extend(await run_in_threadpool(
+        crud_products.import_products, valid_rows, config.PRODUCT_IMPORT_CHUNK_SIZE
+    ))
+    results.sort(key=lambda r: r.row)
+    created = sum(1 for r in results if r.status == "created")
+    return schemas.ProductImportReport(
+        total_rows=len(records), created=created, failed=len(results) - created, results=results
+    )
+
 @router.get("/{product_id}", response_model=schemas.ProductWithInventory)
-def read_product_endpoint(product_id: int):
-    product = crud_products.get_product_by_id(product_id=product_id)
+async def read_product_endpoint(product_id: int):
+    product = await crud_products.get_product_by_id_async(product_id=product_id)
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
 @router.get("/", response_model=List[schemas.ProductWithInventory])
-def read_products_endpoint(
+async def read_products_endpoint(
+    response: Response,
     skip: int = 0, 
     limit: int = Query(default=100, le=200), # Max limit 200
     category_id: Optional[int] = None,
-    name: Optional[str] = None
+    name: Optional[str] = Query(default=None, description="Search term, matched anywhere in the product name"),
+    sort: str = Query(default="name", enum=["name", "relevance"]),
+    cursor: Optional[str] = Query(default=None, description="Token from the X-Next-Cursor header of the previous page")
 ):
-    products = crud_products.get_all_products(
-        skip=skip, limit=limit, category_id=category_id, name_filter=name
-    )
-    return products
+    try:
+        products = await crud_products.get_all_products_async(
+            skip=skip, limit=limit, category_id=category_id, name_filter=name, page_cursor=cursor, sort=sort,
+            as_dicts=config.FAST_JSON_RESPONSES
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    token = pagination.next_cursor(products, limit, responses.fields_of("name", "id")) if sort == "name" else None
+    return responses.list_response(products, response, {pagination.NEXT_CURSOR_HEADER: token} if token else None)
 
 @router.put("/{product_id}", response_model=schemas.ProductWithInventory)
 def update_product_endpoint(product_id: int, product_in: schemas.ProductUpdate):
@@ -50,5 +117,12 @@ def create_category_endpoint(category_in: schemas.CategoryCreate):
     return category
 
 @router.get("/categories/", response_model=List[schemas.Category], tags=["Categories"])
-def read_categories_endpoint(skip: int = 0, limit: int = 100):
-    return crud_categories.get_all_categories(skip=skip, limit=limit)
\ No newline at end of file
+async def read_categories_endpoint(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    try:
+        categories = await crud_categories.get_all_categories_async(skip=skip, limit=limit, page_cursor=cursor)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    token = pagination.next_cursor(categories, limit, lambda c: (c.name, c.id))
+    if token:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = token
+    return categories
\ No newline at end of file
@@ -1,6 +1,14 @@
-from fastapi import APIRouter, HTTPException, Query, Depends, status
-from typing import List, Optional
-from datetime import date
+import csv
+import io
+import itertools
+import json
+from decimal import Decimal
+from fastapi import APIRouter, HTTPException, Query, Depends, Response, status
+from fastapi.responses import StreamingResponse
+from typing import Iterator, List, Optional
+from datetime import date, datetime
+from app.core import config, pagination, responses
+from app.core.batching import QueueFullError
 from app.crud import crud_sales
 from app.models import schemas
 
@@ -15,36 +23,139 @@ def record_new_sale(sale_in: schemas.SaleCreate):
         return sale
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
+    except ConnectionError:
+        raise # Handled by the app-level 503 handler
     except Exception as e:
         print(f"Unexpected error recording sale: {e}")
         raise HTTPException(status_code=500, detail="An unexpected error occurred while recording the sale.")
 
 
+@router.post("/ingest", response_model=schemas.SaleIngestStatus, status_code=status.HTTP_202_ACCEPTED)
+def ingest_sale(sale_in: schemas.SaleCreate):
+    """
+    Queue a sale for write-behind recording and return a tracking id right away. Queued sales are
+    committed in micro-batches; poll `GET /ingest/{tracking_id}` for the outcome.
+
+    Off unless SALES_INGEST_ENABLED is set. The queue and tracking ids are per worker process:
+    with several workers, the status lookup has to reach the worker that accepted the sale.
+    """
+    if not config.SALES_INGEST_ENABLED:
+        raise HTTPException(status_code=404, detail="Sale ingestion is disabled.")
+    try:
+        tracking_id = crud_sales.sale_ingest_queue.submit(sale_in)
+    except QueueFullError:
+        raise HTTPException(
+            status_code=503, detail="Sale ingestion queue is full. Please retry shortly.", headers={"Retry-After": "1"}
+        )
+    return schemas.SaleIngestStatus(tracking_id=tracking_id, status="queued")
+
+@router.get("/ingest/{tracking_id}", response_model=schemas.SaleIngestStatus)
+def get_ingested_sale_status(tracking_id: str):
+    ingest_status = crud_sales.sale_ingest_queue.status(tracking_id)
+    if ingest_status is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired tracking id")
+    return schemas.SaleIngestStatus(
+        tracking_id=tracking_id, status=ingest_status["status"],
+        sale_id=ingest_status["result"], error=ingest_status["error"]
+    )
+
+
+@router.post("/orders", response_model=schemas.Order, status_code=status.HTTP_201_CREATED)
+def record_new_order(order_in: schemas.OrderCreate):
+    try:
+        return crud_sales.record_order(order_in=order_in)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except ConnectionError:
+        raise # Handled by the app-level 503 handler
+    except Exception as e:
+        print(f"Unexpected error recording order: {e}")
+        raise HTTPException(status_code=500, detail="An unexpected error occurred while recording the order.")
+
+
 @router.get("/", response_model=List[schemas.Sale])
-def get_sales_list(
+async def get_sales_list(
+    response: Response,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
     product_id: Optional[int] = None,
     category_id: Optional[int] = None,
     skip: int = 0,
-    limit: int = Query(default=100, le=200)
+    limit: int = Query(default=100, le=200),
+    cursor: Optional[str] = Query(default=None, description="Token from the X-Next-Cursor header of the previous page")
 ):
-    sales = crud_sales.get_sales_data(
-        date_from=date_from, date_to=date_to,
-        product_id=product_id, category_id=category_id,
-        skip=skip, limit=limit
+    try:
+        sales = await crud_sales.get_sales_data_async(
+            date_from=date_from, date_to=date_to,
+            product_id=product_id, category_id=category_id,
+            skip=skip, limit=limit, page_cursor=cursor, as_dicts=config.FAST_JSON_RESPONSES
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    token = pagination.next_cursor(sales, limit, responses.fields_of("sale_date", "id"))
+    return responses.list_response(sales, response, {pagination.NEXT_CURSOR_HEADER: token} if token else None)
+
+def _export_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _csv_chunks(chunks: Iterator[List[tuple]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(crud_sales.SALES_EXPORT_COLUMNS)
+    for rows in chunks:
+        writer.writerows([_export_value(v) for v in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def _ndjson_chunks(chunks: Iterator[List[tuple]]) -> Iterator[str]:
+    columns = crud_sales.SALES_EXPORT_COLUMNS
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(columns, (_export_value(v) for v in row)))) + "\n" for row in rows
+        )
+
+@router.get("/export")
+def export_sales(
+    format: str = Query(default="csv", enum=["csv", "ndjson"]),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    product_id: Optional[int] = None,
+    category_id: Optional[int] = None
+):
+    # Rows are streamed from the database in fixed-size chunks; nothing is held in memory
+    chunks = crud_sales.iter_sales_export(
+        date_from=date_from, date_to=date_to, product_id=product_id, category_id=category_id,
+        chunk_size=config.SALES_EXPORT_CHUNK_SIZE
+    )
+    # Check out the connection and run the query before the 200 and headers go out, so pool
+    # exhaustion or a database error is answered with a proper status instead of a cut-off file
+    first_chunk = next(chunks, None)
+    chunks = itertools.chain([first_chunk], chunks) if first_chunk is not None else iter([])
+    if format == "ndjson":
+        body, media_type = _ndjson_chunks(chunks), "application/x-ndjson"
+    else:
+        body, media_type = _csv_chunks(chunks), "text/csv"
+    return StreamingResponse(
+        body, media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="sales_export.{format}"'}
     )
-    return sales
+
 
 @router.get("/revenue/analysis", response_model=schemas.RevenueReport)
-def get_revenue_analysis_endpoint(
+async def get_revenue_analysis_endpoint(
     period_type: str = Query(..., enum=["daily", "weekly", "monthly", "annual"]),
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     category_id: Optional[int] = None
 ):
     try:
-        report = crud_sales.get_revenue_analysis(
+        report = await crud_sales.get_revenue_analysis_async(
             period_type=period_type,
             start_date=start_date,
             end_date=end_date,
@@ -53,16 +164,25 @@ def get_revenue_analysis_endpoint(
         return report
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
+    except ConnectionError:
+        raise # Handled by the app-level 503 handler
     except Exception as e:
         print(f"Error in revenue analysis: {e}")
         raise HTTPException(status_code=500, detail="Error generating revenue report.")
 
 
+@router.get("/revenue/cache/stats")
+def get_revenue_cache_stats_endpoint():
+    return crud_sales.get_revenue_cache_stats()
+
+
 @router.post("/revenue/comparison", response_model=schemas.RevenueComparisonResponse)
-def compare_revenue_endpoint(comparison_request: schemas.RevenueComparisonRequest):
+async def compare_revenue_endpoint(comparison_request: schemas.RevenueComparisonRequest):
     try:
-        response = crud_sales.compare_revenue(comparison_request)
+        response = await crud_sales.compare_revenue_async(comparison_request)
         return response
+    except ConnectionError:
+        raise # Handled by the app-level 503 handler
     except Exception as e:
         print(f"Error in revenue comparison: {e}")
         raise HTTPException(status_code=500, detail="Error generating revenue comparison.")
@@ -0,0 +1,204 @@
+# app/core/async_db.py
+"""
+asyncio-native counterpart of db.py for `async def` endpoints, on aiomysql pools.
+
+A request waiting on MySQL here holds no threadpool thread, only a pooled connection while a
+statement runs, so one worker can keep thousands of slow requests in flight. Queries use the
+same `%s` placeholders and return the same dict rows as db_cursor, so CRUD functions share
+their query builders between both layers. The sync layer (db.py) stays for writes and scripts.
+
+Read replicas are the ones configured for db.py: health and lag come from its checker, each
+replica just gets its own async pool here.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set
+import aiomysql
+import pymysql
+from . import config
+from . import db, metrics, slow_queries
+
+_pool: Optional[aiomysql.Pool] = None
+_replica_pools: Dict[str, aiomysql.Pool] = {}
+_pool_lock: Optional[asyncio.Lock] = None
+_counters = {"checkouts": 0, "timeouts": 0, "discarded": 0}
+_background_tasks: Set[asyncio.Task] = set()
+
+
+async def _create_pool(host: str, port: int, min_size: int) -> aiomysql.Pool:
+    return await aiomysql.create_pool(
+        host=host, port=port, user=config.DB_USER, password=config.DB_PASSWORD, db=config.DB_NAME,
+        minsize=min_size, maxsize=max(config.ASYNC_DB_POOL_MAX_SIZE, 1),
+        pool_recycle=config.DB_POOL_RECYCLE, autocommit=True
+    )
+
+def _host_port(spec: str):
+    host, _, port = spec.partition(":")
+    return host, int(port) if port else 3306
+
+
+async def init_async_pool():
+    global _pool_lock
+    _pool_lock = asyncio.Lock()
+    try:
+        await _get_pool(None)
+    except ConnectionError as e:
+        # Not fatal at startup; the pool is created on first use
+        print(f"Could not create async database pool: {e}")
+
+async def close_async_pool():
+    global _pool
+    pools = ([_pool] if _pool else []) + list(_replica_pools.values())
+    _pool = None
+    _replica_pools.clear()
+    for pool in pools:
+        pool.close()
+    for pool in pools:
+        await pool.wait_closed()
+
+async def _get_pool(replica: Optional[db._Replica]) -> aiomysql.Pool:
+    pool = _replica_pools.get(replica.name) if replica else _pool
+    if pool is not None:
+        return pool
+    global _pool_lock
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    async with _pool_lock:
+        pool = _replica_pools.get(replica.name) if replica else _pool
+        if pool is None:
+            host, port = _host_port(replica.name) if replica else (config.DB_HOST, 3306)
+            try:
+                pool = await _create_pool(host, port, 0 if replica else config.ASYNC_DB_POOL_MIN_SIZE)
+            except pymysql.err.MySQLError as e:
+                print(f"Error connecting to MySQL database: {e}")
+                raise ConnectionError(f"Database connection failed: {e}")
+            if replica:
+                _replica_pools[replica.name] = pool
+            else:
+                _set_primary_pool(pool)
+    return pool
+
+def _set_primary_pool(pool: aiomysql.Pool):
+    global _pool
+    _pool = pool
+
+async def _acquire(pool: aiomysql.Pool, timeout: float):
+    try:
+        conn = await asyncio.wait_for(pool.acquire(), timeout)
+    except asyncio.TimeoutError:
+        _counters["timeouts"] += 1
+        raise db.PoolTimeoutError(
+            f"No database connection available within {timeout}s (async pool size {pool.maxsize})."
+        )
+    except pymysql.err.MySQLError as e:
+        print(f"Error connecting to MySQL database: {e}")
+        raise ConnectionError(f"Database connection failed: {e}")
+    _counters["checkouts"] += 1
+    return conn
+
+def _replica_busy(replica: db._Replica) -> int:
+    pool = _replica_pools.get(replica.name)
+    return pool.size - pool.freesize if pool else 0
+
+async def _acquire_for_read(max_staleness: Optional[float]):
+    replica = db.choose_replica(max_staleness, busy=_replica_busy)
+    fell_back = False
+    if replica:
+        try:
+            pool = await _get_pool(replica)
+            conn = await _acquire(pool, config.DB_REPLICA_POOL_TIMEOUT)
+            db.note_read(replica)
+            return pool, conn
+        except ConnectionError as e:
+            if not isinstance(e, db.PoolTimeoutError):
+                replica.healthy, replica.last_error = False, str(e)
+            fell_back = True
+    db.note_read(None, fell_back)
+    pool = await _get_pool(None)
+    return pool, await _acquire(pool, config.DB_POOL_TIMEOUT)
+
+
+@asynccontextmanager
+async def async_db_cursor(
+    commit: bool = False, tag: Optional[str] = None, read_only: bool = False, max_staleness: Optional[float] = None
+):
+    """
+    Async db_cursor: check out a connection from the aiomysql pool and yield a dict cursor on
+    it. `await cursor.execute(...)`, `await cursor.fetchall()`. Same replica routing
+    (read_only/max_staleness), transactions (commit) and instrumentation as db_cursor; a
+    checkout waiting longer than DB_POOL_TIMEOUT raises PoolTimeoutError (503).
+    """
+    caller = None
+    if metrics.ENABLED or slow_queries.ENABLED:
+        caller = tag or metrics.caller_tag(2) # 0 = here, 1 = __aenter__, 2 = the CRUD coroutine
+        started = time.perf_counter()
+    if read_only and not commit and db._replicas:
+        pool, conn = await _acquire_for_read(max_staleness)
+    else:
+        pool = await _get_pool(None)
+        conn = await _acquire(pool, config.DB_POOL_TIMEOUT)
+    if caller and metrics.ENABLED:
+        waited = time.perf_counter() - started
+        metrics.db_acquire_seconds.observe(waited, caller)
+        metrics.add_request_phase("pool_wait", waited)
+    cursor = None
+    discard = False
+    try:
+        if commit:
+            await conn.begin()
+        cursor = await conn.cursor(aiomysql.DictCursor)
+        yield metrics.AsyncInstrumentedCursor(cursor, caller) if caller else cursor
+        if commit:
+            committed_at = time.perf_counter()
+            await conn.commit()
+            db._last_write.set(time.monotonic())
+            if caller and metrics.ENABLED:
+                metrics.db_commit_seconds.observe(time.perf_counter() - committed_at, caller)
+                metrics.add_request_phase("execute", time.perf_counter() - committed_at)
+    except BaseException as e:
+        # Cancelled (client went away) or a lost connection: it may be mid-result, don't reuse it
+        discard = isinstance(e, (asyncio.CancelledError, pymysql.err.OperationalError, pymysql.err.InterfaceError))
+        try:
+            if commit and not discard:
+                await conn.rollback()
+        except pymysql.err.MySQLError:
+            discard = True
+        if isinstance(e, pymysql.err.MySQLError):
+            print(f"Database error: {e}")
+        raise # Re-raise the exception to be handled by FastAPI or calling function
+    finally:
+        if cursor and not discard:
+            try:
+                await cursor.close()
+            except pymysql.err.MySQLError:
+                discard = True
+        _release(pool, conn, discard)
+
+
+def _release(pool: aiomysql.Pool, conn, discard: bool):
+    if not discard:
+        pool.release(conn)
+        return
+    _counters["discarded"] += 1
+    conn.close()
+    pool.release(conn) # A closed connection is dropped from the pool's count
+    # Requests waiting for a connection are only woken when one is handed back: open a
+    # replacement and hand it back, instead of leaving them to time out
+    task = asyncio.get_running_loop().create_task(_replace_connection(pool))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def _replace_connection(pool: aiomysql.Pool):
+    try:
+        conn = await asyncio.wait_for(pool.acquire(), config.DB_POOL_TIMEOUT)
+    except (asyncio.TimeoutError, pymysql.err.MySQLError, RuntimeError):
+        return # Busy (waiters are being served by other releases), closing, or the database is down
+    pool.release(conn)
+
+
+def get_async_pool_stats() -> dict:
+    stats = {**_counters, "size": 0, "idle": 0, "in_use": 0, "max_size": config.ASYNC_DB_POOL_MAX_SIZE}
+    if _pool is not None:
+        stats.update(size=_pool.size, idle=_pool.freesize, in_use=_pool.size - _pool.freesize)
+    return stats
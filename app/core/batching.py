@@ -0,0 +1,111 @@
+# app/core/batching.py
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class QueueFullError(Exception):
+    """Raised by MicroBatcher.submit when the queue is at capacity (callers should back off)."""
+
+
+class MicroBatcher:
+    """
+    Bounded write-behind queue drained by a daemon thread in micro-batches of up to `batch_size`
+    items, or whatever arrived within `max_wait` seconds of the first one.
+
+    `process(items)` runs once per batch and returns one (status, result, error) per item. If it
+    raises, every item in the batch is marked "failed". Statuses of the last `status_size` items
+    stay queryable by tracking id.
+    """
+
+    def __init__(self, name: str, process: Callable[[List[Any]], List[Tuple[str, Any, Optional[str]]]],
+                 max_queue: int, batch_size: int, max_wait: float, status_size: int = 100000):
+        self.name = name
+        self.process = process
+        self.batch_size = max(batch_size, 1)
+        self.max_wait = max_wait
+        self._queue = queue.Queue(maxsize=max(max_queue, 1))
+        self._statuses = OrderedDict() # tracking id -> status dict
+        self._status_size = max(status_size, 1)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._counters = {"submitted": 0, "rejected_full": 0, "batches": 0, "committed": 0, "rejected": 0, "failed": 0}
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        # The worker drains whatever is already queued before exiting
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, item: Any) -> str:
+        tracking_id = uuid.uuid4().hex
+        self._set_status(tracking_id, {"status": "queued", "result": None, "error": None})
+        try:
+            self._queue.put_nowait((tracking_id, item))
+        except queue.Full:
+            with self._lock:
+                self._statuses.pop(tracking_id, None)
+                self._counters["rejected_full"] += 1
+            raise QueueFullError(f"{self.name} queue is full ({self._queue.maxsize} items).")
+        with self._lock:
+            self._counters["submitted"] += 1
+        return tracking_id
+
+    def status(self, tracking_id: str) -> Optional[dict]:
+        with self._lock:
+            status = self._statuses.get(tracking_id)
+            return dict(status) if status else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "queued": self._queue.qsize(), "max_queue": self._queue.maxsize}
+
+    def _set_status(self, tracking_id: str, status: dict):
+        with self._lock:
+            self._statuses[tracking_id] = status
+            self._statuses.move_to_end(tracking_id)
+            while len(self._statuses) > self._status_size:
+                self._statuses.popitem(last=False)
+
+    def _next_batch(self) -> List[Tuple[str, Any]]:
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                results = self.process([item for _, item in batch])
+            except Exception as e:
+                print(f"{self.name}: batch of {len(batch)} failed: {e}")
+                results = [("failed", None, str(e))] * len(batch)
+            with self._lock:
+                self._counters["batches"] += 1
+                for status, _, _ in results:
+                    self._counters[status] = self._counters.get(status, 0) + 1
+            for (tracking_id, _), (status, result, error) in zip(batch, results):
+                self._set_status(tracking_id, {"status": status, "result": result, "error": error})
@@ -0,0 +1,133 @@
+# app/core/cache.py
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Hashable, Optional
+
+_DEFAULT_TTL = object()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and optional metadata used for targeted invalidation.
+
+    Every invalidation bumps `generation`; readers that computed a value from the database can pass
+    the generation they observed beforehand to `set()` so a result raced by a write is not cached.
+    Only invalidations that concern the value being stored reject it: the same key, an
+    invalidate_where whose predicate matches its metadata, or clear(). Recent invalidations are
+    remembered for that (a bounded log); a fill older than the log is refused to stay safe.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float]):
+        self.max_size = max(max_size, 1)
+        self.ttl = ttl # Default lifetime in seconds, None = until evicted or invalidated
+        self._entries = OrderedDict() # key -> (value, expires_at, meta)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._invalidated_keys = OrderedDict() # key -> generation of its last invalidation (recent only)
+        self._invalidated_where = deque() # (generation, predicate) of recent invalidate_where calls
+        self._log_size = max(self.max_size, 1024)
+        self._forgotten = 0 # Fills that started before this generation can no longer be checked
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Any = _DEFAULT_TTL, meta: Any = None,
+            if_generation: Optional[int] = None) -> bool:
+        ttl = self.ttl if ttl is _DEFAULT_TTL else ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            if if_generation is not None and self._invalidated_since(key, meta, if_generation):
+                return False # The value was invalidated while it was being computed
+            self._entries[key] = (value, expires_at, meta)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+            return True
+
+    def _invalidated_since(self, key: Hashable, meta: Any, generation: int) -> bool:
+        if generation < self._forgotten or self._invalidated_keys.get(key, -1) > generation:
+            return True
+        for seen, predicate in reversed(self._invalidated_where): # Newest first, stop at the fill's start
+            if seen <= generation:
+                return False
+            if predicate(meta):
+                return True
+        return False
+
+    def _note_key_invalidated(self, key: Hashable):
+        self._generation += 1
+        self._invalidated_keys[key] = self._generation
+        self._invalidated_keys.move_to_end(key)
+        if len(self._invalidated_keys) > self._log_size:
+            _, seen = self._invalidated_keys.popitem(last=False)
+            self._forgotten = max(self._forgotten, seen)
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            self._note_key_invalidated(key)
+            if self._entries.pop(key, None) is None:
+                return False
+            self._counters["invalidations"] += 1
+            return True
+
+    def invalidate_if(self, key: Hashable, predicate: Callable[[Any], bool]) -> bool:
+        """Drop `key` if it is cached and its metadata satisfies `predicate`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not predicate(entry[2]):
+                return False
+            self._note_key_invalidated(key)
+            del self._entries[key]
+            self._counters["invalidations"] += 1
+            return True
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Drop every entry whose metadata satisfies `predicate`."""
+        with self._lock:
+            self._generation += 1
+            self._invalidated_where.append((self._generation, predicate))
+            if len(self._invalidated_where) > self._log_size:
+                seen, _ = self._invalidated_where.popleft()
+                self._forgotten = max(self._forgotten, seen)
+            doomed = [key for key, (_, _, meta) in self._entries.items() if predicate(meta)]
+            for key in doomed:
+                del self._entries[key]
+            self._counters["invalidations"] += len(doomed)
+            return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._forgotten = self._generation
+            self._counters["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hit_ratio": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            }
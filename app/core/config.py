@@ -9,5 +9,85 @@ DB_USER = os.getenv("DB_USER", "ecom_user")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "your_strong_password")
 DB_NAME = os.getenv("DB_NAME", "ecom_admin_db")
 
+# Connection pool settings
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2")) # Connections opened at startup
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10")) # Hard cap on open connections
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5")) # Seconds to wait for a free connection before 503
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800")) # Reopen connections older than this (seconds)
+DB_POOL_PING_AFTER = int(os.getenv("DB_POOL_PING_AFTER", "30")) # Ping connections idle longer than this on checkout (0 = always)
+
+# Read replicas: comma-separated host[:port] list; empty = everything runs on DB_HOST
+DB_REPLICA_HOSTS = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "5")) # Default staleness tolerance (seconds) for read_only cursors
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5")) # Seconds between replica health/lag checks
+DB_REPLICA_POOL_TIMEOUT = float(os.getenv("DB_REPLICA_POOL_TIMEOUT", "1")) # Wait this long for a replica connection, then use the primary
+
+# Revenue reports read the daily rollup table; set to false to query raw sales (e.g. before a backfill)
+REVENUE_ROLLUP_ENABLED = os.getenv("REVENUE_ROLLUP_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Revenue report cache (analysis + comparison results)
+REVENUE_CACHE_ENABLED = os.getenv("REVENUE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+REVENUE_CACHE_SIZE = int(os.getenv("REVENUE_CACHE_SIZE", "512")) # Max cached reports (LRU)
+REVENUE_CACHE_TTL = float(os.getenv("REVENUE_CACHE_TTL", "60")) # Seconds, for ranges that include today or are open-ended
+REVENUE_CACHE_HISTORICAL_TTL = float(os.getenv("REVENUE_CACHE_HISTORICAL_TTL", "3600")) # Seconds, for ranges ending before today (0 = no expiry); bounds staleness after archiving
+
+# In-process category cache: full reconciliation with the categories table every N seconds (0 = never)
+CATEGORY_CACHE_REFRESH_SECONDS = float(os.getenv("CATEGORY_CACHE_REFRESH_SECONDS", "300"))
+
+# Read-through cache for get_product_by_id
+PRODUCT_CACHE_ENABLED = os.getenv("PRODUCT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "10000")) # Max cached products (LRU)
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "30")) # Seconds; bounds staleness from writes made by other workers
+
+# Seconds between keep-alive comments on the low-stock SSE stream
+LOW_STOCK_STREAM_KEEPALIVE = float(os.getenv("LOW_STOCK_STREAM_KEEPALIVE", "15"))
+# Seconds between checks for products taken low by other workers, while a stream is open (0 = only this worker's writes)
+LOW_STOCK_POLL_SECONDS = float(os.getenv("LOW_STOCK_POLL_SECONDS", "5"))
+
+# Must match the server's ngram_token_size used by the ft_product_name FULLTEXT index
+PRODUCT_SEARCH_NGRAM_SIZE = int(os.getenv("PRODUCT_SEARCH_NGRAM_SIZE", "2"))
+
+# Streaming sales export
+SALES_EXPORT_CHUNK_SIZE = int(os.getenv("SALES_EXPORT_CHUNK_SIZE", "5000")) # Rows fetched per round trip
+SALES_EXPORT_NET_WRITE_TIMEOUT = int(os.getenv("SALES_EXPORT_NET_WRITE_TIMEOUT", "600")) # Seconds MySQL waits on a slow reader
+
+# Bulk product import: rows inserted per transaction
+PRODUCT_IMPORT_CHUNK_SIZE = int(os.getenv("PRODUCT_IMPORT_CHUNK_SIZE", "1000"))
+
+# Hot list endpoints (products, inventory, sales) return rows shaped in the CRUD layer and serialized once
+# with orjson, skipping response_model validation; set to false to go through Pydantic models instead
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "true").lower() in ("1", "true", "yes")
+
+# Query and request instrumentation exposed on GET /metrics (Prometheus text format); false removes the overhead
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Slow-query log (GET /api/v1/admin/slow-queries): statements at or above the threshold are kept in a
+# ring buffer and EXPLAINed in the background (0 = off)
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() in ("1", "true", "yes")
+
+# Write-behind sale ingestion (POST /sales/ingest): queued sales are committed in micro-batches
+# Off by default: the queue and tracking statuses live in the worker process, so with several workers a
+# status lookup only succeeds on the worker that accepted the sale (single-worker deployments, or sticky routing)
+SALES_INGEST_ENABLED = os.getenv("SALES_INGEST_ENABLED", "false").lower() in ("1", "true", "yes")
+SALES_INGEST_QUEUE_SIZE = int(os.getenv("SALES_INGEST_QUEUE_SIZE", "10000")) # Beyond this, POST /sales/ingest answers 503
+SALES_INGEST_BATCH_SIZE = int(os.getenv("SALES_INGEST_BATCH_SIZE", "500")) # Max sales per transaction
+SALES_INGEST_BATCH_MS = float(os.getenv("SALES_INGEST_BATCH_MS", "50")) # Max wait for a batch to fill after its first sale
+SALES_INGEST_STATUS_SIZE = int(os.getenv("SALES_INGEST_STATUS_SIZE", "100000")) # Tracking ids kept for status lookups
+
+# Hot products (PUT /inventory/{product_id}/shards) keep stock in several rows; how often each worker re-reads which ones
+HOT_PRODUCT_REFRESH_SECONDS = float(os.getenv("HOT_PRODUCT_REFRESH_SECONDS", "30"))
+
+# Monthly partitions of sales and inventory_log (python -m app.scripts.manage_partitions)
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3")) # Empty future partitions kept ready
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", "43200")) # Seconds; 0 = only via the script
+SALES_RETENTION_MONTHS = int(os.getenv("SALES_RETENTION_MONTHS", "0")) # Months kept live by the `archive` script, 0 = all
+INVENTORY_LOG_RETENTION_MONTHS = int(os.getenv("INVENTORY_LOG_RETENTION_MONTHS", "0"))
+
+# asyncio database pool (aiomysql) used by the async read endpoints; one per worker, next to the sync pool
+ASYNC_DB_POOL_MIN_SIZE = int(os.getenv("ASYNC_DB_POOL_MIN_SIZE", "2"))
+ASYNC_DB_POOL_MAX_SIZE = int(os.getenv("ASYNC_DB_POOL_MAX_SIZE", "20")) # Requests beyond this wait (without a thread) up to DB_POOL_TIMEOUT
+
 # You can add other configurations here
-API_V1_STR = "/api/v1"
\ No newline at end of file
+API_V1_STR = "/api/v1"
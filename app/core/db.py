@@ -1,8 +1,21 @@
 # app/core/db.py
+import contextvars
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional, Tuple
 import mysql.connector
 from mysql.connector import Error
 from contextlib import contextmanager
 from . import config # from app.core import config
+from . import metrics, slow_queries
+from .tasks import PeriodicTask
+
+
+class PoolTimeoutError(ConnectionError):
+    """Raised when no pooled connection becomes free within DB_POOL_TIMEOUT."""
+
 
 def get_db_connection():
     try:
@@ -19,25 +32,376 @@ def get_db_connection():
         # In a real app, you might raise a custom exception or handle this more gracefully
         raise ConnectionError(f"Database connection failed: {e}") # Raise for FastAPI to catch
 
+
+class _PoolEntry:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    Bounded pool of MySQL connections.
+
+    Connections run with autocommit on, so plain reads never leave a snapshot
+    open between checkouts; db_cursor(commit=True) starts an explicit transaction.
+    """
+
+    def __init__(self, min_size: int, max_size: int, timeout: float, recycle: int, ping_after: int, **connect_args):
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self._connect_args = connect_args
+        self._idle = deque()
+        self._size = 0 # Open connections, idle + checked out
+        self._cond = threading.Condition()
+        self._counters = {
+            "checkouts": 0, "waits": 0, "timeouts": 0,
+            "connects": 0, "recycled": 0, "failed_pings": 0, "discarded": 0,
+        }
+
+    def _connect(self) -> _PoolEntry:
+        try:
+            conn = mysql.connector.connect(autocommit=True, **self._connect_args)
+        except Error as e:
+            print(f"Error connecting to MySQL database: {e}")
+            raise ConnectionError(f"Database connection failed: {e}")
+        self._bump("connects")
+        return _PoolEntry(conn)
+
+    def _bump(self, counter: str):
+        with self._cond:
+            self._counters[counter] += 1
+
+    def _close(self, entry: _PoolEntry):
+        try:
+            entry.conn.close()
+        except Error:
+            pass
+
+    def fill(self):
+        # Open connections up to min_size so the first requests skip the handshake
+        while True:
+            with self._cond:
+                if self._size >= min(self.min_size, self.max_size):
+                    return
+                self._size += 1
+            try:
+                entry = self._connect()
+            except ConnectionError:
+                with self._cond:
+                    self._size -= 1
+                raise
+            self.release(entry)
+
+    def acquire(self) -> _PoolEntry:
+        entry = None
+        deadline = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop() # LIFO: reuse the most recently used connection
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                if deadline is None:
+                    deadline = time.monotonic() + self.timeout
+                    self._counters["waits"] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available within {self.timeout}s (pool size {self.max_size})."
+                    )
+                self._cond.wait(remaining)
+            self._counters["checkouts"] += 1
+
+        try:
+            if entry is None:
+                return self._connect()
+            return self._validate(entry)
+        except ConnectionError:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def _validate(self, entry: _PoolEntry) -> _PoolEntry:
+        now = time.monotonic()
+        if self.recycle and now - entry.created_at > self.recycle:
+            self._bump("recycled")
+            self._close(entry)
+            return self._connect()
+        if now - entry.last_used >= self.ping_after:
+            try:
+                entry.conn.ping(reconnect=False)
+            except Error:
+                self._bump("failed_pings")
+                self._close(entry)
+                return self._connect()
+        return entry
+
+    def release(self, entry: _PoolEntry, discard: bool = False):
+        if discard:
+            self._close(entry)
+        else:
+            entry.last_used = time.monotonic()
+        with self._cond:
+            if discard:
+                self._counters["discarded"] += 1
+                self._size -= 1
+            else:
+                self._idle.append(entry)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+        for entry in idle:
+            self._close(entry)
+
+    @property
+    def in_use(self) -> int:
+        with self._cond:
+            return self._size - len(self._idle)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                **self._counters,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+            }
+
+
+_pool = ConnectionPool(
+    min_size=config.DB_POOL_MIN_SIZE,
+    max_size=config.DB_POOL_MAX_SIZE,
+    timeout=config.DB_POOL_TIMEOUT,
+    recycle=config.DB_POOL_RECYCLE,
+    ping_after=config.DB_POOL_PING_AFTER,
+    host=config.DB_HOST,
+    user=config.DB_USER,
+    password=config.DB_PASSWORD,
+    database=config.DB_NAME,
+)
+
+
+class _Replica:
+    """A read replica with its own pool; health and lag are refreshed by check_replicas()."""
+
+    def __init__(self, spec: str):
+        host, _, port = spec.partition(":")
+        self.name = spec
+        connect_args = {"port": int(port)} if port else {}
+        self.pool = ConnectionPool(
+            min_size=0,
+            max_size=config.DB_POOL_MAX_SIZE,
+            timeout=config.DB_REPLICA_POOL_TIMEOUT,
+            recycle=config.DB_POOL_RECYCLE,
+            ping_after=config.DB_POOL_PING_AFTER,
+            host=host,
+            user=config.DB_USER,
+            password=config.DB_PASSWORD,
+            database=config.DB_NAME,
+            **connect_args,
+        )
+        self.healthy = False # Not used until the first check passes
+        self.lag: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.reads = 0
+
+    def stats(self) -> dict:
+        return {
+            "host": self.name, "healthy": self.healthy, "lag_seconds": self.lag,
+            "last_error": self.last_error, "reads": self.reads, "pool": self.pool.stats(),
+        }
+
+
+_replicas: List[_Replica] = [_Replica(spec) for spec in config.DB_REPLICA_HOSTS]
+_replica_turn = itertools.count()
+_routing_counters = {"primary_reads": 0, "replica_reads": 0, "fallbacks": 0}
+# Monotonic time of the last commit made in this context (request / thread): its later reads stay on the primary
+_last_write: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("last_write", default=None)
+
+
+def _replication_lag(cursor) -> Optional[float]:
+    try:
+        cursor.execute("SHOW REPLICA STATUS")
+    except Error:
+        cursor.execute("SHOW SLAVE STATUS") # MySQL < 8.0.22
+    row = cursor.fetchone()
+    if row is None:
+        return 0.0 # Not replicating from anything, e.g. the primary itself used as a stand-in
+    lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+    return None if lag is None else float(lag) # NULL: replication threads stopped
+
+def check_replicas():
+    for replica in _replicas:
+        try:
+            entry = replica.pool.acquire()
+        except ConnectionError as e:
+            replica.healthy, replica.last_error = False, str(e)
+            continue
+        discard = False
+        try:
+            cursor = entry.conn.cursor(dictionary=True, buffered=True)
+            try:
+                lag = _replication_lag(cursor)
+            finally:
+                cursor.close()
+            replica.lag = lag
+            replica.healthy = lag is not None
+            replica.last_error = None if lag is not None else "Replication is not running"
+        except Error as e:
+            discard = True
+            replica.healthy, replica.last_error = False, str(e)
+        finally:
+            replica.pool.release(entry, discard=discard)
+        if not replica.healthy:
+            print(f"Replica {replica.name} taken out of rotation: {replica.last_error}")
+
+_replica_checker = PeriodicTask("db-replica-health", config.DB_REPLICA_CHECK_INTERVAL, check_replicas)
+
+
+def init_pool():
+    try:
+        _pool.fill()
+    except ConnectionError as e:
+        # Not fatal at startup; connections are opened lazily on first checkout
+        print(f"Could not pre-fill database pool: {e}")
+    if _replicas:
+        check_replicas() # Until a replica passes a check, reads go to the primary
+        _replica_checker.start()
+
+def close_pool():
+    _replica_checker.stop()
+    for replica in _replicas:
+        replica.pool.close()
+    _pool.close()
+
+def get_pool_stats() -> dict:
+    return _pool.stats()
+
+def get_replica_stats() -> dict:
+    return {**_routing_counters, "replicas": [replica.stats() for replica in _replicas]}
+
+
+def choose_replica(max_staleness: Optional[float], busy: Callable[[_Replica], int] = lambda r: r.pool.in_use) -> Optional[_Replica]:
+    """The replica a read allowing `max_staleness` seconds of lag should use, or None for the primary."""
+    staleness = config.DB_REPLICA_MAX_LAG if max_staleness is None else max_staleness
+    last_write = _last_write.get()
+    # Read-your-writes: shortly after committing, a replica may not have the change yet
+    wrote_recently = last_write is not None and time.monotonic() - last_write <= max(staleness, config.DB_REPLICA_MAX_LAG)
+    if staleness <= 0 or wrote_recently:
+        return None
+    candidates = [r for r in _replicas if r.healthy and r.lag is not None and r.lag <= staleness]
+    if not candidates:
+        return None
+    # Least busy replica, rotating the starting point so ties spread out
+    start = next(_replica_turn) % len(candidates)
+    return min(candidates[start:] + candidates[:start], key=busy)
+
+def note_read(replica: Optional[_Replica], fell_back: bool = False):
+    """Count where a read went, for GET /health and /metrics."""
+    if fell_back:
+        _routing_counters["fallbacks"] += 1
+    if replica:
+        replica.reads += 1
+        _routing_counters["replica_reads"] += 1
+    else:
+        _routing_counters["primary_reads"] += 1
+
+def _acquire_for_read(max_staleness: Optional[float]) -> Tuple[ConnectionPool, _PoolEntry]:
+    replica = choose_replica(max_staleness)
+    fell_back = False
+    if replica:
+        try:
+            entry = replica.pool.acquire()
+            note_read(replica)
+            return replica.pool, entry
+        except ConnectionError as e:
+            if not isinstance(e, PoolTimeoutError):
+                replica.healthy, replica.last_error = False, str(e)
+            fell_back = True
+    note_read(None, fell_back)
+    return _pool, _pool.acquire()
+
+
 @contextmanager
-def db_cursor(commit: bool = False):
-    conn = None
+def db_cursor(
+    commit: bool = False, dictionary: bool = True, buffered: bool = True, tag: Optional[str] = None,
+    read_only: bool = False, max_staleness: Optional[float] = None
+):
+    """
+    Check out a pooled connection and yield a cursor on it.
+
+    read_only=True lets the read run on a healthy replica lagging at most `max_staleness` seconds
+    (default DB_REPLICA_MAX_LAG, 0 = primary only). It falls back to the primary when no replica
+    qualifies, and right after this context committed a write (read-your-writes). Writes
+    (commit=True) always use the primary.
+
+    Cursors are buffered by default so no unread rows are left on a pooled connection.
+    buffered=False streams rows from the server as they are fetched (for large exports);
+    such a cursor must be read to the end, otherwise its connection is discarded.
+
+    With METRICS_ENABLED or the slow-query log on, the cursor is wrapped to time statements and
+    fetches, tagged with the function that opened it (or `tag`).
+    """
+    caller = None
+    if metrics.ENABLED or slow_queries.ENABLED:
+        caller = tag or metrics.caller_tag(2) # 0 = here, 1 = contextmanager.__enter__, 2 = the CRUD function
+        started = time.perf_counter()
+    pool = _pool
+    if read_only and not commit and _replicas:
+        pool, entry = _acquire_for_read(max_staleness)
+    else:
+        entry = _pool.acquire() # Raises ConnectionError (503) if the pool is exhausted
+    if caller and metrics.ENABLED:
+        waited = time.perf_counter() - started
+        metrics.db_acquire_seconds.observe(waited, caller)
+        metrics.add_request_phase("pool_wait", waited)
+    conn = entry.conn
     cursor = None
+    discard = False
     try:
-        conn = get_db_connection()
-        if conn is None: # Check if connection failed in get_db_connection
-             raise ConnectionError("Failed to establish database connection.")
-        cursor = conn.cursor(dictionary=True) # dictionary=True returns rows as dicts
-        yield cursor
         if commit:
+            conn.start_transaction()
+        cursor = conn.cursor(dictionary=dictionary, buffered=buffered) # dictionary=True returns rows as dicts
+        yield metrics.InstrumentedCursor(cursor, caller) if caller else cursor
+        if commit:
+            committed_at = time.perf_counter()
             conn.commit()
-    except Error as e:
-        if conn and conn.is_connected():
-            conn.rollback()
-        print(f"Database error: {e}")
+            _last_write.set(time.monotonic())
+            if caller and metrics.ENABLED:
+                metrics.db_commit_seconds.observe(time.perf_counter() - committed_at, caller)
+                metrics.add_request_phase("execute", time.perf_counter() - committed_at)
+    except BaseException as e:
+        if not buffered:
+            discard = True # Unread rows may still be in flight on this connection
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Error:
+            discard = True # Connection is in an unknown state, don't hand it out again
+        if isinstance(e, Error):
+            print(f"Database error: {e}")
+            discard = discard or not conn.is_connected()
         raise # Re-raise the exception to be handled by FastAPI or calling function
     finally:
         if cursor:
-            cursor.close()
-        if conn and conn.is_connected():
-            conn.close()
\ No newline at end of file
+            try:
+                cursor.close()
+            except Error:
+                discard = True
+        pool.release(entry, discard=discard)
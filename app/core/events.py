@@ -0,0 +1,49 @@
+# app/core/events.py
+import asyncio
+import threading
+from typing import Any, List, Tuple
+
+
+class EventBroadcaster:
+    """
+    Fan-out of in-process events to asyncio subscribers (e.g. SSE streams).
+
+    `publish` may be called from any thread, typically the threadpool running sync endpoints.
+    A subscriber that falls `queue_size` events behind loses the oldest ones rather than
+    blocking publishers.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> asyncio.Queue:
+        # Must be called from the event loop that will consume the queue
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = [(loop, q) for loop, q in self._subscribers if q is not queue]
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: Any):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                pass # Loop already closed; the subscriber is going away
+
+
+def _offer(queue: asyncio.Queue, event: Any):
+    if queue.full():
+        queue.get_nowait() # Drop the oldest event for a slow consumer
+    queue.put_nowait(event)
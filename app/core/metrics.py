@@ -0,0 +1,301 @@
+# app/core/metrics.py
+"""
+In-process metrics rendered in the Prometheus text format on GET /metrics.
+
+Everything here is a no-op unless METRICS_ENABLED is set: the request middleware is not installed
+and db_cursor hands out plain cursors (unless the slow-query log needs statement timings).
+"""
+import bisect
+import contextvars
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from app.core import config, slow_queries
+
+ENABLED = config.METRICS_ENABLED
+
+# Seconds; spans sub-millisecond primary-key lookups up to multi-second reports
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {} # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((key, list(series)) for key, series in self._series.items())
+        for label_values, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# --- Database ---
+db_acquire_seconds = Histogram(
+    "db_pool_acquire_seconds", "Time to check out a pooled connection (waiting, connecting, validating).", ["caller"]
+)
+db_execute_seconds = Histogram(
+    "db_query_execute_seconds", "Time in cursor.execute/executemany (buffered cursors include reading the result).", ["caller"]
+)
+db_fetch_seconds = Histogram(
+    "db_query_fetch_seconds", "Time in cursor.fetchone/fetchmany/fetchall.", ["caller"]
+)
+db_commit_seconds = Histogram("db_commit_seconds", "Time to COMMIT transactions opened with db_cursor(commit=True).", ["caller"])
+db_rows_returned = Counter("db_query_rows_returned_total", "Rows returned by fetch calls.", ["caller"])
+db_errors = Counter("db_query_errors_total", "Statements that raised.", ["caller"])
+
+# --- HTTP ---
+http_request_seconds = Histogram(
+    "http_request_duration_seconds", "Request latency from first byte in to last byte out.", ["method", "route", "status"]
+)
+http_request_phase_seconds = Histogram(
+    "http_request_phase_seconds",
+    "Request time split into pool_wait, execute and fetch (database) and app (everything else: "
+    "validation, model building, serialization).", ["route", "phase"]
+)
+
+REGISTRY = [
+    db_acquire_seconds, db_execute_seconds, db_fetch_seconds, db_commit_seconds, db_rows_returned, db_errors,
+    http_request_seconds, http_request_phase_seconds,
+]
+
+# Per-request accumulator of database time, shared with the threadpool running sync endpoints
+_request_phases: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("request_phases", default=None)
+
+
+def caller_tag(depth: int) -> str:
+    """`module.function` of the frame `depth` levels above the caller, e.g. "crud_sales.get_sales_data"."""
+    frame = sys._getframe(depth + 1)
+    module = frame.f_globals.get("__name__", "?").rsplit(".", 1)[-1]
+    return f"{module}.{frame.f_code.co_name}"
+
+
+def add_request_phase(phase: str, seconds: float):
+    phases = _request_phases.get()
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+class InstrumentedCursor:
+    """
+    Wraps a MySQL cursor, timing statements and fetches under the CRUD function that opened it
+    and handing slow statements to the slow-query log.
+    """
+
+    def __init__(self, cursor, caller: str):
+        self._cursor = cursor
+        self._caller = caller
+        self.last_elapsed = 0.0
+
+    def __getattr__(self, name):
+        # lastrowid, rowcount, column_names, ...
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _timed(self, histogram: Histogram, phase: str, method, *args) -> Any:
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        except Exception:
+            if ENABLED:
+                db_errors.inc(self._caller)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.last_elapsed = elapsed
+            if ENABLED:
+                histogram.observe(elapsed, self._caller)
+                add_request_phase(phase, elapsed)
+
+    def execute(self, operation, params=None):
+        try:
+            return self._timed(db_execute_seconds, "execute", self._cursor.execute, operation, params)
+        finally:
+            if slow_queries.ENABLED and self.last_elapsed >= slow_queries.THRESHOLD_SECONDS:
+                slow_queries.record(self._caller, operation, params, self.last_elapsed)
+
+    def executemany(self, operation, seq_params):
+        try:
+            return self._timed(db_execute_seconds, "execute", self._cursor.executemany, operation, seq_params)
+        finally:
+            if slow_queries.ENABLED and self.last_elapsed >= slow_queries.THRESHOLD_SECONDS:
+                slow_queries.record(self._caller, operation, seq_params, self.last_elapsed, many=True)
+
+    def fetchone(self):
+        row = self._timed(db_fetch_seconds, "fetch", self._cursor.fetchone)
+        if row is not None and ENABLED:
+            db_rows_returned.inc(self._caller)
+        return row
+
+    def fetchmany(self, size: Optional[int] = None):
+        rows = self._timed(db_fetch_seconds, "fetch", self._cursor.fetchmany, size)
+        if ENABLED:
+            db_rows_returned.inc(self._caller, amount=len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(db_fetch_seconds, "fetch", self._cursor.fetchall)
+        if ENABLED:
+            db_rows_returned.inc(self._caller, amount=len(rows))
+        return rows
+
+
+class AsyncInstrumentedCursor:
+    """InstrumentedCursor for aiomysql cursors (async_db_cursor)."""
+
+    def __init__(self, cursor, caller: str):
+        self._cursor = cursor
+        self._caller = caller
+        self.last_elapsed = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def _timed(self, histogram: Histogram, phase: str, awaitable) -> Any:
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        except Exception:
+            if ENABLED:
+                db_errors.inc(self._caller)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.last_elapsed = elapsed
+            if ENABLED:
+                histogram.observe(elapsed, self._caller)
+                add_request_phase(phase, elapsed)
+
+    async def execute(self, operation, params=None):
+        try:
+            return await self._timed(db_execute_seconds, "execute", self._cursor.execute(operation, params))
+        finally:
+            if slow_queries.ENABLED and self.last_elapsed >= slow_queries.THRESHOLD_SECONDS:
+                slow_queries.record(self._caller, operation, params, self.last_elapsed)
+
+    async def fetchone(self):
+        row = await self._timed(db_fetch_seconds, "fetch", self._cursor.fetchone())
+        if row is not None and ENABLED:
+            db_rows_returned.inc(self._caller)
+        return row
+
+    async def fetchmany(self, size: Optional[int] = None):
+        rows = await self._timed(db_fetch_seconds, "fetch", self._cursor.fetchmany(size))
+        if ENABLED:
+            db_rows_returned.inc(self._caller, amount=len(rows))
+        return rows
+
+    async def fetchall(self):
+        rows = await self._timed(db_fetch_seconds, "fetch", self._cursor.fetchall())
+        if ENABLED:
+            db_rows_returned.inc(self._caller, amount=len(rows))
+        return rows
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and its database/app breakdown."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        phases: Dict[str, float] = {}
+        token = _request_phases.set(phases)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_phases.reset(token)
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            # Templated path keeps label cardinality bounded (/products/{product_id}, not /products/42)
+            route_path = getattr(route, "path", None) or "unmatched"
+            http_request_seconds.observe(elapsed, scope["method"], route_path, str(status))
+            database = 0.0
+            for phase, seconds in phases.items():
+                http_request_phase_seconds.observe(seconds, route_path, phase)
+                database += seconds
+            http_request_phase_seconds.observe(max(elapsed - database, 0.0), route_path, "app")
+
+
+def render_samples(name: str, help_text: str, kind: str, values: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    """Render values collected elsewhere (e.g. pool or cache stats) as a `kind` ("gauge"/"counter") metric."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in values:
+        lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {value}")
+    return lines
+
+
+def render(extra_lines: Sequence[str] = ()) -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,40 @@
+# app/core/pagination.py
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Optional, Sequence
+
+# Response header carrying the opaque token for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, types: Sequence[type]) -> list:
+    """Decode a token produced by encode_cursor, checking it holds one value per entry in `types`."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        decoded = []
+        for value, value_type in zip(values, types):
+            if value_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif not isinstance(value, value_type) or isinstance(value, bool):
+                raise ValueError
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor.")
+
+
+def next_cursor(items: Sequence[Any], limit: int, key: Callable[[Any], tuple]) -> Optional[str]:
+    # A short page means there is nothing after it
+    if not items or len(items) < limit:
+        return None
+    return encode_cursor(*key(items[-1]))
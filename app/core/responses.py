@@ -0,0 +1,37 @@
+# app/core/responses.py
+from typing import Any, Callable, Dict, Optional
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from app.core import config
+
+
+def fields_of(*names: str) -> Callable[[Any], tuple]:
+    """
+    Key function reading `names` (dotted for nested values, e.g. "product.name") from list items,
+    which are shaped dicts when FAST_JSON_RESPONSES is on and schema objects otherwise.
+    """
+    paths = [name.split(".") for name in names]
+    if config.FAST_JSON_RESPONSES:
+        def read(item, path):
+            for part in path:
+                item = item[part]
+            return item
+    else:
+        def read(item, path):
+            for part in path:
+                item = getattr(item, part)
+            return item
+    return lambda item: tuple(read(item, path) for path in paths)
+
+
+def list_response(items: list, response: Response, headers: Optional[Dict[str, str]] = None) -> Any:
+    """
+    Return the result of a list endpoint. With FAST_JSON_RESPONSES the items are already shaped
+    dicts: they are serialized once by orjson and response_model validation is skipped.
+    Otherwise FastAPI validates and serializes them against the response_model as usual.
+    """
+    if config.FAST_JSON_RESPONSES:
+        return ORJSONResponse(items, headers=headers)
+    if headers:
+        response.headers.update(headers)
+    return items
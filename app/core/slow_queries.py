@@ -0,0 +1,166 @@
+# app/core/slow_queries.py
+"""
+Bounded in-memory log of statements slower than SLOW_QUERY_THRESHOLD_MS.
+
+Each entry keeps the SQL, the shape of its parameters (types only, never values), the duration
+and the CRUD function that ran it. SELECT/UPDATE/DELETE statements are EXPLAINed with the same
+parameters on a background thread using its own connection, so the request that was already
+slow doesn't pay for it and the pool isn't touched.
+"""
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import mysql.connector
+from app.core import config
+
+ENABLED = config.SLOW_QUERY_THRESHOLD_MS > 0
+THRESHOLD_SECONDS = config.SLOW_QUERY_THRESHOLD_MS / 1000
+
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.IGNORECASE)
+_EXPLAIN_REUSE_SECONDS = 60 # Same statement + parameter shape: reuse a recent plan instead of re-running EXPLAIN
+
+_entries = deque(maxlen=max(config.SLOW_QUERY_LOG_SIZE, 1))
+_lock = threading.Lock()
+_next_id = 0
+_recent_plans: Dict[tuple, tuple] = {} # (sql, shape) -> (captured_at, explain rows)
+_explain_queue: "queue.Queue" = queue.Queue(maxsize=100)
+_worker: Optional[threading.Thread] = None
+
+
+def _normalize_sql(operation: str) -> str:
+    return " ".join(operation.split())
+
+
+def _param_shape(params) -> Any:
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def record(caller: str, operation: str, params, seconds: float, many: bool = False):
+    """Called by the instrumented cursor for every statement at or above the threshold."""
+    global _next_id
+    sql = _normalize_sql(operation)
+    if many:
+        rows = list(params or [])
+        shape = {"rows": len(rows), "row": _param_shape(rows[0]) if rows else []}
+    else:
+        shape = _param_shape(params)
+    entry = {
+        "id": None,
+        "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+        "caller": caller,
+        "duration_ms": round(seconds * 1000, 3),
+        "sql": sql,
+        "param_shape": shape,
+        "explain_status": "skipped",
+        "explain": None,
+        "full_scans": None,
+    }
+    fingerprint = (sql, repr(shape))
+    with _lock:
+        _next_id += 1
+        entry["id"] = _next_id
+        _entries.append(entry)
+        recent = _recent_plans.get(fingerprint)
+    print(f"Slow query ({entry['duration_ms']} ms) in {caller}: {sql[:200]}")
+
+    if not config.SLOW_QUERY_EXPLAIN or many or not _EXPLAINABLE.match(sql):
+        return
+    if recent and time.monotonic() - recent[0] < _EXPLAIN_REUSE_SECONDS:
+        _attach_plan(entry, recent[1])
+        return
+    entry["explain_status"] = "pending"
+    try:
+        _explain_queue.put_nowait((entry, fingerprint, operation, params))
+    except queue.Full:
+        entry["explain_status"] = "dropped" # The worker is behind; don't let EXPLAINs pile up
+        return
+    _ensure_worker()
+
+
+def _attach_plan(entry: dict, plan: List[dict]):
+    entry["explain"] = plan
+    # Tables read with a full scan are the usual sign of a missing index for this filter combination
+    entry["full_scans"] = [row.get("table") for row in plan if row.get("type") == "ALL"]
+    entry["explain_status"] = "done"
+
+
+def _ensure_worker():
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_explain_loop, name="slow-query-explain", daemon=True)
+            _worker.start()
+
+
+def _connect():
+    return mysql.connector.connect(
+        host=config.DB_HOST, user=config.DB_USER, password=config.DB_PASSWORD, database=config.DB_NAME,
+        autocommit=True
+    )
+
+
+def _explain_loop():
+    conn = None
+    while True:
+        entry, fingerprint, operation, params = _explain_queue.get()
+        try:
+            if conn is None or not conn.is_connected():
+                conn = _connect()
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(f"EXPLAIN {operation}", params)
+                plan = [{key: _plain(value) for key, value in row.items()} for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+            with _lock:
+                _attach_plan(entry, plan)
+                _recent_plans[fingerprint] = (time.monotonic(), plan)
+                if len(_recent_plans) > _entries.maxlen:
+                    _recent_plans.pop(next(iter(_recent_plans)))
+        except Exception as e:
+            # Keep the worker alive; the statement may not be explainable (e.g. a temporary table)
+            entry["explain_status"] = "failed"
+            entry["explain"] = str(e)
+            print(f"Could not EXPLAIN slow query {entry['id']}: {e}")
+
+
+def _plain(value):
+    # EXPLAIN columns can come back as bytes/bytearray depending on server and connector
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode(errors="replace")
+    return value
+
+
+def get_entries(limit: Optional[int] = None, caller: Optional[str] = None) -> List[dict]:
+    """Most recent first."""
+    with _lock:
+        entries = [dict(entry) for entry in reversed(_entries)]
+    if caller:
+        entries = [entry for entry in entries if entry["caller"] == caller]
+    return entries[:limit] if limit else entries
+
+
+def clear() -> int:
+    with _lock:
+        count = len(_entries)
+        _entries.clear()
+        _recent_plans.clear()
+    return count
+
+
+def stats() -> dict:
+    return {
+        "enabled": ENABLED,
+        "threshold_ms": config.SLOW_QUERY_THRESHOLD_MS,
+        "size": len(_entries),
+        "max_size": _entries.maxlen,
+        "pending_explains": _explain_queue.qsize(),
+    }
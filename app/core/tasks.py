@@ -0,0 +1,35 @@
+# app/core/tasks.py
+import threading
+from typing import Callable
+
+
+class PeriodicTask:
+    """Runs `func` every `interval` seconds on a daemon thread until stopped."""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.func()
+            except Exception as e:
+                # Keep the loop alive; the next run gets another chance
+                print(f"Background task {self.name} failed: {e}")
@@ -1,7 +1,36 @@
-from typing import List, Optional
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.core import config
+from app.core.async_db import async_db_cursor
 from app.core.db import db_cursor
+from app.core.pagination import decode_cursor
+from app.core.tasks import PeriodicTask
 from app.models.schemas import CategoryCreate, Category
 
+# Process-wide category cache: categories rarely change, so lookups by id (validation,
+# names for products/sales/reports) are served from memory. Warmed at startup, updated by
+# create_category and reconciled with the table every CATEGORY_CACHE_REFRESH_SECONDS.
+_category_cache: Dict[int, Category] = {}
+_category_cache_lock = threading.Lock()
+
+def warm_category_cache() -> int:
+    with db_cursor(read_only=True) as cursor:
+        cursor.execute("SELECT id, name, created_at FROM categories")
+        fresh = {row['id']: Category(**row) for row in cursor.fetchall()}
+    global _category_cache
+    with _category_cache_lock:
+        _category_cache = fresh
+    return len(fresh)
+
+def _cache_category(category: Category):
+    with _category_cache_lock:
+        _category_cache[category.id] = category
+
+category_cache_refresher = PeriodicTask(
+    "category-cache-refresh", config.CATEGORY_CACHE_REFRESH_SECONDS, warm_category_cache
+)
+
+
 def create_category(category: CategoryCreate) -> Optional[Category]:
     query = "INSERT INTO categories (name) VALUES (%s)"
     try:
@@ -11,25 +40,84 @@ def create_category(category: CategoryCreate) -> Optional[Category]:
             # Fetch the created category to return it
             cursor.execute("SELECT id, name, created_at FROM categories WHERE id = %s", (category_id,))
             created_cat_data = cursor.fetchone()
-            if created_cat_data:
-                return Category(**created_cat_data)
+        if created_cat_data:
+            created = Category(**created_cat_data)
+            _cache_category(created)
+            return created
         return None # Should not happen if insert was successful and commit True
+    except ConnectionError:
+        raise # Pool exhaustion / DB down is surfaced as a 503
     except Exception as e:
         print(f"Error creating category: {e}") # Log error
         return None # Or raise a custom exception
 
 def get_category_by_id(category_id: int) -> Optional[Category]:
+    cached = _category_cache.get(category_id)
+    if cached is not None:
+        return cached
+    # Not cached yet (e.g. created by another worker since the last refresh)
     query = "SELECT id, name, created_at FROM categories WHERE id = %s"
     with db_cursor() as cursor:
         cursor.execute(query, (category_id,))
         category_data = cursor.fetchone()
-        return Category(**category_data) if category_data else None
+    if not category_data:
+        return None
+    category = Category(**category_data)
+    _cache_category(category)
+    return category
 
-def get_all_categories(skip: int = 0, limit: int = 100) -> List[Category]:
-    query = "SELECT id, name, created_at FROM categories ORDER BY name LIMIT %s OFFSET %s"
-    categories = []
-    with db_cursor() as cursor:
-        cursor.execute(query, (limit, skip))
-        for row in cursor.fetchall():
-            categories.append(Category(**row))
-    return categories
+def get_cached_category(category_id: int) -> Optional[Category]:
+    """Cache-only lookup, for async callers that prefetched with prefetch_categories_async."""
+    return _category_cache.get(category_id)
+
+async def prefetch_categories_async(category_ids: Iterable[int]):
+    """Load whichever of `category_ids` the cache hasn't seen, in one query."""
+    unknown = {cid for cid in category_ids if cid and cid not in _category_cache}
+    if not unknown:
+        return
+    query = f"SELECT id, name, created_at FROM categories WHERE id IN ({', '.join(['%s'] * len(unknown))})"
+    async with async_db_cursor() as cursor:
+        await cursor.execute(query, tuple(unknown))
+        rows = await cursor.fetchall()
+    for row in rows:
+        _cache_category(Category(**row))
+
+def get_existing_category_ids(category_ids: Iterable[int]) -> Set[int]:
+    wanted = set(category_ids)
+    existing = {cid for cid in wanted if cid in _category_cache}
+    unknown = wanted - existing
+    if unknown:
+        # One lookup for everything the cache hasn't seen
+        query = f"SELECT id, name, created_at FROM categories WHERE id IN ({', '.join(['%s'] * len(unknown))})"
+        with db_cursor() as cursor:
+            cursor.execute(query, tuple(unknown))
+            rows = cursor.fetchall()
+        for row in rows:
+            _cache_category(Category(**row))
+            existing.add(row['id'])
+    return existing
+
+def _categories_query(skip: int, limit: int, page_cursor: Optional[str]) -> Tuple[str, list]:
+    query = "SELECT id, name, created_at FROM categories"
+    params = []
+    if page_cursor:
+        # Keyset pagination: continue after the last (name, id) seen, skip is ignored
+        after_name, after_id = decode_cursor(page_cursor, (str, int))
+        query += " WHERE (name > %s OR (name = %s AND id > %s))"
+        params.extend([after_name, after_name, after_id])
+        skip = 0
+    query += " ORDER BY name, id LIMIT %s OFFSET %s"
+    params.extend([limit, skip])
+    return query, params
+
+def get_all_categories(skip: int = 0, limit: int = 100, page_cursor: Optional[str] = None) -> List[Category]:
+    query, params = _categories_query(skip, limit, page_cursor)
+    with db_cursor(read_only=True) as cursor:
+        cursor.execute(query, tuple(params))
+        return [Category(**row) for row in cursor.fetchall()]
+
+async def get_all_categories_async(skip: int = 0, limit: int = 100, page_cursor: Optional[str] = None) -> List[Category]:
+    query, params = _categories_query(skip, limit, page_cursor)
+    async with async_db_cursor(read_only=True) as cursor:
+        await cursor.execute(query, tuple(params))
+        return [Category(**row) for row in await cursor.fetchall()]
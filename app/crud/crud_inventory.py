@@ -1,100 +1,479 @@
-from typing import List, Optional
+import threading
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Set, Tuple, Union
+from app.core import config
+from app.core.async_db import async_db_cursor
 from app.core.db import db_cursor
+from app.core.events import EventBroadcaster
+from app.core.pagination import decode_cursor
+from app.core.tasks import PeriodicTask
+from app.crud import crud_inventory_shards, crud_products
+from app.crud.crud_inventory_shards import STOCK_QUANTITY_SQL
 from app.models import schemas
 
+# Pushes a LowStockProduct whenever a write takes a product from above to at-or-below its threshold.
+# Writes in this process publish right away; those made by other workers (or outside the API)
+# are found by low_stock_poller.
+low_stock_events = EventBroadcaster()
+
+# Products already reported as low to this worker's streams; None while nobody is subscribed
+_known_low: Optional[Set[int]] = None
+_notified_during_poll: Set[int] = set()
+_known_low_lock = threading.Lock()
+
+def notify_low_stock_crossing(
+    product_id: int, product_name: str,
+    old_quantity: Optional[int], old_threshold: Optional[int],
+    new_quantity: int, new_threshold: int
+):
+    was_low = old_quantity is not None and old_threshold is not None and old_quantity <= old_threshold
+    if new_quantity <= new_threshold and not was_low:
+        with _known_low_lock:
+            if _known_low is not None:
+                _known_low.add(product_id)
+                _notified_during_poll.add(product_id)
+        low_stock_events.publish(schemas.LowStockProduct(
+            product_id=product_id, product_name=product_name,
+            current_quantity=new_quantity, low_stock_threshold=new_threshold
+        ))
+
+def poll_low_stock():
+    """
+    Publish products that went low since the last poll, whichever process wrote them: the
+    current low-stock list is diffed against the products already reported. Only runs while
+    a stream is subscribed; the first poll after that just records what is already low.
+    """
+    global _known_low
+    if not low_stock_events.subscriber_count:
+        with _known_low_lock:
+            _known_low = None
+        return
+    with _known_low_lock:
+        _notified_during_poll.clear()
+    # On the primary: a lagging replica would forget crossings just published by this process
+    with db_cursor() as cursor:
+        cursor.execute(LOW_STOCK_QUERY)
+        current = {row['product_id']: schemas.LowStockProduct(**row) for row in cursor.fetchall()}
+    with _known_low_lock:
+        seeding = _known_low is None
+        crossed = [] if seeding else [item for pid, item in current.items() if pid not in _known_low]
+        # Products no longer low are forgotten, so their next crossing is reported again
+        _known_low = set(current) | _notified_during_poll
+    for item in crossed:
+        low_stock_events.publish(item)
+
+low_stock_poller = PeriodicTask("low-stock-poll", config.LOW_STOCK_POLL_SECONDS, poll_low_stock)
+
+
+INVENTORY_BY_PRODUCT_QUERY = f"""
+    SELECT i.id, i.product_id, {STOCK_QUANTITY_SQL} as quantity, i.low_stock_threshold, i.last_updated,
+           p.name as product_name, p.description as product_description, p.price as product_price,
+           p.category_id as product_category_id
+    FROM inventory i
+    JOIN products p ON i.product_id = p.id
+    WHERE i.product_id = %s
+"""
+
+def _inventory_from_row(row: dict) -> schemas.Inventory:
+    product_data = schemas.Product(
+        id=row['product_id'], name=row['product_name'], description=row['product_description'],
+        price=row['product_price'], category_id=row['product_category_id'],
+        # Dummy values for created_at, updated_at as they are not primary in this context
+        created_at=row['last_updated'], updated_at=row['last_updated'] 
+    )
+    return schemas.Inventory(
+        id=row['id'], product_id=row['product_id'], quantity=row['quantity'],
+        low_stock_threshold=row['low_stock_threshold'], last_updated=row['last_updated'],
+        product=product_data
+    )
+
 def get_inventory_by_product_id(product_id: int) -> Optional[schemas.Inventory]:
-    query = """
-        SELECT i.id, i.product_id, i.quantity, i.low_stock_threshold, i.last_updated,
-               p.name as product_name, p.description as product_description, p.price as product_price,
-               p.category_id as product_category_id
+    with db_cursor() as cursor:
+        cursor.execute(INVENTORY_BY_PRODUCT_QUERY, (product_id,))
+        row = cursor.fetchone()
+    return _inventory_from_row(row) if row else None
+
+async def get_inventory_by_product_id_async(product_id: int) -> Optional[schemas.Inventory]:
+    async with async_db_cursor() as cursor:
+        await cursor.execute(INVENTORY_BY_PRODUCT_QUERY, (product_id,))
+        row = await cursor.fetchone()
+    return _inventory_from_row(row) if row else None
+
+def update_inventory(product_id: int, inventory_update: schemas.InventoryUpdate) -> Optional[schemas.Inventory]:
+    update_fields = {key: value for key, value in inventory_update.dict(exclude_unset=True).items() if value is not None}
+    if update_fields:
+        try:
+            batch_update_inventory(schemas.InventoryBatchUpdate(
+                mode="set", items=[schemas.InventoryAdjustment(product_id=product_id, **update_fields)]
+            ))
+        except ConnectionError:
+            raise # Pool exhaustion / DB down is surfaced as a 503
+        except Exception as e:
+            print(f"Error updating inventory for product {product_id}: {e}")
+            return None
+    return get_inventory_by_product_id(product_id)
+
+def batch_update_inventory(batch: schemas.InventoryBatchUpdate) -> List[schemas.Inventory]:
+    """
+    Applies every adjustment in one transaction: one locking SELECT, one CASE-based UPDATE and a
+    multi-row inventory_log INSERT. Returns only the rows whose quantity or threshold changed.
+    """
+    items = {item.product_id: item for item in batch.items}
+    product_ids = sorted(items) # Lock rows in a fixed order, same as record_order
+    in_clause = ", ".join(["%s"] * len(product_ids))
+    lock_query = f"""
+        SELECT i.id, i.product_id, i.quantity, i.low_stock_threshold, i.shard_count, NOW() as now,
+               p.name as p_name, p.description as p_description, p.price as p_price,
+               p.category_id as p_category_id, p.created_at as p_created_at, p.updated_at as p_updated_at
         FROM inventory i
         JOIN products p ON i.product_id = p.id
-        WHERE i.product_id = %s
+        WHERE i.product_id IN ({in_clause})
+        ORDER BY i.product_id
+        FOR UPDATE OF i
     """
-    with db_cursor() as cursor:
-        cursor.execute(query, (product_id,))
+    inventory_log_query = """
+        INSERT INTO inventory_log (product_id, change_in_quantity, reason)
+        VALUES (%s, %s, %s)
+    """
+
+    changed = [] # (locked row, new quantity, new threshold)
+    with db_cursor(commit=True) as cursor:
+        cursor.execute(lock_query, tuple(product_ids))
+        rows = {row['product_id']: row for row in cursor.fetchall()}
+        missing = [pid for pid in product_ids if pid not in rows]
+        if missing:
+            raise ValueError(f"Inventory not found for products: {', '.join(map(str, missing))}.")
+        # Sharded products: their stock is the sum of their (now locked) shards
+        shards = crud_inventory_shards.lock_shards(cursor, [pid for pid in product_ids if rows[pid]['shard_count']])
+        for pid, product_shards in shards.items():
+            rows[pid]['quantity'] += sum(quantity for _, quantity in product_shards)
+
+        negative = []
+        for pid in product_ids:
+            item, row = items[pid], rows[pid]
+            new_quantity = row['quantity']
+            if item.quantity is not None:
+                new_quantity = item.quantity if batch.mode == "set" else row['quantity'] + item.quantity
+            new_threshold = row['low_stock_threshold'] if item.low_stock_threshold is None else item.low_stock_threshold
+            if new_quantity < 0:
+                negative.append(f"{row['p_name']} (Available: {row['quantity']}, Change: {item.quantity})")
+            elif new_quantity != row['quantity'] or new_threshold != row['low_stock_threshold']:
+                changed.append((row, new_quantity, new_threshold))
+        if negative:
+            raise ValueError(f"Adjustment would make stock negative for: {'; '.join(negative)}")
+        if not changed:
+            return []
+
+        changed_ids = [row['product_id'] for row, _, _ in changed]
+        case_clause = " ".join(["WHEN %s THEN %s"] * len(changed))
+        update_query = f"""
+            UPDATE inventory
+            SET quantity = CASE product_id {case_clause} END,
+                low_stock_threshold = CASE product_id {case_clause} END,
+                last_updated = %s
+            WHERE product_id IN ({", ".join(["%s"] * len(changed))})
+        """
+        update_params = []
+        for row, new_quantity, _ in changed:
+            # Sharded products keep inventory.quantity at 0, their shards are rewritten below
+            update_params.extend([row['product_id'], 0 if row['shard_count'] else new_quantity])
+        for row, _, new_threshold in changed:
+            update_params.extend([row['product_id'], new_threshold])
+        update_params.append(rows[changed_ids[0]]['now'])
+        update_params.extend(changed_ids)
+        cursor.execute(update_query, tuple(update_params))
+        for row, new_quantity, _ in changed:
+            if row['shard_count'] and new_quantity != row['quantity']:
+                crud_inventory_shards.write_shards(cursor, row['product_id'], row['shard_count'], new_quantity)
+
+        log_rows = []
+        for row, new_quantity, _ in changed:
+            change = new_quantity - row['quantity']
+            if change:
+                log_rows.append((row['product_id'], change, batch.reason or ("Restock" if change > 0 else "Manual adjustment")))
+        if log_rows:
+            # executemany turns these into a single multi-row INSERT
+            cursor.executemany(inventory_log_query, log_rows)
+
+    crud_products.invalidate_product_cache(*changed_ids)
+    updated = []
+    for row, new_quantity, new_threshold in changed:
+        notify_low_stock_crossing(
+            row['product_id'], row['p_name'],
+            row['quantity'], row['low_stock_threshold'], new_quantity, new_threshold
+        )
+        product_data = schemas.Product(
+            id=row['product_id'], name=row['p_name'], description=row['p_description'],
+            price=row['p_price'], category_id=row['p_category_id'],
+            created_at=row['p_created_at'], updated_at=row['p_updated_at']
+        )
+        updated.append(schemas.Inventory(
+            id=row['id'], product_id=row['product_id'], quantity=new_quantity,
+            low_stock_threshold=new_threshold, last_updated=row['now'], product=product_data
+        ))
+    return updated
+
+def set_product_shards(product_id: int, shards: int) -> Optional[schemas.Inventory]:
+    """
+    Designate a hot product (shards > 0): its stock is spread evenly over `shards` sub-counter
+    rows so concurrent sales don't all wait on its inventory row. shards=0 folds the stock back
+    into inventory.quantity. Returns None if the product has no inventory row.
+    """
+    with db_cursor(commit=True) as cursor:
+        cursor.execute(
+            "SELECT quantity, shard_count FROM inventory WHERE product_id = %s FOR UPDATE", (product_id,)
+        )
         row = cursor.fetchone()
-        if row:
-            product_data = schemas.Product(
-                id=row['product_id'], name=row['product_name'], description=row['product_description'],
-                price=row['product_price'], category_id=row['product_category_id'],
-                # Dummy values for created_at, updated_at as they are not primary in this context
-                created_at=row['last_updated'], updated_at=row['last_updated'] 
+        if not row:
+            return None
+        product_shards = crud_inventory_shards.lock_shards(cursor, [product_id])[product_id]
+        total = row['quantity'] + sum(quantity for _, quantity in product_shards)
+        if shards:
+            crud_inventory_shards.write_shards(cursor, product_id, shards, total)
+            cursor.execute(
+                "UPDATE inventory SET quantity = 0, shard_count = %s WHERE product_id = %s", (shards, product_id)
             )
-            return schemas.Inventory(
-                id=row['id'], product_id=row['product_id'], quantity=row['quantity'],
-                low_stock_threshold=row['low_stock_threshold'], last_updated=row['last_updated'],
-                product=product_data
+        else:
+            cursor.execute("DELETE FROM inventory_shards WHERE product_id = %s", (product_id,))
+            cursor.execute(
+                "UPDATE inventory SET quantity = %s, shard_count = 0 WHERE product_id = %s", (total, product_id)
             )
-    return None
-
-def update_inventory(product_id: int, inventory_update: schemas.InventoryUpdate) -> Optional[schemas.Inventory]:
-    current_inventory = get_inventory_by_product_id(product_id)
-    if not current_inventory:
-        return None
+    crud_inventory_shards.note_shard_count(product_id, shards)
+    crud_products.invalidate_product_cache(product_id)
+    return get_inventory_by_product_id(product_id)
 
-    update_fields = inventory_update.dict(exclude_unset=True)
-    if not update_fields:
-        return current_inventory
+def _shape_inventory(row: dict) -> dict:
+    # JSON-ready Inventory fields, in schema order; product columns prefixed with p_
+    return {
+        "product_id": row['product_id'], "quantity": int(row['quantity']),
+        "low_stock_threshold": row['low_stock_threshold'], "id": row['id'], "last_updated": row['last_updated'],
+        "product": {
+            "name": row['p_name'], "description": row['p_description'], "price": float(row['p_price']),
+            "category_id": row['p_category_id'], "id": row['p_id'],
+            "created_at": row['p_created_at'], "updated_at": row['p_updated_at'], "category": None,
+        },
+    }
 
-    set_clauses = []
-    params = []
-    for key, value in update_fields.items():
-        set_clauses.append(f"{key} = %s")
-        params.append(value)
-    
-    params.append(product_id)
-    query = f"UPDATE inventory SET {', '.join(set_clauses)}, last_updated=NOW() WHERE product_id = %s"
-    
-    try:
-        with db_cursor(commit=True) as cursor:
-            cursor.execute(query, tuple(params))
-
-        return get_inventory_by_product_id(product_id)
-    except Exception as e:
-        print(f"Error updating inventory for product {product_id}: {e}")
-        return None
-
-def get_all_inventory_status(skip: int = 0, limit: int = 100) -> List[schemas.Inventory]:
-    query = """
-        SELECT i.id, i.product_id, i.quantity, i.low_stock_threshold, i.last_updated,
+def _inventory_status_query(skip: int, limit: int, page_cursor: Optional[str]) -> Tuple[str, list]:
+    query = f"""
+        SELECT i.id, i.product_id, {STOCK_QUANTITY_SQL} as quantity, i.low_stock_threshold, i.last_updated,
                p.id as p_id, p.name as p_name, p.description as p_description, 
                p.price as p_price, p.category_id as p_category_id,
                p.created_at as p_created_at, p.updated_at as p_updated_at
         FROM inventory i
         JOIN products p ON i.product_id = p.id
-        ORDER BY p.name
-        LIMIT %s OFFSET %s
     """
-    inventory_list = []
-    with db_cursor() as cursor:
-        cursor.execute(query, (limit, skip))
-        for row in cursor.fetchall():
-            product_data = schemas.Product(
-                id=row['p_id'], name=row['p_name'], description=row['p_description'],
-                price=row['p_price'], category_id=row['p_category_id'],
-                created_at=row['p_created_at'], updated_at=row['p_updated_at']
-            )
-            inventory_list.append(schemas.Inventory(
-                id=row['id'], product_id=row['product_id'], quantity=row['quantity'],
-                low_stock_threshold=row['low_stock_threshold'], last_updated=row['last_updated'],
-                product=product_data
-            ))
-    return inventory_list
+    params = []
+    if page_cursor:
+        # Keyset pagination: continue after the last (product name, product id) seen, skip is ignored
+        after_name, after_id = decode_cursor(page_cursor, (str, int))
+        query += " WHERE (p.name > %s OR (p.name = %s AND p.id > %s))"
+        params.extend([after_name, after_name, after_id])
+        skip = 0
+    query += " ORDER BY p.name, p.id LIMIT %s OFFSET %s"
+    params.extend([limit, skip])
+    return query, params
 
+def _shape_inventory_rows(rows: List[dict], as_dicts: bool) -> List[Union[schemas.Inventory, dict]]:
+    shaped = [_shape_inventory(row) for row in rows]
+    return shaped if as_dicts else [schemas.Inventory(**item) for item in shaped]
 
-def get_low_stock_alerts() -> List[schemas.LowStockProduct]:
-    query = """
+def get_all_inventory_status(
+    skip: int = 0, limit: int = 100, page_cursor: Optional[str] = None,
+    as_dicts: bool = False # JSON-ready dicts instead of schema objects, for the fast response path
+) -> List[Union[schemas.Inventory, dict]]:
+    query, params = _inventory_status_query(skip, limit, page_cursor)
+    with db_cursor(read_only=True) as cursor:
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+    return _shape_inventory_rows(rows, as_dicts)
+
+async def get_all_inventory_status_async(
+    skip: int = 0, limit: int = 100, page_cursor: Optional[str] = None, as_dicts: bool = False
+) -> List[Union[schemas.Inventory, dict]]:
+    query, params = _inventory_status_query(skip, limit, page_cursor)
+    async with async_db_cursor(read_only=True) as cursor:
+        await cursor.execute(query, tuple(params))
+        rows = await cursor.fetchall()
+    return _shape_inventory_rows(rows, as_dicts)
+
+
+# Unsharded products: range scan on idx_inventory_deficit. Sharded ones (few, found through
+# idx_inventory_sharded) have quantity 0 in the inventory row, so their totals are summed here.
+LOW_STOCK_QUERY = f"""
+    SELECT * FROM (
         SELECT p.id as product_id, p.name as product_name, 
                i.quantity as current_quantity, i.low_stock_threshold
         FROM inventory i
         JOIN products p ON i.product_id = p.id
-        WHERE i.quantity <= i.low_stock_threshold
-        ORDER BY (i.quantity - i.low_stock_threshold) ASC -- Show most critical first
+        WHERE i.stock_deficit <= 0 AND i.shard_count = 0
+        UNION ALL
+        SELECT p.id, p.name, {STOCK_QUANTITY_SQL}, i.low_stock_threshold
+        FROM inventory i
+        JOIN products p ON i.product_id = p.id
+        WHERE i.shard_count > 0 AND {STOCK_QUANTITY_SQL} <= i.low_stock_threshold
+    ) alerts
+    ORDER BY alerts.current_quantity - alerts.low_stock_threshold ASC -- Show most critical first
+"""
+
+def get_low_stock_alerts() -> List[schemas.LowStockProduct]:
+    with db_cursor(read_only=True, max_staleness=1) as cursor: # Alerts should reflect the latest sales
+        cursor.execute(LOW_STOCK_QUERY)
+        return [schemas.LowStockProduct(**row) for row in cursor.fetchall()]
+
+async def get_low_stock_alerts_async() -> List[schemas.LowStockProduct]:
+    async with async_db_cursor(read_only=True, max_staleness=1) as cursor:
+        await cursor.execute(LOW_STOCK_QUERY)
+        return [schemas.LowStockProduct(**row) for row in await cursor.fetchall()]
+
+
+# Bucket start per granularity, as DATETIME; both keep the (product_id, timestamp) range scan
+HISTORY_BUCKET_EXPRESSIONS = {
+    "hour": "TIMESTAMP(DATE(l.timestamp), SEC_TO_TIME(HOUR(l.timestamp) * 3600))",
+    "day": "TIMESTAMP(DATE(l.timestamp))",
+}
+HISTORY_MAX_DAYS = {"hour": 31, "day": 366}
+
+def _history_bounds(date_from: Optional[date], date_to: Optional[date]) -> Tuple[List[str], list]:
+    # Half-open bounds on the bare column: range scan on idx_inventory_log_product_time and partition pruning
+    conditions, params = [], []
+    if date_from:
+        conditions.append("l.timestamp >= %s")
+        params.append(datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        conditions.append("l.timestamp < %s")
+        params.append(datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    return conditions, params
+
+def _history_query(
+    product_id: int, date_from: Optional[date], date_to: Optional[date], limit: int, page_cursor: Optional[str]
+) -> Tuple[str, list]:
+    conditions, params = _history_bounds(date_from, date_to)
+    if page_cursor:
+        # Keyset pagination: continue after the last (timestamp, id) seen
+        after_timestamp, after_id = decode_cursor(page_cursor, (datetime, int))
+        conditions.append("l.timestamp <= %s AND (l.timestamp < %s OR (l.timestamp = %s AND l.id < %s))")
+        params.extend([after_timestamp, after_timestamp, after_timestamp, after_id])
+    query = f"""
+        SELECT l.id, l.product_id, l.change_in_quantity, l.reason, l.timestamp
+        FROM inventory_log l
+        WHERE {" AND ".join(["l.product_id = %s"] + conditions)}
+        ORDER BY l.timestamp DESC, l.id DESC
+        LIMIT %s
     """
-    low_stock_items = []
-    with db_cursor() as cursor:
-        cursor.execute(query)
-        for row in cursor.fetchall():
-            low_stock_items.append(schemas.LowStockProduct(**row))
-    return low_stock_items
\ No newline at end of file
+    return query, [product_id] + params + [limit]
+
+INVENTORY_EXISTS_QUERY = "SELECT 1 FROM inventory WHERE product_id = %s"
+
+def get_inventory_history(
+    product_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None,
+    limit: int = 100, page_cursor: Optional[str] = None
+) -> Optional[List[schemas.InventoryLogEntry]]:
+    """inventory_log entries for a product, newest first. None if the product has no inventory."""
+    query, params = _history_query(product_id, date_from, date_to, limit, page_cursor)
+    with db_cursor(read_only=True) as cursor:
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+        if not rows and not page_cursor:
+            cursor.execute(INVENTORY_EXISTS_QUERY, (product_id,))
+            if not cursor.fetchall():
+                return None
+    return [schemas.InventoryLogEntry(**row) for row in rows]
+
+async def get_inventory_history_async(
+    product_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None,
+    limit: int = 100, page_cursor: Optional[str] = None
+) -> Optional[List[schemas.InventoryLogEntry]]:
+    query, params = _history_query(product_id, date_from, date_to, limit, page_cursor)
+    async with async_db_cursor(read_only=True) as cursor:
+        await cursor.execute(query, tuple(params))
+        rows = await cursor.fetchall()
+        if not rows and not page_cursor:
+            await cursor.execute(INVENTORY_EXISTS_QUERY, (product_id,))
+            if not await cursor.fetchall():
+                return None
+    return [schemas.InventoryLogEntry(**row) for row in rows]
+
+def _history_bucket_queries(
+    product_id: int, bucket: str, date_from: Optional[date], date_to: Optional[date]
+) -> Tuple[Tuple[str, tuple], Tuple[str, tuple]]:
+    if bucket not in HISTORY_BUCKET_EXPRESSIONS:
+        raise ValueError(f"Invalid bucket. Must be one of: {', '.join(HISTORY_BUCKET_EXPRESSIONS)}.")
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=6)
+    if date_from > date_to:
+        raise ValueError("date_from must not be after date_to.")
+    if (date_to - date_from).days + 1 > HISTORY_MAX_DAYS[bucket]:
+        raise ValueError(f"{bucket.capitalize()}ly history covers at most {HISTORY_MAX_DAYS[bucket]} days per request.")
+    conditions, params = _history_bounds(date_from, date_to)
+    window_end = params[-1]
+
+    # Current stock and everything logged after the window in one statement (one read view)
+    level_query = f"""
+        SELECT {STOCK_QUANTITY_SQL} as quantity,
+               (SELECT COALESCE(SUM(l.change_in_quantity), 0) FROM inventory_log l
+                WHERE l.product_id = i.product_id AND l.timestamp >= %s) as later_change
+        FROM inventory i
+        WHERE i.product_id = %s
+    """
+    bucket_query = f"""
+        SELECT {HISTORY_BUCKET_EXPRESSIONS[bucket]} as bucket_start,
+               SUM(l.change_in_quantity) as net_change,
+               SUM(GREATEST(l.change_in_quantity, 0)) as units_in,
+               SUM(GREATEST(-l.change_in_quantity, 0)) as units_out,
+               COUNT(*) as entries
+        FROM inventory_log l
+        WHERE {" AND ".join(["l.product_id = %s"] + conditions)}
+        GROUP BY bucket_start
+        ORDER BY bucket_start
+    """
+    return (level_query, (window_end, product_id)), (bucket_query, tuple([product_id] + params))
+
+def _walk_history_buckets(level_row: dict, rows: List[dict]) -> List[schemas.InventoryHistoryBucket]:
+    # Walk back from the stock at the end of the window
+    level = int(level_row['quantity']) - int(level_row['later_change'])
+    buckets = []
+    for row in reversed(rows):
+        buckets.append(schemas.InventoryHistoryBucket(
+            bucket_start=row['bucket_start'], net_change=int(row['net_change']),
+            units_in=int(row['units_in']), units_out=int(row['units_out']),
+            entries=row['entries'], stock_level=level
+        ))
+        level -= int(row['net_change'])
+    buckets.reverse()
+    return buckets
+
+def get_inventory_history_buckets(
+    product_id: int, bucket: str, date_from: Optional[date] = None, date_to: Optional[date] = None
+) -> Optional[List[schemas.InventoryHistoryBucket]]:
+    """
+    Net stock movement of a product per hour or day over date_from..date_to (default: the last
+    7 days), oldest first, with the stock level at the end of each bucket. Only buckets with log
+    entries are returned. None if the product has no inventory.
+    """
+    (level_query, level_params), (bucket_query, bucket_params) = _history_bucket_queries(
+        product_id, bucket, date_from, date_to
+    )
+    with db_cursor(read_only=True) as cursor:
+        cursor.execute(level_query, level_params)
+        level_row = cursor.fetchone()
+        if not level_row:
+            return None
+        cursor.execute(bucket_query, bucket_params)
+        rows = cursor.fetchall()
+    return _walk_history_buckets(level_row, rows)
+
+async def get_inventory_history_buckets_async(
+    product_id: int, bucket: str, date_from: Optional[date] = None, date_to: Optional[date] = None
+) -> Optional[List[schemas.InventoryHistoryBucket]]:
+    (level_query, level_params), (bucket_query, bucket_params) = _history_bucket_queries(
+        product_id, bucket, date_from, date_to
+    )
+    async with async_db_cursor(read_only=True) as cursor:
+        await cursor.execute(level_query, level_params)
+        level_row = await cursor.fetchone()
+        if not level_row:
+            return None
+        await cursor.execute(bucket_query, bucket_params)
+        rows = await cursor.fetchall()
+    return _walk_history_buckets(level_row, rows)
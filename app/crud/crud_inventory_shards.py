@@ -0,0 +1,129 @@
+import random
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core import config
+from app.core.db import db_cursor
+from app.core.tasks import PeriodicTask
+
+# Hot products keep their stock in inventory_shards rows instead of inventory.quantity, so
+# concurrent sales lock one of several rows rather than all queueing on the same one. While a
+# product is sharded (inventory.shard_count > 0) its inventory.quantity stays 0 and the shards
+# hold the whole stock. Every read of stock goes through STOCK_QUANTITY_SQL.
+
+# Total stock of the inventory row aliased i. SUM makes the expression DECIMAL for every row,
+# sharded or not, so it is cast back to an integer (orjson doesn't serialize Decimal).
+STOCK_QUANTITY_SQL = """CAST(i.quantity + CASE WHEN i.shard_count > 0 THEN (
+    SELECT COALESCE(SUM(sh.quantity), 0) FROM inventory_shards sh WHERE sh.product_id = i.product_id
+) ELSE 0 END AS SIGNED)"""
+
+# product_id -> shard count, as of the last refresh. Only picks record_sale's first statement:
+# the row it reads afterwards is authoritative, so a stale entry costs a statement, never stock.
+_hot_products: Dict[int, int] = {}
+_hot_products_lock = threading.Lock()
+
+def load_hot_products() -> int:
+    with db_cursor() as cursor:
+        cursor.execute("SELECT product_id, shard_count FROM inventory WHERE shard_count > 0")
+        fresh = {row['product_id']: row['shard_count'] for row in cursor.fetchall()}
+    global _hot_products
+    with _hot_products_lock:
+        _hot_products = fresh
+    return len(fresh)
+
+def is_hot_product(product_id: int) -> bool:
+    return product_id in _hot_products
+
+def note_shard_count(product_id: int, shard_count: int):
+    with _hot_products_lock:
+        if shard_count > 0:
+            _hot_products[product_id] = shard_count
+        else:
+            _hot_products.pop(product_id, None)
+
+hot_product_refresher = PeriodicTask(
+    "hot-product-refresh", config.HOT_PRODUCT_REFRESH_SECONDS, load_hot_products
+)
+
+
+def lock_shards(cursor, product_ids: Iterable[int]) -> Dict[int, List[Tuple[int, int]]]:
+    """Lock the shard rows of `product_ids` (sorted, like every other multi-row lock) -> {product_id: [(shard, quantity)]}."""
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return {}
+    cursor.execute(f"""
+        SELECT product_id, shard, quantity FROM inventory_shards
+        WHERE product_id IN ({", ".join(["%s"] * len(product_ids))})
+        ORDER BY product_id, shard
+        FOR UPDATE
+    """, tuple(product_ids))
+    shards: Dict[int, List[Tuple[int, int]]] = {pid: [] for pid in product_ids}
+    for row in cursor.fetchall():
+        shards[row['product_id']].append((row['shard'], row['quantity']))
+    return shards
+
+def deduct_locked_shards(cursor, product_id: int, shards: List[Tuple[int, int]], quantity: int) -> List[Tuple[int, int]]:
+    """
+    Take `quantity` from shards already locked by lock_shards, fullest first, and return the
+    remaining (shard, quantity) list. The caller has checked that the shards hold enough.
+    """
+    remaining = dict(shards)
+    taken = []
+    for shard, available in sorted(shards, key=lambda item: -item[1]):
+        if quantity <= 0:
+            break
+        take = min(available, quantity)
+        if take:
+            taken.append((shard, take))
+            remaining[shard] -= take
+            quantity -= take
+    if quantity > 0:
+        raise ValueError(f"Shards of product {product_id} hold less stock than requested.")
+    case_clause = " ".join(["WHEN %s THEN %s"] * len(taken))
+    params = [value for pair in taken for value in pair]
+    params.append(product_id)
+    params.extend(shard for shard, _ in taken)
+    cursor.execute(f"""
+        UPDATE inventory_shards SET quantity = quantity - CASE shard {case_clause} END
+        WHERE product_id = %s AND shard IN ({", ".join(["%s"] * len(taken))})
+    """, tuple(params))
+    return sorted(remaining.items())
+
+def take_sharded_stock(cursor, product_id: int, quantity: int, shard_count: int) -> Optional[int]:
+    """
+    Take `quantity` units of a sharded product; returns the shard it was (mostly) taken from, or
+    None if the product doesn't have that much stock.
+
+    Fast path: a conditional UPDATE of one randomly chosen shard that (per a non-locking read)
+    can cover the sale, which only locks that row. Otherwise every shard is locked in order and
+    the sale is split across them, so a product with enough stock in total never turns a sale
+    away and one without enough can never go negative. The fast path is only tried when it is
+    expected to succeed: a failed conditional UPDATE keeps its row lock, and holding one shard
+    while locking all of them in order can deadlock with another sale doing the same. That can
+    still happen if the shard is drained between the read and the UPDATE; record_sale retries
+    deadlocks.
+    """
+    cursor.execute("SELECT shard, quantity FROM inventory_shards WHERE product_id = %s", (product_id,))
+    candidates = [row['shard'] for row in cursor.fetchall() if row['quantity'] >= quantity and row['shard'] < shard_count]
+    if candidates:
+        shard = random.choice(candidates)
+        cursor.execute("""
+            UPDATE inventory_shards SET quantity = quantity - %s
+            WHERE product_id = %s AND shard = %s AND quantity >= %s
+        """, (quantity, product_id, shard, quantity))
+        if cursor.rowcount == 1:
+            return shard
+    shards = lock_shards(cursor, [product_id])[product_id]
+    if sum(available for _, available in shards) < quantity:
+        return None
+    fullest = max(shards, key=lambda item: item[1])[0]
+    deduct_locked_shards(cursor, product_id, shards, quantity)
+    return fullest
+
+def write_shards(cursor, product_id: int, shard_count: int, total: int):
+    """Spread `total` evenly over shards 0..shard_count-1 and drop any shard beyond them (rows must be locked)."""
+    base, extra = divmod(total, shard_count)
+    cursor.executemany("""
+        INSERT INTO inventory_shards (product_id, shard, quantity) VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE quantity = VALUES(quantity)
+    """, [(product_id, shard, base + (1 if shard < extra else 0)) for shard in range(shard_count)])
+    cursor.execute("DELETE FROM inventory_shards WHERE product_id = %s AND shard >= %s", (product_id, shard_count))
@@ -0,0 +1,184 @@
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from app.core import config
+from app.core.db import db_cursor
+from app.core.tasks import PeriodicTask
+
+# sales and inventory_log are RANGE partitioned by month on UNIX_TIMESTAMP(<column>) (the only
+# partitioning function MySQL allows on TIMESTAMP columns). Partition p<YYYYMM> holds that
+# month; p_start holds everything older and p_future everything newer than the last monthly
+# partition, so inserts never fail for lack of a partition. Queries that filter the column
+# with plain comparisons (no functions wrapped around it) only read the matching months.
+PARTITIONED_TABLES: Dict[str, str] = {"sales": "sale_date", "inventory_log": "timestamp"}
+START_PARTITION = "p_start"
+FUTURE_PARTITION = "p_future"
+# Named lock serializing maintenance between API workers and the script
+MAINTENANCE_LOCK = "partition_maintenance"
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def _partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+def _partition_definition(month: date) -> str:
+    # Bound literals are generated here from dates, never from user input
+    return (f"PARTITION {_partition_name(month)} VALUES LESS THAN "
+            f"(UNIX_TIMESTAMP('{_add_months(month, 1):%Y-%m-%d} 00:00:00'))")
+
+
+def get_partitions(cursor, table: str) -> List[dict]:
+    """Partitions of `table` in order: name, upper_bound (exclusive; None for MAXVALUE) and approx_rows."""
+    # Bounds were created from local midnights, so converting back in the session time zone is exact
+    cursor.execute("""
+        SELECT PARTITION_NAME as name, TABLE_ROWS as approx_rows,
+               IF(PARTITION_DESCRIPTION = 'MAXVALUE', NULL,
+                  FROM_UNIXTIME(CAST(PARTITION_DESCRIPTION AS UNSIGNED))) as upper_bound
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    return cursor.fetchall()
+
+
+@contextmanager
+def _maintenance_cursor():
+    """db_cursor holding MAINTENANCE_LOCK, or None if another process is maintaining partitions."""
+    with db_cursor() as cursor:
+        cursor.execute("SELECT GET_LOCK(%s, 0) as acquired", (MAINTENANCE_LOCK,))
+        if not cursor.fetchone()['acquired']:
+            print("Partition maintenance is already running in another process, skipping.")
+            yield None
+            return
+        try:
+            yield cursor
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MAINTENANCE_LOCK,))
+            cursor.fetchall()
+
+
+def ensure_partitions(months_ahead: Optional[int] = None, since: Optional[date] = None) -> List[str]:
+    """
+    Make sure every partitioned table has monthly partitions up to `months_ahead` months past the
+    current one by splitting them off p_future (cheap while p_future is empty). With `since`, the
+    history in p_start is split into monthly partitions from that month on as well, so it can be
+    archived month by month. Returns the names of the partitions created.
+    """
+    months_ahead = config.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    last_month = _add_months(_month_start(date.today()), months_ahead)
+    created = []
+    with _maintenance_cursor() as cursor:
+        for table in (PARTITIONED_TABLES if cursor else []):
+            partitions = get_partitions(cursor, table)
+            names = [partition['name'] for partition in partitions]
+            if START_PARTITION not in names or FUTURE_PARTITION not in names:
+                print(f"Skipping {table}: not partitioned (apply sql/migrations/004_partition_sales_inventory_log.sql).")
+                continue
+            start = partitions[0]
+            if since and start['upper_bound'] and _month_start(since) < start['upper_bound'].date():
+                months = []
+                month = _month_start(since)
+                while month < start['upper_bound'].date():
+                    months.append(month)
+                    month = _add_months(month, 1)
+                definitions = [
+                    f"PARTITION {START_PARTITION} VALUES LESS THAN "
+                    f"(UNIX_TIMESTAMP('{months[0]:%Y-%m-%d} 00:00:00'))"
+                ] + [_partition_definition(month) for month in months]
+                cursor.execute(
+                    f"ALTER TABLE {table} REORGANIZE PARTITION {START_PARTITION} INTO ({', '.join(definitions)})"
+                )
+                created.extend(f"{table}.{_partition_name(month)}" for month in months)
+
+            bounded = [partition for partition in partitions if partition['upper_bound'] is not None]
+            next_month = _month_start(bounded[-1]['upper_bound'].date())
+            months = []
+            while next_month <= last_month:
+                months.append(next_month)
+                next_month = _add_months(next_month, 1)
+            if not months:
+                continue
+            definitions = [_partition_definition(month) for month in months]
+            definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+            cursor.execute(
+                f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({', '.join(definitions)})"
+            )
+            created.extend(f"{table}.{_partition_name(month)}" for month in months)
+    if created:
+        print(f"Created partitions: {', '.join(created)}")
+    return created
+
+partition_maintainer = PeriodicTask(
+    "partition-maintenance", config.PARTITION_MAINTENANCE_INTERVAL, ensure_partitions
+)
+
+
+def archive_partitions(retention_months: Dict[str, int], dry_run: bool = False) -> List[str]:
+    """
+    Move monthly partitions that ended more than `retention_months[table]` months ago (0 = keep
+    everything) out of the live table: each is swapped with EXCHANGE PARTITION into its own
+    table `<table>_archive_<partition>` (a metadata-only operation) and then dropped from the
+    live table. The archive tables can be dumped and dropped at leisure. A run interrupted
+    between the exchange and the drop is finished by the next one; a partition whose archive
+    table already holds other rows is left alone.
+    Returns the archive tables created (or that would be, with `dry_run`).
+    """
+    archived = []
+    with _maintenance_cursor() as cursor:
+        for table, months in (retention_months.items() if cursor else []):
+            if table not in PARTITIONED_TABLES or months <= 0:
+                continue
+            cutoff = _add_months(_month_start(date.today()), -months)
+            for partition in get_partitions(cursor, table):
+                upper_bound = partition['upper_bound']
+                if upper_bound is None or upper_bound > datetime.combine(cutoff, datetime.min.time()):
+                    continue
+                if partition['name'] == START_PARTITION:
+                    # The catch-all stays in place (emptied) and is only worth archiving while it holds rows
+                    cursor.execute(f"SELECT 1 FROM {table} PARTITION ({START_PARTITION}) LIMIT 1")
+                    if not cursor.fetchall():
+                        continue
+                    archive_table = f"{table}_archive_before_{upper_bound:%Y%m}"
+                else:
+                    archive_table = f"{table}_archive_{partition['name']}"
+                cursor.execute("""
+                    SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                """, (archive_table,))
+                archive_exists = bool(cursor.fetchall())
+                if archive_exists:
+                    cursor.execute(f"SELECT 1 FROM {archive_table} LIMIT 1")
+                    if cursor.fetchall():
+                        # Exchanged by an earlier run that stopped before dropping the (now empty) partition
+                        cursor.execute(f"SELECT 1 FROM {table} PARTITION ({partition['name']}) LIMIT 1")
+                        if cursor.fetchall() or partition['name'] == START_PARTITION:
+                            print(f"Skipping {table}.{partition['name']}: {archive_table} already holds other rows.")
+                        else:
+                            print(f"{'Would drop' if dry_run else 'Dropping'} {table}.{partition['name']}, "
+                                  f"already archived into {archive_table}")
+                            if not dry_run:
+                                cursor.execute(f"ALTER TABLE {table} DROP PARTITION {partition['name']}")
+                        continue
+                archived.append(archive_table)
+                print(f"{'Would archive' if dry_run else 'Archiving'} {table}.{partition['name']} "
+                      f"(~{partition['approx_rows']} rows, before {upper_bound:%Y-%m-%d}) into {archive_table}")
+                if dry_run:
+                    continue
+                if not archive_exists:
+                    cursor.execute(f"CREATE TABLE {archive_table} LIKE {table}")
+                if get_partitions(cursor, archive_table):
+                    cursor.execute(f"ALTER TABLE {archive_table} REMOVE PARTITIONING")
+                cursor.execute(f"ALTER TABLE {table} EXCHANGE PARTITION {partition['name']} WITH TABLE {archive_table}")
+                if partition['name'] != START_PARTITION:
+                    cursor.execute(f"ALTER TABLE {table} DROP PARTITION {partition['name']}")
+    return archived
+
+
+def get_partition_report() -> Dict[str, List[dict]]:
+    with db_cursor() as cursor:
+        return {table: get_partitions(cursor, table) for table in PARTITIONED_TABLES}
@@ -1,5 +1,12 @@
-from typing import List, Optional
+import re
+from typing import Callable, List, Optional, Tuple, Union
+from app.core import config
+from app.core.async_db import async_db_cursor
+from app.core.cache import LRUCache
 from app.core.db import db_cursor
+from app.core.pagination import decode_cursor
+from app.crud import crud_categories
+from app.crud.crud_inventory_shards import STOCK_QUANTITY_SQL
 from app.models import schemas
 
 def create_product(product_in: schemas.ProductCreate) -> Optional[schemas.ProductWithInventory]:
@@ -32,88 +39,273 @@ def create_product(product_in: schemas.ProductCreate) -> Optional[schemas.Produc
         # Fetch the created product with its inventory details
         return get_product_by_id(product_id)
 
+    except ConnectionError:
+        raise # Pool exhaustion / DB down is surfaced as a 503
     except Exception as e:
         print(f"Error creating product and inventory: {e}")
         return None
 
 
-def get_product_by_id(product_id: int) -> Optional[schemas.ProductWithInventory]:
-    query = """
-        SELECT p.id, p.name, p.description, p.price, p.category_id, p.created_at, p.updated_at,
-               c.id as cat_id, c.name as cat_name, c.created_at as cat_created_at,
-               i.quantity as inventory_quantity, i.low_stock_threshold
-        FROM products p
-        LEFT JOIN categories c ON p.category_id = c.id
-        LEFT JOIN inventory i ON p.id = i.product_id
-        WHERE p.id = %s
+def import_products(
+    rows: List[Tuple[int, schemas.ProductCreate]], chunk_size: int = 1000
+) -> List[schemas.ProductImportRowResult]:
+    """
+    Create many products and their inventory rows with multi-row INSERTs, one transaction per chunk.
+
+    `rows` pairs each product with its position in the upload. A chunk that fails is rolled back and
+    reported row by row; later chunks still run.
+    """
+    results = []
+    valid_category_ids = crud_categories.get_existing_category_ids(
+        p.category_id for _, p in rows if p.category_id is not None
+    )
+    insertable = []
+    for row_number, product_in in rows:
+        if product_in.category_id is not None and product_in.category_id not in valid_category_ids:
+            results.append(schemas.ProductImportRowResult(
+                row=row_number, status="error", error=f"Category with id {product_in.category_id} not found"
+            ))
+        else:
+            insertable.append((row_number, product_in))
+
+    product_query = """
+        INSERT INTO products (name, description, price, category_id)
+        VALUES (%s, %s, %s, %s)
+    """
+    inventory_query = """
+        INSERT INTO inventory (product_id, quantity, low_stock_threshold)
+        VALUES (%s, %s, %s)
     """
+    for start in range(0, len(insertable), chunk_size):
+        chunk = insertable[start:start + chunk_size]
+        try:
+            with db_cursor(commit=True) as cursor:
+                cursor.execute("SELECT @@SESSION.auto_increment_increment as id_step")
+                id_step = int(cursor.fetchone()['id_step'] or 1)
+                # executemany turns each of these into a single multi-row INSERT
+                cursor.executemany(product_query, [
+                    (p.name, p.description, p.price, p.category_id) for _, p in chunk
+                ])
+                first_id = cursor.lastrowid
+                if not first_id:
+                    raise Exception("Failed to create products, no ID returned.")
+                # A multi-row INSERT gets consecutive auto-increment ids
+                product_ids = [first_id + i * id_step for i in range(len(chunk))]
+                cursor.executemany(inventory_query, [
+                    (product_id, p.initial_quantity, p.low_stock_threshold)
+                    for product_id, (_, p) in zip(product_ids, chunk)
+                ])
+            results.extend(
+                schemas.ProductImportRowResult(row=row_number, status="created", product_id=product_id)
+                for product_id, (row_number, _) in zip(product_ids, chunk)
+            )
+        except ConnectionError as e:
+            # Earlier chunks are already committed, so report instead of failing the whole request
+            results.extend(
+                schemas.ProductImportRowResult(row=row_number, status="error", error=f"Database unavailable: {e}")
+                for row_number, _ in insertable[start:]
+            )
+            break
+        except Exception as e:
+            print(f"Error importing products (rows {chunk[0][0]}-{chunk[-1][0]}): {e}")
+            results.extend(
+                schemas.ProductImportRowResult(row=row_number, status="error", error=f"Chunk insert failed: {e}")
+                for row_number, _ in chunk
+            )
+    results.sort(key=lambda r: r.row)
+    return results
+
+
+# Read-through cache for get_product_by_id. Each entry carries the row version
+# (products.updated_at, inventory.last_updated, stock) it was built from, so any fresher read of
+# the same product (e.g. a listing) can spot and drop a stale entry. Stock is part of it because
+# sales of sharded products only touch inventory_shards, not the inventory row.
+_product_cache = LRUCache(config.PRODUCT_CACHE_SIZE, config.PRODUCT_CACHE_TTL)
+
+def _row_version(row: dict) -> tuple:
+    return (row['updated_at'], row['inventory_last_updated'], row['inventory_quantity'])
+
+def invalidate_product_cache(*product_ids: int):
+    for product_id in product_ids:
+        _product_cache.invalidate(product_id)
+
+def get_product_cache_stats() -> dict:
+    return _product_cache.stats()
+
+
+def _shape_product_with_inventory(
+    row: dict, category_lookup: Callable[[int], Optional[schemas.Category]] = crud_categories.get_category_by_id
+) -> dict:
+    # JSON-ready ProductWithInventory fields, in schema order
+    # Category details come from the in-process category cache instead of a join
+    category = category_lookup(row['category_id']) if row['category_id'] else None
+    return {
+        "name": row['name'], "description": row['description'], "price": float(row['price']),
+        "category_id": row['category_id'], "id": row['id'],
+        "created_at": row['created_at'], "updated_at": row['updated_at'],
+        "category": category.model_dump() if category else None,
+        "inventory_quantity": None if row['inventory_quantity'] is None else int(row['inventory_quantity']),
+        "low_stock_threshold": row['low_stock_threshold'],
+    }
+
+def _product_with_inventory_from_row(
+    row: dict, category_lookup: Callable[[int], Optional[schemas.Category]] = crud_categories.get_category_by_id
+) -> schemas.ProductWithInventory:
+    return schemas.ProductWithInventory(**_shape_product_with_inventory(row, category_lookup))
+
+
+PRODUCT_WITH_INVENTORY_SELECT = f"""
+    SELECT p.id, p.name, p.description, p.price, p.category_id, p.created_at, p.updated_at,
+           {STOCK_QUANTITY_SQL} as inventory_quantity, i.low_stock_threshold, i.last_updated as inventory_last_updated
+    FROM products p
+    LEFT JOIN inventory i ON p.id = i.product_id
+"""
+
+def get_product_by_id(product_id: int) -> Optional[schemas.ProductWithInventory]:
+    if config.PRODUCT_CACHE_ENABLED:
+        cached = _product_cache.get(product_id)
+        if cached is not None:
+            return cached
+    generation = _product_cache.generation
+    query = PRODUCT_WITH_INVENTORY_SELECT + " WHERE p.id = %s"
+    # Primary only: results are cached, and this is the read-after-write lookup for create/update
     with db_cursor() as cursor:
         cursor.execute(query, (product_id,))
         row = cursor.fetchone()
-        if row:
-            category_data = None
-            if row['cat_id']:
-                category_data = schemas.Category(id=row['cat_id'], name=row['cat_name'], created_at=row['cat_created_at'])
-            
-            return schemas.ProductWithInventory(
-                id=row['id'], name=row['name'], description=row['description'],
-                price=row['price'], category_id=row['category_id'],
-                created_at=row['created_at'], updated_at=row['updated_at'],
-                category=category_data,
-                inventory_quantity=row['inventory_quantity'],
-                low_stock_threshold=row['low_stock_threshold']
-            )
-    return None
+    if not row:
+        return None
+    product = _product_with_inventory_from_row(row)
+    if config.PRODUCT_CACHE_ENABLED:
+        # Skipped if a write invalidated this product while we were reading
+        _product_cache.set(product_id, product, meta=_row_version(row), if_generation=generation)
+    return product
 
-def get_all_products(
-    skip: int = 0, limit: int = 100, 
-    category_id: Optional[int] = None, 
-    name_filter: Optional[str] = None
-) -> List[schemas.ProductWithInventory]:
-    base_query = """
-        SELECT p.id, p.name, p.description, p.price, p.category_id, p.created_at, p.updated_at,
-               c.id as cat_id, c.name as cat_name, c.created_at as cat_created_at,
-               i.quantity as inventory_quantity, i.low_stock_threshold
-        FROM products p
-        LEFT JOIN categories c ON p.category_id = c.id
-        LEFT JOIN inventory i ON p.id = i.product_id
+async def get_product_by_id_async(product_id: int) -> Optional[schemas.ProductWithInventory]:
+    if config.PRODUCT_CACHE_ENABLED:
+        cached = _product_cache.get(product_id)
+        if cached is not None:
+            return cached
+    generation = _product_cache.generation
+    async with async_db_cursor() as cursor:
+        await cursor.execute(PRODUCT_WITH_INVENTORY_SELECT + " WHERE p.id = %s", (product_id,))
+        row = await cursor.fetchone()
+    if not row:
+        return None
+    await crud_categories.prefetch_categories_async([row['category_id']])
+    product = _product_with_inventory_from_row(row, crud_categories.get_cached_category)
+    if config.PRODUCT_CACHE_ENABLED:
+        _product_cache.set(product_id, product, meta=_row_version(row), if_generation=generation)
+    return product
+
+def _name_search_condition(name_filter: str) -> Tuple[Optional[str], list]:
+    """
+    Build the WHERE fragment for a product name search.
+
+    Words at least PRODUCT_SEARCH_NGRAM_SIZE long go through the ngram FULLTEXT index
+    (ft_product_name), which matches them anywhere in the name. Shorter input can't be
+    looked up in an ngram index, so it becomes a prefix match on idx_product_name.
     """
+    words = re.findall(r"\w+", name_filter)
+    indexed_words = [w for w in words if len(w) >= config.PRODUCT_SEARCH_NGRAM_SIZE]
+    if indexed_words:
+        boolean_query = " ".join(f"+{w}*" for w in indexed_words)
+        return "MATCH(p.name) AGAINST (%s IN BOOLEAN MODE)", [boolean_query]
+    if not name_filter.strip():
+        return None, []
+    return "p.name LIKE %s", [_like_prefix(name_filter)]
+
+def _like_prefix(term: str) -> str:
+    escaped = term.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+def _products_query(
+    skip: int, limit: int, category_id: Optional[int], name_filter: Optional[str],
+    page_cursor: Optional[str], sort: str
+) -> Tuple[str, list]:
+    if sort not in ("name", "relevance"):
+        raise ValueError("Invalid sort. Must be 'name' or 'relevance'.")
+    if sort == "relevance" and page_cursor:
+        raise ValueError("Cursor pagination is only available when sorting by name.")
+
+    base_query = PRODUCT_WITH_INVENTORY_SELECT
     conditions = []
     params = []
 
     if category_id is not None:
         conditions.append("p.category_id = %s")
         params.append(category_id)
-    if name_filter:
-        conditions.append("p.name LIKE %s")
-        params.append(f"%{name_filter}%")
+    search_condition, search_params = _name_search_condition(name_filter) if name_filter else (None, [])
+    if search_condition:
+        conditions.append(search_condition)
+        params.extend(search_params)
+    if page_cursor:
+        # Keyset pagination: continue after the last (name, id) seen, skip is ignored
+        after_name, after_id = decode_cursor(page_cursor, (str, int))
+        conditions.append("(p.name > %s OR (p.name = %s AND p.id > %s))")
+        params.extend([after_name, after_name, after_id])
+        skip = 0
 
     if conditions:
         base_query += " WHERE " + " AND ".join(conditions)
     
-    base_query += " ORDER BY p.name LIMIT %s OFFSET %s"
+    if sort == "relevance" and search_condition:
+        # Names starting with the search term first, then by FULLTEXT score
+        order_by = "p.name LIKE %s DESC"
+        params.append(_like_prefix(name_filter))
+        if search_condition.startswith("MATCH"):
+            order_by += ", MATCH(p.name) AGAINST (%s IN BOOLEAN MODE) DESC"
+            params.extend(search_params)
+        base_query += f" ORDER BY {order_by}, p.name, p.id LIMIT %s OFFSET %s"
+    else:
+        base_query += " ORDER BY p.name, p.id LIMIT %s OFFSET %s"
     params.extend([limit, skip])
+    return base_query, params
 
+def _shape_product_rows(
+    rows: List[dict], as_dicts: bool,
+    category_lookup: Callable[[int], Optional[schemas.Category]] = crud_categories.get_category_by_id
+) -> List[Union[schemas.ProductWithInventory, dict]]:
     products_list = []
-    with db_cursor() as cursor:
-        cursor.execute(base_query, tuple(params))
-        for row in cursor.fetchall():
-            category_data = None
-            if row['cat_id']:
-                category_data = schemas.Category(id=row['cat_id'], name=row['cat_name'], created_at=row['cat_created_at'])
-            
-            products_list.append(
-                schemas.ProductWithInventory(
-                    id=row['id'], name=row['name'], description=row['description'],
-                    price=row['price'], category_id=row['category_id'],
-                    created_at=row['created_at'], updated_at=row['updated_at'],
-                    category=category_data,
-                    inventory_quantity=row['inventory_quantity'],
-                    low_stock_threshold=row['low_stock_threshold']
-                )
-            )
+    for row in rows:
+        # The listing has the current row version at hand: drop cached copies built from an older one
+        version = _row_version(row)
+        _product_cache.invalidate_if(row['id'], lambda cached_version: cached_version != version)
+        products_list.append(
+            _shape_product_with_inventory(row, category_lookup) if as_dicts
+            else _product_with_inventory_from_row(row, category_lookup)
+        )
     return products_list
 
+def get_all_products(
+    skip: int = 0, limit: int = 100, 
+    category_id: Optional[int] = None, 
+    name_filter: Optional[str] = None,
+    page_cursor: Optional[str] = None,
+    sort: str = "name", # "name" or "relevance" (only meaningful with name_filter)
+    as_dicts: bool = False # JSON-ready dicts instead of schema objects, for the fast response path
+) -> List[Union[schemas.ProductWithInventory, dict]]:
+    query, params = _products_query(skip, limit, category_id, name_filter, page_cursor, sort)
+    with db_cursor(read_only=True) as cursor:
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+    return _shape_product_rows(rows, as_dicts)
+
+async def get_all_products_async(
+    skip: int = 0, limit: int = 100,
+    category_id: Optional[int] = None,
+    name_filter: Optional[str] = None,
+    page_cursor: Optional[str] = None,
+    sort: str = "name",
+    as_dicts: bool = False
+) -> List[Union[schemas.ProductWithInventory, dict]]:
+    query, params = _products_query(skip, limit, category_id, name_filter, page_cursor, sort)
+    async with async_db_cursor(read_only=True) as cursor:
+        await cursor.execute(query, tuple(params))
+        rows = await cursor.fetchall()
+    await crud_categories.prefetch_categories_async(row['category_id'] for row in rows)
+    return _shape_product_rows(rows, as_dicts, crud_categories.get_cached_category)
+
 def update_product(product_id: int, product_update: schemas.ProductUpdate) -> Optional[schemas.ProductWithInventory]:
     # Fetch current product data to only update provided fields
     current_product = get_product_by_id(product_id)
@@ -141,7 +333,10 @@ def update_product(product_id: int, product_update: schemas.ProductUpdate) -> Op
             cursor.execute(query, tuple(params))
             if cursor.rowcount == 0: # No rows updated, possibly product_id not found (though checked above)
                 return None
+        invalidate_product_cache(product_id)
         return get_product_by_id(product_id) # Fetch updated product
+    except ConnectionError:
+        raise # Pool exhaustion / DB down is surfaced as a 503
     except Exception as e:
         print(f"Error updating product {product_id}: {e}")
         return None
\ No newline at end of file
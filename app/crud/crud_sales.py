@@ -1,56 +1,188 @@
-from typing import List, Optional, Tuple
-from datetime import date, datetime
+import uuid
+import mysql.connector
+from mysql.connector import errorcode
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+from datetime import date, datetime, timedelta
+from app.core import config
+from app.core.async_db import async_db_cursor
+from app.core.batching import MicroBatcher
+from app.core.cache import LRUCache
 from app.core.db import db_cursor
+from app.core.pagination import decode_cursor
+from app.crud import crud_categories, crud_inventory, crud_inventory_shards, crud_products
+from app.crud.crud_inventory_shards import STOCK_QUANTITY_SQL
 from app.models import schemas
-from app.crud import crud_products, crud_inventory # For getting product price and updating inventory
 
-def record_sale(sale_in: schemas.SaleCreate) -> Optional[schemas.Sale]:
-    # 1. Get current product price
-    product_details = crud_products.get_product_by_id(sale_in.product_id)
-    if not product_details:
-        raise ValueError(f"Product with ID {sale_in.product_id} not found.")
-    
-    sale_price = product_details.price # Price at the time of sale
+# Daily revenue rollup, kept current inside every sale transaction (category 0 = uncategorized).
+# Sales of a sharded product upsert the row of the inventory shard they took stock from, so they
+# don't queue on one rollup row either; readers always SUM over shards.
+ROLLUP_UPSERT_QUERY = """
+    INSERT INTO sales_daily_rollup (day, product_id, category_id, shard, units_sold, sale_count, revenue)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        units_sold = units_sold + VALUES(units_sold),
+        sale_count = sale_count + VALUES(sale_count),
+        revenue = revenue + VALUES(revenue)
+"""
 
-    # 2. Check if enough stock is available
-    if product_details.inventory_quantity is None or product_details.inventory_quantity < sale_in.quantity_sold:
-        raise ValueError(f"Not enough stock for product {product_details.name}. Available: {product_details.inventory_quantity}, Requested: {sale_in.quantity_sold}")
+def _rollup_params(sale_date: datetime, product_row: dict, units: int, sale_count: int, revenue, shard: int = 0) -> tuple:
+    return (sale_date.date(), product_row['id'], product_row['category_id'] or 0, shard, units, sale_count, revenue)
 
-    sale_query = """
-        INSERT INTO sales (product_id, quantity_sold, sale_price_at_time_of_sale, order_id, sale_date)
-        VALUES (%s, %s, %s, %s, NOW()) 
-    """
+
+# Revenue reports keyed on their normalized parameters; each entry's metadata is the list of
+# (start, end) date ranges it aggregates (None = open-ended) so a sale only evicts reports covering its day.
+_revenue_cache = LRUCache(config.REVENUE_CACHE_SIZE, config.REVENUE_CACHE_TTL)
+
+def _store_revenue(key: tuple, ranges: List[Tuple[Optional[date], Optional[date]]], result, generation: int):
+    # Sales are always dated now, so a range that ended before today can no longer change
+    today = date.today()
+    if all(end is not None and end < today for _, end in ranges):
+        ttl = config.REVENUE_CACHE_HISTORICAL_TTL or None
+    else:
+        ttl = config.REVENUE_CACHE_TTL
+    _revenue_cache.set(key, result, ttl=ttl, meta=ranges, if_generation=generation)
+
+def _cached_revenue(key: tuple, ranges: List[Tuple[Optional[date], Optional[date]]], compute):
+    if not config.REVENUE_CACHE_ENABLED:
+        return compute()
+    cached = _revenue_cache.get(key)
+    if cached is not None:
+        return cached
+    generation = _revenue_cache.generation
+    result = compute()
+    _store_revenue(key, ranges, result, generation)
+    return result
+
+async def _cached_revenue_async(key: tuple, ranges: List[Tuple[Optional[date], Optional[date]]], compute):
+    # Same as _cached_revenue, `compute` returns an awaitable
+    if not config.REVENUE_CACHE_ENABLED:
+        return await compute()
+    cached = _revenue_cache.get(key)
+    if cached is not None:
+        return cached
+    generation = _revenue_cache.generation
+    result = await compute()
+    _store_revenue(key, ranges, result, generation)
+    return result
+
+def invalidate_revenue_cache(first_day: date, last_day: Optional[date] = None) -> int:
+    """Evict cached reports whose ranges overlap first_day..last_day (a single day by default)."""
+    last_day = last_day or first_day
+    def overlaps(ranges) -> bool:
+        return any((start is None or start <= last_day) and (end is None or first_day <= end) for start, end in ranges)
+    return _revenue_cache.invalidate_where(overlaps)
+
+def get_revenue_cache_stats() -> dict:
+    return _revenue_cache.stats()
+
+
+SALE_DEADLOCK_RETRIES = 2
+
+def record_sale(sale_in: schemas.SaleCreate) -> Optional[schemas.Sale]:
+    # Reserve the stock first: the conditional UPDATE takes the row lock and only
+    # succeeds if enough units remain, so concurrent sales cannot oversell.
+    # Sharded (hot) products are skipped here and reserved from one of their shards instead.
     inventory_update_query = """
-        UPDATE inventory SET quantity = quantity - %s, last_updated = NOW() 
-        WHERE product_id = %s
+        UPDATE inventory SET quantity = quantity - %s, last_updated = NOW()
+        WHERE product_id = %s AND quantity >= %s AND shard_count = 0
+    """
+    # Price (at time of sale), product details and the sale timestamp in one read
+    product_query = f"""
+        SELECT p.id, p.name, p.description, p.price, p.category_id, p.created_at, p.updated_at,
+               {STOCK_QUANTITY_SQL} as inventory_quantity, i.low_stock_threshold, i.shard_count,
+               NOW() as sale_date
+        FROM products p
+        LEFT JOIN inventory i ON p.id = i.product_id
+        WHERE p.id = %s
+    """
+    sale_query = """
+        INSERT INTO sales (product_id, quantity_sold, sale_price_at_time_of_sale, order_id, sale_date, category_id)
+        VALUES (%s, %s, %s, %s, %s, %s)
     """
     inventory_log_query = """
         INSERT INTO inventory_log (product_id, change_in_quantity, reason)
         VALUES (%s, %s, %s)
     """
-    
-    sale_id = None
+
     try:
-        with db_cursor(commit=True) as cursor:
-            # Record sale
-            cursor.execute(sale_query, (
-                sale_in.product_id, sale_in.quantity_sold, sale_price, sale_in.order_id
-            ))
-            sale_id = cursor.lastrowid
-            if not sale_id:
-                raise Exception("Failed to record sale.")
-
-            # Update inventory quantity
-            cursor.execute(inventory_update_query, (sale_in.quantity_sold, sale_in.product_id))
-            if cursor.rowcount == 0:
-                 raise Exception(f"Failed to update inventory for product ID {sale_in.product_id}. Product might not exist in inventory or stock update failed.")
-
-            # Log inventory change
-            reason = f"Sale (Order ID: {sale_in.order_id})" if sale_in.order_id else f"Sale (ID: {sale_id})"
-            cursor.execute(inventory_log_query, (sale_in.product_id, -sale_in.quantity_sold, reason))
-        
-        # Fetch the created sale record
-        return get_sale_by_id(sale_id)
+        for attempt in range(SALE_DEADLOCK_RETRIES + 1):
+            try:
+                with db_cursor(commit=True) as cursor:
+                    stock_reserved = False
+                    # Known hot products go straight to their shards: even a failed UPDATE of the
+                    # inventory row would lock it and serialize their sales again
+                    if not crud_inventory_shards.is_hot_product(sale_in.product_id):
+                        cursor.execute(inventory_update_query, (
+                            sale_in.quantity_sold, sale_in.product_id, sale_in.quantity_sold
+                        ))
+                        stock_reserved = cursor.rowcount == 1
+
+                    cursor.execute(product_query, (sale_in.product_id,))
+                    row = cursor.fetchone()
+                    if not row:
+                        raise ValueError(f"Product with ID {sale_in.product_id} not found.")
+                    shard = 0
+                    if not stock_reserved and row['shard_count']:
+                        crud_inventory_shards.note_shard_count(sale_in.product_id, row['shard_count'])
+                        # Read before the decrement, unlike the reserved case
+                        taken_from = crud_inventory_shards.take_sharded_stock(
+                            cursor, sale_in.product_id, sale_in.quantity_sold, row['shard_count']
+                        )
+                        stock_reserved = taken_from is not None
+                        if stock_reserved:
+                            shard = taken_from
+                            row['inventory_quantity'] -= sale_in.quantity_sold
+                    elif not stock_reserved and crud_inventory_shards.is_hot_product(sale_in.product_id):
+                        # No longer sharded since the hot-product list was loaded
+                        crud_inventory_shards.note_shard_count(sale_in.product_id, 0)
+                        cursor.execute(inventory_update_query, (
+                            sale_in.quantity_sold, sale_in.product_id, sale_in.quantity_sold
+                        ))
+                        stock_reserved = cursor.rowcount == 1
+                        if stock_reserved:
+                            row['inventory_quantity'] -= sale_in.quantity_sold
+                    if not stock_reserved:
+                        raise ValueError(f"Not enough stock for product {row['name']}. Available: {row['inventory_quantity']}, Requested: {sale_in.quantity_sold}")
+
+                    sale_price = row['price'] # Price at the time of sale
+                    cursor.execute(sale_query, (
+                        sale_in.product_id, sale_in.quantity_sold, sale_price, sale_in.order_id, row['sale_date'],
+                        row['category_id'] or 0 # Category at time of sale, like the rollup
+                    ))
+                    sale_id = cursor.lastrowid
+                    if not sale_id:
+                        raise Exception("Failed to record sale.")
+
+                    # Log inventory change
+                    reason = f"Sale (Order ID: {sale_in.order_id})" if sale_in.order_id else f"Sale (ID: {sale_id})"
+                    cursor.execute(inventory_log_query, (sale_in.product_id, -sale_in.quantity_sold, reason))
+
+                    cursor.execute(ROLLUP_UPSERT_QUERY, _rollup_params(
+                        row['sale_date'], row, sale_in.quantity_sold, 1, sale_price * sale_in.quantity_sold, shard
+                    ))
+
+                break
+            except mysql.connector.Error as e:
+                # Only sales of sharded products can deadlock (see take_sharded_stock); MySQL has
+                # already rolled the whole transaction back, so it is safe to run it again
+                if e.errno != errorcode.ER_LOCK_DEADLOCK or attempt == SALE_DEADLOCK_RETRIES:
+                    raise
+                print(f"Deadlock recording sale of product {sale_in.product_id}, retrying: {e}")
+
+        crud_products.invalidate_product_cache(sale_in.product_id)
+        invalidate_revenue_cache(row['sale_date'].date())
+        # inventory_quantity was read after the decrement
+        crud_inventory.notify_low_stock_crossing(
+            sale_in.product_id, row['name'],
+            row['inventory_quantity'] + sale_in.quantity_sold, row['low_stock_threshold'],
+            row['inventory_quantity'], row['low_stock_threshold']
+        )
+        # Everything needed for the response is already in hand, no need to re-read the sale
+        return schemas.Sale(
+            id=sale_id, product_id=sale_in.product_id, quantity_sold=sale_in.quantity_sold,
+            sale_price_at_time_of_sale=sale_price, sale_date=row['sale_date'],
+            order_id=sale_in.order_id, product=_product_from_row(row)
+        )
 
     except ValueError as ve: # Specific value errors from checks
         print(f"Value error during sale recording: {ve}")
@@ -60,90 +192,403 @@ def record_sale(sale_in: schemas.SaleCreate) -> Optional[schemas.Sale]:
         raise # Re-raise for now
     
 
-def get_sale_by_id(sale_id: int) -> Optional[schemas.Sale]:
-    query = """
-        SELECT s.id, s.product_id, s.quantity_sold, s.sale_price_at_time_of_sale, s.sale_date, s.order_id,
-               p.id as p_id, p.name as p_name, p.description as p_description, 
-               p.price as p_price_current, p.category_id as p_category_id,
-               p.created_at as p_created_at, p.updated_at as p_updated_at
-        FROM sales s
-        JOIN products p ON s.product_id = p.id
-        WHERE s.id = %s
+def _cached_category(category_id: Optional[int]) -> Optional[schemas.Category]:
+    return crud_categories.get_category_by_id(category_id) if category_id else None
+
+def _prefetched_category(category_id: Optional[int]) -> Optional[schemas.Category]:
+    # Async paths: never a blocking lookup, categories were loaded with prefetch_categories_async
+    return crud_categories.get_cached_category(category_id) if category_id else None
+
+def _product_from_row(row: dict) -> schemas.Product:
+    return schemas.Product(
+        id=row['id'], name=row['name'], description=row['description'],
+        price=row['price'], category_id=row['category_id'],
+        created_at=row['created_at'], updated_at=row['updated_at'],
+        category=_cached_category(row['category_id'])
+    )
+
+
+def _read_products_for_sale(cursor, product_ids: List[int]) -> Dict[int, dict]:
+    """
+    Read the products of a multi-product sale. Inventory rows of unsharded products are locked,
+    in a fixed (sorted) order to avoid deadlocks between concurrent multi-product writes, so their
+    quantity is exact. Sharded (hot) products are only read, like in record_sale: their stock is
+    taken afterwards with _take_sharded_stock, which locks a single shard when it can.
+    """
+    in_clause = ", ".join(["%s"] * len(product_ids))
+    cursor.execute(f"""
+        SELECT p.id, p.name, p.description, p.price, p.category_id, p.created_at, p.updated_at,
+               {STOCK_QUANTITY_SQL} as inventory_quantity, i.low_stock_threshold, i.shard_count,
+               NOW() as sale_date, @@SESSION.auto_increment_increment as id_step
+        FROM products p
+        LEFT JOIN inventory i ON p.id = i.product_id
+        WHERE p.id IN ({in_clause})
+    """, tuple(product_ids))
+    rows = {row['id']: row for row in cursor.fetchall()}
+    unsharded = sorted(pid for pid, row in rows.items() if not row['shard_count'])
+    if unsharded:
+        cursor.execute(f"""
+            SELECT product_id, quantity, shard_count FROM inventory
+            WHERE product_id IN ({", ".join(["%s"] * len(unsharded))})
+            ORDER BY product_id
+            FOR UPDATE
+        """, tuple(unsharded))
+        for locked in cursor.fetchall():
+            row = rows[locked['product_id']]
+            row['shard_count'] = locked['shard_count']
+            if not locked['shard_count']: # Otherwise it was sharded since the first read
+                row['inventory_quantity'] = locked['quantity']
+    return rows
+
+def _take_sharded_stock(cursor, row: dict, quantity: int) -> bool:
+    """Take `quantity` units of the sharded product `row` (see take_sharded_stock); False if it doesn't have them."""
+    taken_from = crud_inventory_shards.take_sharded_stock(cursor, row['id'], quantity, row['shard_count'])
+    if taken_from is None:
+        return False
+    # The rollup row of the shard the stock came from, as in record_sale
+    row.setdefault('rollup_shard', taken_from)
+    return True
+
+def _retry_deadlocks(write: Callable, what: str):
+    """Run `write()`, again if MySQL picked it as a deadlock victim (it already rolled everything back)."""
+    for attempt in range(SALE_DEADLOCK_RETRIES + 1):
+        try:
+            return write()
+        except mysql.connector.Error as e:
+            if e.errno != errorcode.ER_LOCK_DEADLOCK or attempt == SALE_DEADLOCK_RETRIES:
+                raise
+            print(f"Deadlock recording {what}, retrying: {e}")
+
+def _apply_sales(cursor, lines: List[Tuple[int, int, Optional[str]]], rows: Dict[int, dict]) -> List[int]:
+    """
+    Write (product_id, quantity, order_id) lines whose stock was already checked against the locked
+    `rows` (and already taken, for sharded products): one CASE-based inventory UPDATE plus
+    multi-row INSERTs for sales, inventory_log and the rollup. Returns the new sale ids in line order.
+    """
+    requested: Dict[int, int] = {}
+    line_counts: Dict[int, int] = {}
+    for product_id, quantity, _ in lines:
+        requested[product_id] = requested.get(product_id, 0) + quantity
+        line_counts[product_id] = line_counts.get(product_id, 0) + 1
+    product_ids = sorted(requested)
+    unsharded = [pid for pid in product_ids if not rows[pid]['shard_count']]
+    if unsharded:
+        in_clause = ", ".join(["%s"] * len(unsharded))
+        case_clause = " ".join(["WHEN %s THEN %s"] * len(unsharded))
+        update_params = []
+        for pid in unsharded:
+            update_params.extend([pid, requested[pid]])
+        update_params.extend(unsharded)
+        cursor.execute(f"""
+            UPDATE inventory SET quantity = quantity - CASE product_id {case_clause} END, last_updated = NOW()
+            WHERE product_id IN ({in_clause})
+        """, tuple(update_params))
+
+    sale_date = rows[product_ids[0]]['sale_date']
+    # executemany turns these into a single multi-row INSERT
+    cursor.executemany("""
+        INSERT INTO sales (product_id, quantity_sold, sale_price_at_time_of_sale, order_id, sale_date, category_id)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, [
+        (pid, quantity, rows[pid]['price'], order_id, sale_date, rows[pid]['category_id'] or 0)
+        for pid, quantity, order_id in lines
+    ])
+    first_sale_id = cursor.lastrowid
+    if not first_sale_id:
+        raise Exception("Failed to record sales.")
+    # A multi-row INSERT gets consecutive auto-increment ids
+    id_step = int(rows[product_ids[0]]['id_step'] or 1)
+    sale_ids = [first_sale_id + index * id_step for index in range(len(lines))]
+
+    cursor.executemany("""
+        INSERT INTO inventory_log (product_id, change_in_quantity, reason)
+        VALUES (%s, %s, %s)
+    """, [
+        (pid, -quantity, f"Sale (Order ID: {order_id})" if order_id else f"Sale (ID: {sale_id})")
+        for (pid, quantity, order_id), sale_id in zip(lines, sale_ids)
+    ])
+    cursor.executemany(ROLLUP_UPSERT_QUERY, [
+        _rollup_params(
+            sale_date, rows[pid], requested[pid], line_counts[pid], rows[pid]['price'] * requested[pid],
+            rows[pid].get('rollup_shard', 0)
+        )
+        for pid in product_ids
+    ])
+    return sale_ids
+
+def _after_sales_commit(lines: List[Tuple[int, int, Optional[str]]], rows: Dict[int, dict]):
+    requested: Dict[int, int] = {}
+    for product_id, quantity, _ in lines:
+        requested[product_id] = requested.get(product_id, 0) + quantity
+    crud_products.invalidate_product_cache(*requested)
+    invalidate_revenue_cache(next(iter(rows.values()))['sale_date'].date())
+    for pid, quantity in requested.items():
+        # Rows were read before the decrement
+        row = rows[pid]
+        crud_inventory.notify_low_stock_crossing(
+            pid, row['name'],
+            row['inventory_quantity'], row['low_stock_threshold'],
+            row['inventory_quantity'] - quantity, row['low_stock_threshold']
+        )
+
+
+def record_order(order_in: schemas.OrderCreate) -> schemas.Order:
+    order_id = order_in.order_id or uuid.uuid4().hex
+    lines = [(line.product_id, line.quantity_sold, order_id) for line in order_in.items]
+
+    # Several lines may sell the same product; stock is checked against the total
+    requested: Dict[int, int] = {}
+    for product_id, quantity, _ in lines:
+        requested[product_id] = requested.get(product_id, 0) + quantity
+
+    def write():
+        with db_cursor(commit=True) as cursor:
+            rows = _read_products_for_sale(cursor, list(requested))
+            missing = [pid for pid in sorted(requested) if pid not in rows]
+            if missing:
+                raise ValueError(f"Products not found: {', '.join(map(str, missing))}.")
+            shortages = []
+            for pid, qty in sorted(requested.items()):
+                row = rows[pid]
+                if row['shard_count']:
+                    enough = _take_sharded_stock(cursor, row, qty)
+                else:
+                    enough = row['inventory_quantity'] is not None and row['inventory_quantity'] >= qty
+                if not enough:
+                    shortages.append(f"{row['name']} (Available: {row['inventory_quantity']}, Requested: {qty})")
+            if shortages:
+                raise ValueError(f"Not enough stock for: {'; '.join(shortages)}")
+            return rows, _apply_sales(cursor, lines, rows)
+
+    try:
+        rows, sale_ids = _retry_deadlocks(write, f"order {order_id}")
+        _after_sales_commit(lines, rows)
+        sale_date = next(iter(rows.values()))['sale_date']
+        sales = []
+        total_amount = 0.0
+        for (product_id, quantity, _), sale_id in zip(lines, sale_ids):
+            row = rows[product_id]
+            total_amount += float(row['price']) * quantity
+            sales.append(schemas.Sale(
+                id=sale_id, product_id=product_id, quantity_sold=quantity,
+                sale_price_at_time_of_sale=row['price'], sale_date=sale_date,
+                order_id=order_id, product=_product_from_row(row)
+            ))
+        return schemas.Order(order_id=order_id, sale_date=sale_date, total_amount=round(total_amount, 2), items=sales)
+
+    except ValueError as ve:
+        print(f"Value error during order recording: {ve}")
+        raise
+    except Exception as e:
+        print(f"Error recording order: {e}")
+        raise
+
+
+def record_sales_batch(sales_in: List[schemas.SaleCreate]) -> List[Tuple[str, Optional[int], Optional[str]]]:
+    """
+    Commit independent sales in one transaction (used by the ingestion queue). Each sale is
+    accepted or rejected on its own, against stock allocated in arrival order.
+
+    Returns one (status, sale_id, error) per input: ("committed", id, None) or ("rejected", None, reason).
+    Database errors propagate and leave nothing written.
     """
+    def write():
+        results: List[Tuple[str, Optional[int], Optional[str]]] = [("rejected", None, None)] * len(sales_in)
+        accepted = [] # (input index, line)
+        with db_cursor(commit=True) as cursor:
+            rows = _read_products_for_sale(cursor, list({sale.product_id for sale in sales_in}))
+            available = {pid: row['inventory_quantity'] for pid, row in rows.items()}
+            for index, sale in enumerate(sales_in):
+                row = rows.get(sale.product_id)
+                if row is None:
+                    results[index] = ("rejected", None, f"Product with ID {sale.product_id} not found.")
+                    continue
+                if row['shard_count']:
+                    enough = _take_sharded_stock(cursor, row, sale.quantity_sold)
+                else:
+                    enough = available[sale.product_id] is not None and available[sale.product_id] >= sale.quantity_sold
+                if not enough:
+                    results[index] = ("rejected", None,
+                                      f"Not enough stock for product {row['name']}. Available: "
+                                      f"{available[sale.product_id]}, Requested: {sale.quantity_sold}")
+                    continue
+                available[sale.product_id] -= sale.quantity_sold
+                accepted.append((index, (sale.product_id, sale.quantity_sold, sale.order_id)))
+            if accepted:
+                sale_ids = _apply_sales(cursor, [line for _, line in accepted], rows)
+                for (index, _), sale_id in zip(accepted, sale_ids):
+                    results[index] = ("committed", sale_id, None)
+        return results, accepted, rows
+
+    results, accepted, rows = _retry_deadlocks(write, f"a batch of {len(sales_in)} sales")
+    if accepted:
+        _after_sales_commit([line for _, line in accepted], rows)
+    return results
+
+# Write-behind ingestion: POST /sales/ingest queues sales, this worker commits them in batches
+sale_ingest_queue = MicroBatcher(
+    "sale-ingest", record_sales_batch,
+    max_queue=config.SALES_INGEST_QUEUE_SIZE, batch_size=config.SALES_INGEST_BATCH_SIZE,
+    max_wait=config.SALES_INGEST_BATCH_MS / 1000, status_size=config.SALES_INGEST_STATUS_SIZE
+)
+
+
+SALE_WITH_PRODUCT_SELECT = """
+    SELECT s.id, s.product_id, s.quantity_sold, s.sale_price_at_time_of_sale, s.sale_date, s.order_id,
+           p.id as p_id, p.name as p_name, p.description as p_description, 
+           p.price as p_price_current, p.category_id as p_category_id,
+           p.created_at as p_created_at, p.updated_at as p_updated_at
+    FROM sales s
+    JOIN products p ON s.product_id = p.id
+"""
+
+def get_sale_by_id(sale_id: int) -> Optional[schemas.Sale]:
+    # sales is partitioned by sale_date, so this is one primary key probe per monthly partition
     with db_cursor() as cursor:
-        cursor.execute(query, (sale_id,))
+        cursor.execute(SALE_WITH_PRODUCT_SELECT + " WHERE s.id = %s", (sale_id,))
         row = cursor.fetchone()
-        if row:
-            product_data = schemas.Product(
-                id=row['p_id'], name=row['p_name'], description=row['p_description'],
-                price=row['p_price_current'], category_id=row['p_category_id'],
-                created_at=row['p_created_at'], updated_at=row['p_updated_at']
-            )
-            return schemas.Sale(
-                id=row['id'], product_id=row['product_id'], quantity_sold=row['quantity_sold'],
-                sale_price_at_time_of_sale=row['sale_price_at_time_of_sale'],
-                sale_date=row['sale_date'], order_id=row['order_id'],
-                product=product_data
-            )
-    return None
+    return _sale_from_row(row) if row else None
 
-def get_sales_data(
-    date_from: Optional[date] = None,
-    date_to: Optional[date] = None,
-    product_id: Optional[int] = None,
-    category_id: Optional[int] = None,
-    skip: int = 0,
-    limit: int = 100
-) -> List[schemas.Sale]:
-    base_query = """
-        SELECT s.id, s.product_id, s.quantity_sold, s.sale_price_at_time_of_sale, s.sale_date, s.order_id,
-               p.id as p_id, p.name as p_name, p.description as p_description, 
-               p.price as p_price_current, p.category_id as p_category_id,
-               p.created_at as p_created_at, p.updated_at as p_updated_at,
-               c.name as category_name
-        FROM sales s
-        JOIN products p ON s.product_id = p.id
-        LEFT JOIN categories c ON p.category_id = c.id
-    """
+def _shape_sale(
+    row: dict, category_lookup: Callable[[Optional[int]], Optional[schemas.Category]] = _cached_category
+) -> dict:
+    # JSON-ready Sale fields, in schema order; rows joined with products, product columns prefixed with p_
+    category = category_lookup(row['p_category_id'])
+    return {
+        "product_id": row['product_id'], "quantity_sold": row['quantity_sold'], "order_id": row['order_id'],
+        "id": row['id'], "sale_price_at_time_of_sale": float(row['sale_price_at_time_of_sale']),
+        "sale_date": row['sale_date'],
+        "product": {
+            "name": row['p_name'], "description": row['p_description'], "price": float(row['p_price_current']),
+            "category_id": row['p_category_id'], "id": row['p_id'],
+            "created_at": row['p_created_at'], "updated_at": row['p_updated_at'],
+            "category": category.model_dump() if category else None,
+        },
+    }
+
+def _sale_from_row(row: dict) -> schemas.Sale:
+    return schemas.Sale(**_shape_sale(row))
+
+def _sales_filter_conditions(
+    date_from: Optional[date], date_to: Optional[date],
+    product_id: Optional[int], category_id: Optional[int]
+) -> Tuple[List[str], list]:
+    # Shared by listing and export; expects sales aliased s joined to products aliased p.
+    # Bare half-open comparisons on sale_date let MySQL prune the monthly partitions.
     conditions = []
     params = []
-
     if date_from:
         conditions.append("s.sale_date >= %s")
         params.append(datetime.combine(date_from, datetime.min.time()))
     if date_to:
-        conditions.append("s.sale_date <= %s")
-        params.append(datetime.combine(date_to, datetime.max.time()))
+        conditions.append("s.sale_date < %s")
+        params.append(datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
     if product_id:
         conditions.append("s.product_id = %s")
         params.append(product_id)
     if category_id:
         conditions.append("p.category_id = %s")
         params.append(category_id)
+    return conditions, params
+
+def _sales_query(
+    date_from: Optional[date], date_to: Optional[date], product_id: Optional[int], category_id: Optional[int],
+    skip: int, limit: int, page_cursor: Optional[str]
+) -> Tuple[str, list]:
+    base_query = SALE_WITH_PRODUCT_SELECT
+    conditions, params = _sales_filter_conditions(date_from, date_to, product_id, category_id)
+    if page_cursor:
+        # Keyset pagination: continue after the last (sale_date, id) seen, skip is ignored
+        after_date, after_id = decode_cursor(page_cursor, (datetime, int))
+        # The plain upper bound repeats the tuple comparison in a form partition pruning can use
+        conditions.append("s.sale_date <= %s AND (s.sale_date < %s OR (s.sale_date = %s AND s.id < %s))")
+        params.extend([after_date, after_date, after_date, after_id])
+        skip = 0
 
     if conditions:
         base_query += " WHERE " + " AND ".join(conditions)
     
-    base_query += " ORDER BY s.sale_date DESC LIMIT %s OFFSET %s"
+    base_query += " ORDER BY s.sale_date DESC, s.id DESC LIMIT %s OFFSET %s"
     params.extend([limit, skip])
+    return base_query, params
 
-    sales_list = []
-    with db_cursor() as cursor:
-        cursor.execute(base_query, tuple(params))
-        for row in cursor.fetchall():
-            product_data = schemas.Product(
-                id=row['p_id'], name=row['p_name'], description=row['p_description'],
-                price=row['p_price_current'], category_id=row['p_category_id'],
-                created_at=row['p_created_at'], updated_at=row['p_updated_at']
-                # category detail can be added if Product schema has it and it's fetched
-            )
-            sales_list.append(schemas.Sale(
-                id=row['id'], product_id=row['product_id'], quantity_sold=row['quantity_sold'],
-                sale_price_at_time_of_sale=row['sale_price_at_time_of_sale'],
-                sale_date=row['sale_date'], order_id=row['order_id'],
-                product=product_data
-            ))
-    return sales_list
+def get_sales_data(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    product_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    page_cursor: Optional[str] = None,
+    as_dicts: bool = False # JSON-ready dicts instead of schema objects, for the fast response path
+) -> List[Union[schemas.Sale, dict]]:
+    query, params = _sales_query(date_from, date_to, product_id, category_id, skip, limit, page_cursor)
+    with db_cursor(read_only=True) as cursor:
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+    return [_shape_sale(row) if as_dicts else _sale_from_row(row) for row in rows]
+
+async def get_sales_data_async(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    product_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    page_cursor: Optional[str] = None,
+    as_dicts: bool = False
+) -> List[Union[schemas.Sale, dict]]:
+    query, params = _sales_query(date_from, date_to, product_id, category_id, skip, limit, page_cursor)
+    async with async_db_cursor(read_only=True) as cursor:
+        await cursor.execute(query, tuple(params))
+        rows = await cursor.fetchall()
+    await crud_categories.prefetch_categories_async(row['p_category_id'] for row in rows)
+    shaped = [_shape_sale(row, _prefetched_category) for row in rows]
+    return shaped if as_dicts else [schemas.Sale(**item) for item in shaped]
+
+
+SALES_EXPORT_COLUMNS = (
+    "id", "sale_date", "product_id", "product_name", "category_id",
+    "quantity_sold", "sale_price_at_time_of_sale", "line_total", "order_id"
+)
+
+def iter_sales_export(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    product_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    chunk_size: int = 5000
+) -> Iterator[List[tuple]]:
+    """
+    Yield sales matching the get_sales_data filters as chunks of tuples in SALES_EXPORT_COLUMNS order.
+
+    Rows are streamed from an unbuffered cursor, so memory stays bounded by chunk_size however
+    many rows match. The pooled connection is held until the iterator is exhausted or closed.
+    Nothing runs until the first next(): checkout and query errors surface there, so a caller
+    streaming a response should pull the first chunk before sending headers.
+    """
+    query = """
+        SELECT s.id, s.sale_date, s.product_id, p.name, p.category_id,
+               s.quantity_sold, s.sale_price_at_time_of_sale,
+               s.line_total, s.order_id
+        FROM sales s
+        JOIN products p ON s.product_id = p.id
+    """
+    conditions, params = _sales_filter_conditions(date_from, date_to, product_id, category_id)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY s.sale_date, s.id"
+
+    with db_cursor(dictionary=False, buffered=False, read_only=True) as cursor:
+        # The server blocks while the client is slow to read; don't let it drop a long export
+        cursor.execute("SET SESSION net_write_timeout = %s", (config.SALES_EXPORT_NET_WRITE_TIMEOUT,))
+        cursor.execute(query, tuple(params))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+        cursor.execute("SET SESSION net_write_timeout = DEFAULT")
 
 
 def get_revenue_analysis(
@@ -156,69 +601,124 @@ def get_revenue_analysis(
     if period_type not in ["daily", "weekly", "monthly", "annual"]:
         raise ValueError("Invalid period_type. Must be 'daily', 'weekly', 'monthly', or 'annual'.")
 
-    date_format_mapping = {
-        "daily": "%Y-%m-%d",    # DATE(sale_date)
-        "weekly": "%Y-%u",     # YEARWEEK(sale_date, 1)
-        "monthly": "%Y-%m",    # DATE_FORMAT(sale_date, '%Y-%m')
-        "annual": "%Y"         # YEAR(sale_date)
-    }
-    group_by_expression_mapping = {
-        "daily": "DATE(s.sale_date)",
-        "weekly": "YEARWEEK(s.sale_date, 1)", # Mode 1: Sunday is first day, week 1 is first week with a Sunday
-        "monthly": "DATE_FORMAT(s.sale_date, '%Y-%m')",
-        "annual": "YEAR(s.sale_date)"
-    }
+    return _cached_revenue(
+        ("analysis", period_type, start_date, end_date, category_id),
+        [(start_date, end_date)],
+        lambda: _compute_revenue_analysis(period_type, start_date, end_date, category_id)
+    )
 
-    group_by_expression = group_by_expression_mapping[period_type]
-    
-    query = f"""
-        SELECT 
-            {group_by_expression} as period,
-            SUM(s.quantity_sold * s.sale_price_at_time_of_sale) as total_revenue
-        FROM sales s
-    """
+async def get_revenue_analysis_async(
+    period_type: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category_id: Optional[int] = None
+) -> schemas.RevenueReport:
+    if period_type not in ["daily", "weekly", "monthly", "annual"]:
+        raise ValueError("Invalid period_type. Must be 'daily', 'weekly', 'monthly', or 'annual'.")
+
+    async def compute() -> schemas.RevenueReport:
+        query, params = _revenue_analysis_query(period_type, start_date, end_date, category_id)
+        async with async_db_cursor(read_only=True) as cursor:
+            await cursor.execute(query, tuple(params))
+            rows = await cursor.fetchall()
+        return _revenue_report_from_rows(period_type, rows)
+
+    # Shares cache entries with get_revenue_analysis
+    return await _cached_revenue_async(
+        ("analysis", period_type, start_date, end_date, category_id), [(start_date, end_date)], compute
+    )
+
+
+def _compute_revenue_analysis(
+    period_type: str, start_date: Optional[date], end_date: Optional[date], category_id: Optional[int]
+) -> schemas.RevenueReport:
+    query, params = _revenue_analysis_query(period_type, start_date, end_date, category_id)
+    with db_cursor(read_only=True) as cursor:
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+    return _revenue_report_from_rows(period_type, rows)
+
+def _revenue_analysis_query(
+    period_type: str, start_date: Optional[date], end_date: Optional[date], category_id: Optional[int]
+) -> Tuple[str, list]:
     conditions = []
     params = []
 
-    if category_id is not None:
-        # Need to join with products table if filtering by category
-        query += " JOIN products p ON s.product_id = p.id "
-        conditions.append("p.category_id = %s")
-        params.append(category_id)
-    
-    if start_date:
-        conditions.append("s.sale_date >= %s")
-        params.append(datetime.combine(start_date, datetime.min.time()))
-    if end_date:
-        conditions.append("s.sale_date <= %s")
-        params.append(datetime.combine(end_date, datetime.max.time()))
+    if config.REVENUE_ROLLUP_ENABLED:
+        # Coarser periods are aggregations of the daily rollup rows, never of raw sales
+        group_by_expression_mapping = {
+            "daily": "r.day",
+            "weekly": "YEARWEEK(r.day, 1)", # Mode 1: Monday is first day, week 1 is first week with 4+ days
+            "monthly": "DATE_FORMAT(r.day, '%Y-%m')",
+            "annual": "YEAR(r.day)"
+        }
+        query = f"""
+            SELECT 
+                {group_by_expression_mapping[period_type]} as period,
+                SUM(r.revenue) as total_revenue
+            FROM sales_daily_rollup r
+        """
+        if category_id is not None:
+            conditions.append("r.category_id = %s")
+            params.append(category_id)
+        if start_date:
+            conditions.append("r.day >= %s")
+            params.append(start_date)
+        if end_date:
+            conditions.append("r.day <= %s")
+            params.append(end_date)
+    else:
+        group_by_expression_mapping = {
+            "daily": "DATE(s.sale_date)",
+            "weekly": "YEARWEEK(s.sale_date, 1)", # Mode 1: Monday is first day, week 1 is first week with 4+ days
+            "monthly": "DATE_FORMAT(s.sale_date, '%Y-%m')",
+            "annual": "YEAR(s.sale_date)"
+        }
+        # Index-only scan of idx_sales_revenue (sale_date, category_id, line_total): no join, no row lookups.
+        # Like the rollup, the category is the one the product had at the time of sale.
+        query = f"""
+            SELECT 
+                {group_by_expression_mapping[period_type]} as period,
+                SUM(s.line_total) as total_revenue
+            FROM sales s
+        """
+        if category_id is not None:
+            conditions.append("s.category_id = %s")
+            params.append(category_id)
+        # Half-open bounds on the bare column, so only the months in range are read
+        if start_date:
+            conditions.append("s.sale_date >= %s")
+            params.append(datetime.combine(start_date, datetime.min.time()))
+        if end_date:
+            conditions.append("s.sale_date < %s")
+            params.append(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
 
     if conditions:
         query += " WHERE " + " AND ".join(conditions)
     
     query += f" GROUP BY period ORDER BY period ASC"
-    
+    return query, params
+
+def _revenue_report_from_rows(period_type: str, rows: List[dict]) -> schemas.RevenueReport:
     revenue_data_points = []
     total_revenue_overall = 0.0
-    with db_cursor() as cursor:
-        cursor.execute(query, tuple(params))
-        for row in cursor.fetchall():
-            # MySQL YEARWEEK returns an integer like 202301. Need to format for consistency.
-            # For daily, it returns a datetime.date object.
-            period_value = row['period']
-            if period_type == "weekly" and isinstance(period_value, int):
-                year = period_value // 100
-                week = period_value % 100
-                period_value = f"{year}-W{week:02d}" # e.g. 2023-W01
-            elif isinstance(period_value, (date, datetime)):
-                 period_value = period_value.isoformat()
-
-
-            revenue_data_points.append(schemas.RevenueDataPoint(
-                period=str(period_value), # Ensure period is string or date
-                total_revenue=float(row['total_revenue'])
-            ))
-            total_revenue_overall += float(row['total_revenue'])
+    for row in rows:
+        # MySQL YEARWEEK returns an integer like 202301. Need to format for consistency.
+        # For daily, it returns a datetime.date object.
+        period_value = row['period']
+        if period_type == "weekly" and isinstance(period_value, int):
+            year = period_value // 100
+            week = period_value % 100
+            period_value = f"{year}-W{week:02d}" # e.g. 2023-W01
+        elif isinstance(period_value, (date, datetime)):
+             period_value = period_value.isoformat()
+
+
+        revenue_data_points.append(schemas.RevenueDataPoint(
+            period=str(period_value), # Ensure period is string or date
+            total_revenue=float(row['total_revenue'])
+        ))
+        total_revenue_overall += float(row['total_revenue'])
             
     return schemas.RevenueReport(data=revenue_data_points, total_revenue_overall=total_revenue_overall)
 
@@ -226,55 +726,190 @@ def get_revenue_analysis(
 def get_revenue_for_period_and_category(
     start_date: date, end_date: date, category_id: Optional[int] = None
 ) -> Tuple[float, Optional[str]]:
-    query = """
-        SELECT SUM(s.quantity_sold * s.sale_price_at_time_of_sale) as total_revenue
-        FROM sales s
-    """
-    conditions = ["s.sale_date >= %s", "s.sale_date <= %s"]
-    params = [
-        datetime.combine(start_date, datetime.min.time()), 
-        datetime.combine(end_date, datetime.max.time())
-    ]
-    category_name = "All Categories"
-
-    if category_id is not None:
-        query += " JOIN products p ON s.product_id = p.id LEFT JOIN categories cat ON p.category_id = cat.id"
-        conditions.append("p.category_id = %s")
-        params.append(category_id)
-        # Fetch category name for reporting
-        cat_name_query = "SELECT name FROM categories WHERE id = %s"
-        with db_cursor() as cat_cursor:
-            cat_cursor.execute(cat_name_query, (category_id,))
-            cat_row = cat_cursor.fetchone()
-            if cat_row:
-                category_name = cat_row['name']
-            else:
-                category_name = f"Category ID {category_id} (Not Found)"
+    period = schemas.RevenueComparisonPeriod(start_date=start_date, end_date=end_date, category_id=category_id)
+    return _get_revenue_for_periods([period])[0]
 
 
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
-    
-    with db_cursor() as cursor:
+def _get_revenue_for_periods(
+    periods: List[schemas.RevenueComparisonPeriod]
+) -> List[Tuple[float, Optional[str]]]:
+    query, params = _revenue_periods_query(periods)
+    with db_cursor(read_only=True) as cursor:
         cursor.execute(query, tuple(params))
-        result = cursor.fetchone()
-        revenue = float(result['total_revenue']) if result and result['total_revenue'] is not None else 0.0
-        return revenue, category_name
+        row = cursor.fetchone()
+    return _revenue_period_results(periods, row, crud_categories.get_category_by_id)
+
+def _revenue_periods_query(periods: List[schemas.RevenueComparisonPeriod]) -> Tuple[str, list]:
+    # All periods in one round trip: each period is a conditional SUM over the union of the
+    # requested ranges. Category names come from the in-process category cache.
+    if config.REVENUE_ROLLUP_ENABLED:
+        from_clause = "FROM sales_daily_rollup r"
+        date_column, category_column, revenue_expression = "r.day", "r.category_id", "r.revenue"
+        to_bound = lambda d: d
+        to_upper_bound = lambda d: d + timedelta(days=1)
+    else:
+        # Covered by idx_sales_revenue, see _compute_revenue_analysis
+        from_clause = "FROM sales s"
+        date_column, category_column, revenue_expression = "s.sale_date", "s.category_id", "s.line_total"
+        to_bound = lambda d: datetime.combine(d, datetime.min.time())
+        to_upper_bound = lambda d: datetime.combine(d + timedelta(days=1), datetime.min.time())
+
+    select_parts = []
+    params = []
+    for index, period in enumerate(periods):
+        condition = f"{date_column} >= %s AND {date_column} < %s"
+        params.extend([to_bound(period.start_date), to_upper_bound(period.end_date)])
+        if period.category_id is not None:
+            condition += f" AND {category_column} = %s"
+            params.append(period.category_id)
+        select_parts.append(f"SUM(CASE WHEN {condition} THEN {revenue_expression} ELSE 0 END) as revenue_{index}")
+
+    # Only scan the requested ranges (and their categories, when all are filtered). Overlapping or
+    # adjacent periods are merged; disjoint ones (e.g. year over year) become separate index ranges,
+    # so the gap between them is never read.
+    spans = []
+    for start, end in sorted((p.start_date, p.end_date) for p in periods):
+        if spans and start <= spans[-1][1] + timedelta(days=1):
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+    range_conditions = []
+    for start, end in spans:
+        range_conditions.append(f"({date_column} >= %s AND {date_column} < %s)")
+        params.extend([to_bound(start), to_upper_bound(end)])
+    conditions = [f"({' OR '.join(range_conditions)})"]
+    category_ids = {p.category_id for p in periods}
+    if None not in category_ids:
+        conditions.append(f"{category_column} IN ({', '.join(['%s'] * len(category_ids))})")
+        params.extend(sorted(category_ids))
+
+    query = f"SELECT {', '.join(select_parts)} {from_clause} WHERE {' AND '.join(conditions)}"
+    return query, params
+
+def _revenue_period_results(
+    periods: List[schemas.RevenueComparisonPeriod], row: dict,
+    category_lookup: Callable[[int], Optional[schemas.Category]]
+) -> List[Tuple[float, Optional[str]]]:
+    results = []
+    for index, period in enumerate(periods):
+        revenue = row[f'revenue_{index}']
+        if period.category_id is None:
+            category_name = "All Categories"
+        else:
+            category = category_lookup(period.category_id)
+            category_name = category.name if category else f"Category ID {period.category_id} (Not Found)"
+        results.append((float(revenue) if revenue is not None else 0.0, category_name))
+    return results
 
 
 def compare_revenue(comparison_request: schemas.RevenueComparisonRequest) -> schemas.RevenueComparisonResponse:
-    revenue_a, cat_a_name = get_revenue_for_period_and_category(
-        comparison_request.period_a_start,
-        comparison_request.period_a_end,
-        comparison_request.category_id_a
+    periods = comparison_request.resolved_periods()
+    return _cached_revenue(
+        ("comparison",) + tuple((p.label, p.start_date, p.end_date, p.category_id) for p in periods),
+        [(p.start_date, p.end_date) for p in periods],
+        lambda: _compute_revenue_comparison(periods)
     )
-    revenue_b, cat_b_name = get_revenue_for_period_and_category(
-        comparison_request.period_b_start,
-        comparison_request.period_b_end,
-        comparison_request.category_id_b
+
+
+async def compare_revenue_async(comparison_request: schemas.RevenueComparisonRequest) -> schemas.RevenueComparisonResponse:
+    periods = comparison_request.resolved_periods()
+
+    async def compute() -> schemas.RevenueComparisonResponse:
+        query, params = _revenue_periods_query(periods)
+        async with async_db_cursor(read_only=True) as cursor:
+            await cursor.execute(query, tuple(params))
+            row = await cursor.fetchone()
+        await crud_categories.prefetch_categories_async(p.category_id for p in periods)
+        return _revenue_comparison_response(
+            periods, _revenue_period_results(periods, row, crud_categories.get_cached_category)
+        )
+
+    return await _cached_revenue_async(
+        ("comparison",) + tuple((p.label, p.start_date, p.end_date, p.category_id) for p in periods),
+        [(p.start_date, p.end_date) for p in periods],
+        compute
     )
 
+
+def _compute_revenue_comparison(periods: List[schemas.RevenueComparisonPeriod]) -> schemas.RevenueComparisonResponse:
+    return _revenue_comparison_response(periods, _get_revenue_for_periods(periods))
+
+def _revenue_comparison_response(
+    periods: List[schemas.RevenueComparisonPeriod], results: List[Tuple[float, Optional[str]]]
+) -> schemas.RevenueComparisonResponse:
     return schemas.RevenueComparisonResponse(comparison=[
-        schemas.RevenueComparisonData(period="Period A", category_name=cat_a_name, total_revenue=revenue_a),
-        schemas.RevenueComparisonData(period="Period B", category_name=cat_b_name, total_revenue=revenue_b)
+        schemas.RevenueComparisonData(
+            period=period.label, category_name=category_name, total_revenue=revenue,
+            start_date=period.start_date, end_date=period.end_date, category_id=period.category_id
+        )
+        for period, (revenue, category_name) in zip(periods, results)
     ])
+
+
+def rebuild_revenue_rollup(
+    start_date: Optional[date] = None, end_date: Optional[date] = None, chunk_days: int = 31
+) -> int:
+    """Recompute sales_daily_rollup from the sales table; returns the number of rollup rows written."""
+    if start_date is None or end_date is None:
+        with db_cursor() as cursor:
+            cursor.execute("SELECT MIN(sale_date) as first_sale, MAX(sale_date) as last_sale FROM sales")
+            bounds = cursor.fetchone()
+        if not bounds or bounds['first_sale'] is None:
+            return 0
+        start_date = start_date or bounds['first_sale'].date()
+        end_date = end_date or bounds['last_sale'].date()
+
+    delete_query = "DELETE FROM sales_daily_rollup WHERE day >= %s AND day < %s"
+    insert_query = """
+        INSERT INTO sales_daily_rollup (day, product_id, category_id, units_sold, sale_count, revenue)
+        SELECT DATE(s.sale_date), s.product_id, COALESCE(s.category_id, p.category_id, 0),
+               SUM(s.quantity_sold), COUNT(*), SUM(s.line_total)
+        FROM sales s
+        JOIN products p ON s.product_id = p.id
+        WHERE s.sale_date >= %s AND s.sale_date < %s
+        GROUP BY DATE(s.sale_date), s.product_id, COALESCE(s.category_id, p.category_id, 0)
+    """
+    rows_written = 0
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        # One transaction per chunk keeps locks and undo log small on big tables
+        chunk_end = min(chunk_start + timedelta(days=chunk_days), end_date + timedelta(days=1))
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(delete_query, (chunk_start, chunk_end))
+            cursor.execute(insert_query, (
+                datetime.combine(chunk_start, datetime.min.time()),
+                datetime.combine(chunk_end, datetime.min.time())
+            ))
+            rows_written += cursor.rowcount
+        invalidate_revenue_cache(chunk_start, chunk_end - timedelta(days=1))
+        print(f"Rebuilt revenue rollup for {chunk_start} .. {chunk_end - timedelta(days=1)}")
+        chunk_start = chunk_end
+    return rows_written
+
+
+def backfill_sales_category(batch_size: int = 10000) -> int:
+    """
+    Fill sales.category_id (0 = uncategorized) for rows written before it existed, from the
+    products' current category, in id-range batches of one transaction each. Returns rows updated.
+    """
+    with db_cursor() as cursor:
+        cursor.execute("SELECT MIN(id) as first_id, MAX(id) as last_id FROM sales WHERE category_id IS NULL")
+        bounds = cursor.fetchone()
+    if not bounds or bounds['first_id'] is None:
+        return 0
+    update_query = """
+        UPDATE sales s
+        JOIN products p ON s.product_id = p.id
+        SET s.category_id = COALESCE(p.category_id, 0)
+        WHERE s.id >= %s AND s.id < %s AND s.category_id IS NULL
+    """
+    rows_updated = 0
+    batch_start = bounds['first_id']
+    while batch_start <= bounds['last_id']:
+        batch_end = batch_start + batch_size
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(update_query, (batch_start, batch_end))
+            rows_updated += cursor.rowcount
+        print(f"Backfilled sales.category_id for ids {batch_start} .. {batch_end - 1} ({rows_updated} rows so far)")
+        batch_start = batch_end
+    return rows_updated
@@ -1,23 +1,128 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.api.api_v1 import api_router
 from app.core import config # To use API_V1_STR
+from app.core import async_db, db, metrics
+from app.crud import crud_categories, crud_inventory, crud_inventory_shards, crud_partitions, crud_products, crud_sales
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    db.init_pool()
+    await async_db.init_async_pool()
+    try:
+        crud_categories.warm_category_cache()
+    except Exception as e:
+        # Lookups fall back to the database until the next refresh succeeds
+        print(f"Could not warm category cache: {e}")
+    crud_categories.category_cache_refresher.start()
+    try:
+        crud_inventory_shards.load_hot_products()
+    except Exception as e:
+        # Sales discover sharded products on their own until the next refresh succeeds
+        print(f"Could not load hot products: {e}")
+    crud_inventory_shards.hot_product_refresher.start()
+    crud_inventory.low_stock_poller.start()
+    if config.PARTITION_MAINTENANCE_INTERVAL > 0:
+        try:
+            crud_partitions.ensure_partitions()
+        except Exception as e:
+            # p_future catches new rows meanwhile; the next run splits them off
+            print(f"Could not create upcoming partitions: {e}")
+        crud_partitions.partition_maintainer.start()
+    if config.SALES_INGEST_ENABLED:
+        crud_sales.sale_ingest_queue.start()
+    yield
+    crud_sales.sale_ingest_queue.stop() # Commits what is still queued
+    crud_partitions.partition_maintainer.stop()
+    crud_inventory.low_stock_poller.stop()
+    crud_inventory_shards.hot_product_refresher.stop()
+    crud_categories.category_cache_refresher.stop()
+    await async_db.close_async_pool()
+    db.close_pool()
+
 
 app = FastAPI(
     title="E-commerce Admin API",
     description="API for managing e-commerce sales, revenue, and inventory.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 @app.exception_handler(ConnectionError)
 async def db_connection_exception_handler(request, exc):
-    return HTTPException(
+    detail = "Database connection error. Please try again later."
+    if isinstance(exc, db.PoolTimeoutError):
+        detail = "Database is busy: no connection available. Please try again later."
+    return JSONResponse(
         status_code=503, # Service Unavailable
-        detail="Database connection error. Please try again later."
+        content={"detail": detail},
+        headers={"Retry-After": "1"}
     )
 
 
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(api_router, prefix=config.API_V1_STR)
 
 @app.get("/", tags=["Root"])
 async def read_root():
-    return {"message": "Welcome to the E-commerce Admin API. Docs at /docs"}
\ No newline at end of file
+    return {"message": "Welcome to the E-commerce Admin API. Docs at /docs"}
+
+@app.get("/health", tags=["Root"])
+def health_check():
+    return {
+        "status": "ok",
+        "db_pool": db.get_pool_stats(),
+        "async_db_pool": async_db.get_async_pool_stats(),
+        "db_replicas": db.get_replica_stats(),
+        "product_cache": crud_products.get_product_cache_stats(),
+        "sale_ingest": crud_sales.sale_ingest_queue.stats(),
+    }
+
+@app.get("/metrics", tags=["Root"], include_in_schema=False)
+def metrics_endpoint():
+    if not metrics.ENABLED:
+        return PlainTextResponse("Metrics are disabled (METRICS_ENABLED=false).\n", status_code=404)
+    pool = db.get_pool_stats()
+    caches = {"product": crud_products.get_product_cache_stats(), "revenue": crud_sales.get_revenue_cache_stats()}
+    extra = metrics.render_samples(
+        "db_pool_connections", "Open pooled connections by state.", "gauge",
+        [({"state": "idle"}, pool["idle"]), ({"state": "in_use"}, pool["in_use"])]
+    )
+    extra += metrics.render_samples(
+        "db_pool_events_total", "Pool events since startup.", "counter",
+        [({"event": name}, pool[name]) for name in
+         ("checkouts", "waits", "timeouts", "connects", "recycled", "failed_pings", "discarded")]
+    )
+    async_pool = async_db.get_async_pool_stats()
+    extra += metrics.render_samples(
+        "async_db_pool_connections", "Open connections of the asyncio pool by state.", "gauge",
+        [({"state": "idle"}, async_pool["idle"]), ({"state": "in_use"}, async_pool["in_use"])]
+    )
+    extra += metrics.render_samples(
+        "async_db_pool_events_total", "asyncio pool events since startup.", "counter",
+        [({"event": name}, async_pool[name]) for name in ("checkouts", "timeouts", "discarded")]
+    )
+    replicas = db.get_replica_stats()
+    extra += metrics.render_samples(
+        "db_read_routing_total", "read_only cursors by where they ran.", "counter",
+        [({"target": name}, replicas[name]) for name in ("primary_reads", "replica_reads", "fallbacks")]
+    )
+    extra += metrics.render_samples(
+        "db_replica_lag_seconds", "Replication lag at the last health check (-1 = unknown or unhealthy).", "gauge",
+        [({"replica": r["host"]}, r["lag_seconds"] if r["healthy"] and r["lag_seconds"] is not None else -1)
+         for r in replicas["replicas"]]
+    )
+    extra += metrics.render_samples(
+        "cache_events_total", "Cache events since startup.", "counter",
+        [({"cache": cache, "event": name}, stats[name]) for cache, stats in caches.items()
+         for name in ("hits", "misses", "evictions", "expirations", "invalidations")]
+    )
+    extra += metrics.render_samples(
+        "cache_entries", "Entries currently cached.", "gauge",
+        [({"cache": cache}, stats["size"]) for cache, stats in caches.items()]
+    )
+    return PlainTextResponse(metrics.render(extra), media_type="text/plain; version=0.0.4")
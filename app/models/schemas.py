@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List, Union
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Literal, Union
 from datetime import datetime, date
 
 # --- Category Schemas ---
@@ -47,6 +47,19 @@ class ProductWithInventory(Product):
     low_stock_threshold: Optional[int] = None
 
 
+class ProductImportRowResult(BaseModel):
+    row: int # 1-based position in the uploaded payload (data rows only for CSV)
+    status: str # "created" or "error"
+    product_id: Optional[int] = None
+    error: Optional[str] = None
+
+class ProductImportReport(BaseModel):
+    total_rows: int
+    created: int
+    failed: int
+    results: List[ProductImportRowResult]
+
+
 # --- Inventory Schemas ---
 class InventoryBase(BaseModel):
     product_id: int
@@ -60,6 +73,28 @@ class InventoryUpdate(BaseModel):
     quantity: Optional[int] = Field(None, ge=0)
     low_stock_threshold: Optional[int] = Field(None, ge=0)
 
+class InventoryAdjustment(BaseModel):
+    product_id: int
+    quantity: Optional[int] = None # New stock level in "set" mode, signed change in "delta" mode
+    low_stock_threshold: Optional[int] = Field(None, ge=0)
+
+class InventoryBatchUpdate(BaseModel):
+    mode: Literal["set", "delta"] = "set"
+    reason: Optional[str] = Field(None, max_length=255) # Recorded in inventory_log; defaults to "Restock" / "Manual adjustment"
+    items: List[InventoryAdjustment] = Field(..., min_length=1, max_length=10000)
+
+    @model_validator(mode="after")
+    def check_items(self):
+        product_ids = [item.product_id for item in self.items]
+        if len(set(product_ids)) != len(product_ids):
+            raise ValueError("Each product may appear only once per batch.")
+        if self.mode == "set" and any(item.quantity is not None and item.quantity < 0 for item in self.items):
+            raise ValueError("quantity must be >= 0 in set mode.")
+        return self
+
+class InventorySharding(BaseModel):
+    shards: int = Field(..., ge=0, le=64) # Sub-counter rows for a hot product; 0 turns sharding off
+
 class Inventory(InventoryBase):
     id: int
     last_updated: datetime
@@ -74,6 +109,21 @@ class LowStockProduct(BaseModel):
     current_quantity: int
     low_stock_threshold: int
 
+class InventoryLogEntry(BaseModel):
+    id: int
+    product_id: int
+    change_in_quantity: int # Negative for sales
+    reason: Optional[str] = None
+    timestamp: datetime
+
+class InventoryHistoryBucket(BaseModel):
+    bucket_start: datetime
+    net_change: int
+    units_in: int
+    units_out: int
+    entries: int
+    stock_level: int # Stock at the end of the bucket, derived from the current stock and later log entries
+
 # --- Sale Schemas ---
 class SaleBase(BaseModel):
     product_id: int
@@ -92,6 +142,23 @@ class Sale(SaleBase):
     class Config:
         from_attributes = True
 
+class SaleIngestStatus(BaseModel):
+    tracking_id: str
+    status: str # "queued", "committed", "rejected" (e.g. not enough stock) or "failed" (database error)
+    sale_id: Optional[int] = None
+    error: Optional[str] = None
+
+# --- Order Schemas ---
+class OrderCreate(BaseModel):
+    order_id: Optional[str] = Field(None, max_length=255) # Generated if omitted; overrides per-line order_id
+    items: List[SaleCreate] = Field(..., min_length=1)
+
+class Order(BaseModel):
+    order_id: str
+    sale_date: datetime
+    total_amount: float
+    items: List[Sale]
+
 # --- Revenue Schemas ---
 class RevenueDataPoint(BaseModel):
     period: Union[date, str]
@@ -101,18 +168,49 @@ class RevenueReport(BaseModel):
     data: List[RevenueDataPoint]
     total_revenue_overall: float
 
+class RevenueComparisonPeriod(BaseModel):
+    label: Optional[str] = None # Defaults to "Period 1", "Period 2", ...
+    start_date: date
+    end_date: date
+    category_id: Optional[int] = None
+
 class RevenueComparisonRequest(BaseModel):
-    period_a_start: date
-    period_a_end: date
-    period_b_start: date
-    period_b_end: date
+    # Either the classic A/B pair ...
+    period_a_start: Optional[date] = None
+    period_a_end: Optional[date] = None
+    period_b_start: Optional[date] = None
+    period_b_end: Optional[date] = None
     category_id_a: Optional[int] = None
     category_id_b: Optional[int] = None
+    # ... or any number of periods, all answered in a single query
+    periods: Optional[List[RevenueComparisonPeriod]] = Field(None, min_length=1, max_length=50)
+
+    @model_validator(mode="after")
+    def check_periods(self):
+        if self.periods is None and None in (self.period_a_start, self.period_a_end, self.period_b_start, self.period_b_end):
+            raise ValueError("Provide either 'periods' or all of period_a_start, period_a_end, period_b_start, period_b_end.")
+        return self
+
+    def resolved_periods(self) -> List[RevenueComparisonPeriod]:
+        if self.periods is not None:
+            return [
+                p if p.label else p.model_copy(update={"label": f"Period {i + 1}"})
+                for i, p in enumerate(self.periods)
+            ]
+        return [
+            RevenueComparisonPeriod(label="Period A", start_date=self.period_a_start,
+                                    end_date=self.period_a_end, category_id=self.category_id_a),
+            RevenueComparisonPeriod(label="Period B", start_date=self.period_b_start,
+                                    end_date=self.period_b_end, category_id=self.category_id_b),
+        ]
 
 class RevenueComparisonData(BaseModel):
-    period: str # "Period A" or "Period B"
+    period: str # "Period A"/"Period B", or the period label
     category_name: Optional[str] = "All"
     total_revenue: float
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    category_id: Optional[int] = None
 
 class RevenueComparisonResponse(BaseModel):
     comparison: List[RevenueComparisonData]
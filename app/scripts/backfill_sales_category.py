@@ -0,0 +1,17 @@
+# app/scripts/backfill_sales_category.py
+# Usage: python -m app.scripts.backfill_sales_category [--batch-size N]
+import argparse
+from app.crud import crud_sales
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill sales.category_id for sales recorded before it existed.")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Sale ids per transaction")
+    args = parser.parse_args()
+
+    rows = crud_sales.backfill_sales_category(batch_size=args.batch_size)
+    print(f"Done: {rows} sales updated.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# app/scripts/manage_partitions.py
+# Usage: python -m app.scripts.manage_partitions list
+#        python -m app.scripts.manage_partitions create [--months-ahead N] [--since YYYY-MM-DD]
+#        python -m app.scripts.manage_partitions archive [--sales-months N] [--inventory-log-months N] [--dry-run]
+import argparse
+from datetime import date
+from app.core import config
+from app.crud import crud_partitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the monthly partitions of sales and inventory_log.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Show partitions, their upper bounds and approximate row counts")
+    create = commands.add_parser("create", help="Create monthly partitions ahead of time")
+    create.add_argument("--months-ahead", type=int, default=config.PARTITION_MONTHS_AHEAD,
+                        help="Months past the current one to create (default: PARTITION_MONTHS_AHEAD)")
+    create.add_argument("--since", type=date.fromisoformat, default=None,
+                        help="Also split history older than the first monthly partition into months from this date")
+    archive = commands.add_parser("archive", help="Move old partitions into <table>_archive_<partition> tables")
+    archive.add_argument("--sales-months", type=int, default=config.SALES_RETENTION_MONTHS,
+                         help="Months of sales to keep live, 0 = all (default: SALES_RETENTION_MONTHS)")
+    archive.add_argument("--inventory-log-months", type=int, default=config.INVENTORY_LOG_RETENTION_MONTHS,
+                         help="Months of inventory_log to keep live, 0 = all (default: INVENTORY_LOG_RETENTION_MONTHS)")
+    archive.add_argument("--dry-run", action="store_true", help="Only print what would be archived")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for table, partitions in crud_partitions.get_partition_report().items():
+            print(table)
+            for partition in partitions:
+                bound = f"< {partition['upper_bound']:%Y-%m-%d}" if partition['upper_bound'] else "MAXVALUE"
+                print(f"  {partition['name']:<10} {bound:<14} ~{partition['approx_rows']} rows")
+    elif args.command == "create":
+        created = crud_partitions.ensure_partitions(args.months_ahead, since=args.since)
+        print(f"Done: {len(created)} partitions created.")
+    else:
+        archived = crud_partitions.archive_partitions(
+            {"sales": args.sales_months, "inventory_log": args.inventory_log_months}, dry_run=args.dry_run
+        )
+        print(f"Done: {len(archived)} partitions {'to archive' if args.dry_run else 'archived'}.")
+
+
+if __name__ == "__main__":
+    main()
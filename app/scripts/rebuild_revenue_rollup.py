@@ -0,0 +1,22 @@
+# app/scripts/rebuild_revenue_rollup.py
+# Usage: python -m app.scripts.rebuild_revenue_rollup [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+import argparse
+from datetime import date
+from app.crud import crud_sales
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill or rebuild the sales_daily_rollup table from sales.")
+    parser.add_argument("--from", dest="start_date", type=date.fromisoformat, default=None,
+                        help="First day to rebuild (default: first sale)")
+    parser.add_argument("--to", dest="end_date", type=date.fromisoformat, default=None,
+                        help="Last day to rebuild, inclusive (default: last sale)")
+    parser.add_argument("--chunk-days", type=int, default=31, help="Days rebuilt per transaction")
+    args = parser.parse_args()
+
+    rows = crud_sales.rebuild_revenue_rollup(args.start_date, args.end_date, chunk_days=args.chunk_days)
+    print(f"Done: {rows} rollup rows written.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# benchmarks/bench_list_serialization.py
+"""
+Compares the two response paths of the hot list endpoints for one page of rows, without a database:
+
+  models: CRUD builds schema objects row by row, FastAPI validates them against response_model
+          and serializes with the stdlib JSON encoder (FAST_JSON_RESPONSES=false)
+  fast:   CRUD shapes JSON-ready dicts, serialized once by orjson (FAST_JSON_RESPONSES=true)
+
+Rows are synthetic but have the shape the MySQL cursor returns (Decimal prices, datetimes).
+Both paths are checked to produce the same JSON before timing.
+
+Usage: python -m benchmarks.bench_list_serialization [--rows 200] [--iterations 200]
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app.crud import crud_categories, crud_inventory, crud_products, crud_sales
+from app.models import schemas
+
+CATEGORY_COUNT = 20
+
+
+def _seed_categories():
+    # Product shaping reads categories from the in-process cache; keep the benchmark off the database
+    for category_id in range(1, CATEGORY_COUNT + 1):
+        crud_categories._cache_category(schemas.Category(
+            id=category_id, name=f"Category {category_id}", created_at=datetime(2024, 1, 1)
+        ))
+
+
+def _product_columns(index: int, prefix: str = "") -> dict:
+    created = datetime(2024, 1, 1) + timedelta(minutes=index)
+    return {
+        f"{prefix}id": index, f"{prefix}name": f"Product {index:05d}",
+        f"{prefix}description": f"Description for product {index}, long enough to look like real copy.",
+        f"{prefix}category_id": index % CATEGORY_COUNT + 1,
+        f"{prefix}created_at": created, f"{prefix}updated_at": created + timedelta(days=1),
+    }
+
+
+def product_rows(count: int) -> List[dict]:
+    rows = []
+    for i in range(1, count + 1):
+        row = _product_columns(i)
+        row.update(price=Decimal("19.99") + i, inventory_quantity=i * 3, low_stock_threshold=10,
+                   inventory_last_updated=datetime(2024, 6, 1))
+        rows.append(row)
+    return rows
+
+
+def inventory_rows(count: int) -> List[dict]:
+    rows = []
+    for i in range(1, count + 1):
+        row = _product_columns(i, "p_")
+        row.update(id=i, product_id=i, quantity=i * 3, low_stock_threshold=10,
+                   last_updated=datetime(2024, 6, 1, 12, 30), p_price=Decimal("19.99") + i)
+        rows.append(row)
+    return rows
+
+
+def sale_rows(count: int) -> List[dict]:
+    rows = []
+    for i in range(1, count + 1):
+        row = _product_columns(i % 50 + 1, "p_")
+        row.update(id=i, product_id=row["p_id"], quantity_sold=i % 5 + 1,
+                   sale_price_at_time_of_sale=Decimal("18.50"), p_price_current=Decimal("19.99"),
+                   sale_date=datetime(2024, 6, 1) - timedelta(minutes=i), order_id=f"order-{i // 3}")
+        rows.append(row)
+    return rows
+
+
+SCENARIOS = {
+    # name: (response_model, row factory, model builder, dict shaper)
+    "products": (List[schemas.ProductWithInventory], product_rows,
+                 crud_products._product_with_inventory_from_row, crud_products._shape_product_with_inventory),
+    "inventory": (List[schemas.Inventory], inventory_rows,
+                  lambda row: schemas.Inventory(**crud_inventory._shape_inventory(row)), crud_inventory._shape_inventory),
+    "sales": (List[schemas.Sale], sale_rows, crud_sales._sale_from_row, crud_sales._shape_sale),
+}
+
+
+async def _models_path(field, rows, build) -> bytes:
+    content = await serialize_response(field=field, response_content=[build(row) for row in rows])
+    return JSONResponse(content).body
+
+
+def _fast_path(rows, shape) -> bytes:
+    return ORJSONResponse([shape(row) for row in rows]).body
+
+
+async def _time_models(field, rows, build, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await _models_path(field, rows, build)
+    return time.perf_counter() - start
+
+
+def _time_fast(rows, shape, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        _fast_path(rows, shape)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list endpoint serialization paths.")
+    parser.add_argument("--rows", type=int, default=200, help="Rows per page (default: 200, the endpoints' max limit)")
+    parser.add_argument("--iterations", type=int, default=200, help="Pages serialized per path (default: 200)")
+    args = parser.parse_args()
+
+    _seed_categories()
+    print(f"{args.rows} rows/page, {args.iterations} pages per path")
+    print(f"{'endpoint':<10} {'models ms/page':>15} {'fast ms/page':>13} {'speedup':>8}")
+    for name, (response_model, make_rows, build, shape) in SCENARIOS.items():
+        field = create_model_field(name=f"Response_{name}", type_=response_model, mode="serialization")
+        rows = make_rows(args.rows)
+        if json.loads(asyncio.run(_models_path(field, rows, build))) != json.loads(_fast_path(rows, shape)):
+            raise SystemExit(f"{name}: the two paths produced different JSON")
+        models_seconds = asyncio.run(_time_models(field, rows, build, args.iterations))
+        fast_seconds = _time_fast(rows, shape, args.iterations)
+        print(f"{name:<10} {models_seconds * 1000 / args.iterations:>15.3f} "
+              f"{fast_seconds * 1000 / args.iterations:>13.3f} {models_seconds / fast_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/compare_results.py
+"""
+Compare two run_scenarios.py result files and flag regressions.
+
+Usage: python -m benchmarks.compare_results baseline.json candidate.json [--threshold 0.15]
+Exits with status 1 when any scenario's p50 or p99 latency grew, or its throughput dropped,
+by more than the threshold (a fraction of the baseline).
+"""
+import argparse
+import json
+import sys
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> bool:
+    regressed = False
+    print(f"{'scenario':<28} {'p50 ms':>17} {'p99 ms':>17} {'req/s':>17}")
+    for name, before in baseline['scenarios'].items():
+        after = candidate['scenarios'].get(name)
+        if after is None:
+            print(f"{name:<28} missing from candidate")
+            continue
+        changes = {
+            "p50": _change(before['latency_ms']['p50'], after['latency_ms']['p50']),
+            "p99": _change(before['latency_ms']['p99'], after['latency_ms']['p99']),
+            # Lower throughput is worse, so flip the sign
+            "rps": -_change(before['throughput_rps'], after['throughput_rps']),
+        }
+        flagged = [metric for metric, change in changes.items() if change > threshold]
+        regressed = regressed or bool(flagged)
+        print(f"{name:<28} "
+              f"{after['latency_ms']['p50']:>9.2f} ({changes['p50']:+.0%}) "
+              f"{after['latency_ms']['p99']:>9.2f} ({changes['p99']:+.0%}) "
+              f"{after['throughput_rps']:>9.1f} ({-changes['rps']:+.0%})"
+              f"{'  REGRESSION: ' + ', '.join(flagged) if flagged else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative change (default: 0.15)")
+    args = parser.parse_args()
+
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    with open(args.candidate) as handle:
+        candidate = json.load(handle)
+    print(f"baseline {baseline['meta'].get('git_commit')}  candidate {candidate['meta'].get('git_commit')}")
+    sys.exit(1 if compare(baseline, candidate, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
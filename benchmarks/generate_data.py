@@ -0,0 +1,186 @@
+# benchmarks/generate_data.py
+"""
+Seeded synthetic dataset for benchmarking: categories, products with inventory, and sales spread over
+the last `--days` days with a skewed product popularity (a few best sellers, a long tail).
+The same arguments and seed always produce the same rows.
+
+Writes go through multi-row INSERTs (`--method insert`) or LOAD DATA LOCAL INFILE (`--method load-data`,
+fastest, needs `local_infile=1` on the server). The daily revenue rollup is rebuilt at the end.
+
+Usage: python -m benchmarks.generate_data --products 50000 --sales 10000000 [--truncate]
+Connection settings come from the usual DB_* environment variables.
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+import mysql.connector
+from app.core import config
+from app.crud import crud_sales
+
+WORDS = (
+    "smart", "wireless", "classic", "deluxe", "portable", "organic", "premium", "compact", "vintage", "ultra",
+    "speaker", "headphones", "novel", "coffee", "maker", "shirt", "laptop", "garden", "lamp", "kettle",
+    "backpack", "blender", "camera", "charger", "desk", "mug", "pillow", "sneakers", "watch", "yoga",
+)
+TABLES_IN_DELETE_ORDER = ("sales_daily_rollup", "inventory_log", "sales", "inventory_shards", "inventory", "products", "categories")
+
+
+def _connect(allow_local_infile: bool):
+    return mysql.connector.connect(
+        host=config.DB_HOST, user=config.DB_USER, password=config.DB_PASSWORD, database=config.DB_NAME,
+        allow_local_infile=allow_local_infile
+    )
+
+
+def _insert_rows(cursor, table: str, columns: tuple, rows, batch_size: int) -> int:
+    # executemany rewrites INSERT ... VALUES into one multi-row statement per batch
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            cursor.executemany(query, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(query, batch)
+        total += len(batch)
+    return total
+
+
+def _load_rows(cursor, table: str, columns: tuple, rows, batch_size: int) -> int:
+    # Spill each batch to a temporary CSV and let the server bulk-load it
+    total = 0
+    batch_rows = iter(rows)
+    while True:
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", delete=False) as handle:
+            writer = csv.writer(handle)
+            written = 0
+            for row in batch_rows:
+                writer.writerow(["\\N" if v is None else v for v in row])
+                written += 1
+                if written >= batch_size:
+                    break
+            path = handle.name
+        try:
+            if written:
+                cursor.execute(
+                    f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} "
+                    "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' LINES TERMINATED BY '\\r\\n' "
+                    f"({', '.join(columns)})", (path,)
+                )
+        finally:
+            os.unlink(path)
+        total += written
+        if written < batch_size:
+            return total
+
+
+def generate(args):
+    rng = random.Random(args.seed)
+    write_rows = _load_rows if args.method == "load-data" else _insert_rows
+    conn = _connect(allow_local_infile=args.method == "load-data")
+    cursor = conn.cursor()
+    # Bulk-load settings for this session only
+    cursor.execute("SET SESSION foreign_key_checks = 0")
+    cursor.execute("SET SESSION unique_checks = 0")
+    started = time.perf_counter()
+
+    if args.truncate:
+        for table in TABLES_IN_DELETE_ORDER:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        conn.commit()
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM categories")
+    first_category_id = cursor.fetchone()[0] + 1
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM products")
+    first_product_id = cursor.fetchone()[0] + 1
+    category_ids = list(range(first_category_id, first_category_id + args.categories))
+    product_ids = range(first_product_id, first_product_id + args.products)
+
+    # Explicit ids keep products, inventory and sales consistent without reading ids back
+    _insert_rows(cursor, "categories", ("id", "name"), (
+        (category_id, f"Category {category_id}") for category_id in category_ids
+    ), args.batch_size)
+    prices = {}
+    product_categories = {}
+    product_rows = []
+    for product_id in product_ids:
+        prices[product_id] = round(rng.uniform(2, 500), 2)
+        product_categories[product_id] = rng.choice(category_ids) if rng.random() > 0.02 else None
+        name = " ".join(rng.choice(WORDS) for _ in range(3)).title()
+        product_rows.append((
+            product_id, f"{name} {product_id}", f"Synthetic product {product_id}",
+            prices[product_id], product_categories[product_id]
+        ))
+    write_rows(cursor, "products", ("id", "name", "description", "price", "category_id"), product_rows, args.batch_size)
+    write_rows(cursor, "inventory", ("product_id", "quantity", "low_stock_threshold"), (
+        (product_id, rng.randint(0, 1000), rng.choice((5, 10, 20))) for product_id in product_ids
+    ), args.batch_size)
+    conn.commit()
+    print(f"{args.categories} categories, {args.products} products with inventory "
+          f"({time.perf_counter() - started:.1f}s)")
+
+    # Pareto-distributed popularity: low ranks (best sellers) get most of the sales
+    ranked_products = list(product_ids)
+    rng.shuffle(ranked_products)
+    end = datetime.now().replace(microsecond=0)
+    window_seconds = args.days * 86400
+
+    def sale_rows():
+        order_number = 0
+        remaining = 0
+        order_id = None
+        for _ in range(args.sales):
+            if remaining == 0:
+                order_number += 1
+                order_id = f"bench-{args.seed}-{order_number}"
+                remaining = rng.choice((1, 1, 1, 2, 2, 3, 4))
+                sale_date = end - timedelta(seconds=rng.randrange(window_seconds))
+            remaining -= 1
+            rank = min(int(rng.paretovariate(1.2)) - 1, len(ranked_products) - 1)
+            product_id = ranked_products[rank] if rng.random() < 0.8 else rng.choice(ranked_products)
+            yield (product_id, rng.choice((1, 1, 1, 2, 3)), prices[product_id], sale_date, order_id,
+                   product_categories[product_id] or 0)
+
+    sales_columns = ("product_id", "quantity_sold", "sale_price_at_time_of_sale", "sale_date", "order_id", "category_id")
+    written = 0
+    sales = sale_rows()
+    while written < args.sales:
+        # Commit every batch so a 10M-row load doesn't build one giant transaction
+        chunk = [row for _, row in zip(range(args.batch_size), sales)]
+        written += write_rows(cursor, "sales", sales_columns, chunk, args.batch_size)
+        conn.commit()
+        if written % (args.batch_size * 100) == 0 or written >= args.sales:
+            elapsed = time.perf_counter() - started
+            print(f"{written}/{args.sales} sales ({elapsed:.1f}s, {written / elapsed:,.0f} rows/s)")
+
+    cursor.close()
+    conn.close()
+    if not args.skip_rollup:
+        rows = crud_sales.rebuild_revenue_rollup(chunk_days=31)
+        print(f"Rollup rebuilt: {rows} rows")
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic dataset for benchmarks.")
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--sales", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=730, help="Sales are spread over this many days up to now")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--method", choices=("insert", "load-data"), default="insert")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT statement / LOAD DATA file")
+    parser.add_argument("--truncate", action="store_true", help="Empty all tables first")
+    parser.add_argument("--skip-rollup", action="store_true", help="Don't rebuild sales_daily_rollup afterwards")
+    generate(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# benchmarks/run_scenarios.py
+"""
+Per-endpoint latency/throughput scenarios, driven in-process against the FastAPI app (httpx ASGI
+transport, no network hop) and the database configured through the DB_* environment variables.
+Request parameters are drawn from the dataset with a seeded RNG, so runs are repeatable.
+
+Usage: python -m benchmarks.run_scenarios [--scenarios sales_list,revenue_daily] [--requests 500]
+       [--concurrency 8] [--include-writes] [--output results.json]
+
+Results are written as JSON (see README) and can be compared with benchmarks/compare_results.py.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import httpx
+from app.core import config, db
+from app.core.db import db_cursor
+from app.main import app
+
+API = config.API_V1_STR
+SEARCH_TERMS = ("smart", "wire", "coffee", "lap", "garden lamp", "premium watch", "yo")
+
+# A request: (method, path, query params, JSON body)
+Request = Tuple[str, str, Optional[dict], Optional[dict]]
+
+
+def load_dataset() -> dict:
+    with db_cursor() as cursor:
+        cursor.execute("SELECT MIN(id) as first_id, MAX(id) as last_id, COUNT(*) as total FROM products")
+        products = cursor.fetchone()
+        cursor.execute("SELECT id FROM categories")
+        category_ids = [row['id'] for row in cursor.fetchall()]
+        cursor.execute("SELECT MIN(sale_date) as first_sale, MAX(sale_date) as last_sale FROM sales")
+        sales = cursor.fetchone()
+        cursor.execute(
+            "SELECT table_name, table_rows FROM information_schema.tables WHERE table_schema = DATABASE()"
+        )
+        approx_rows = {row['table_name']: row['table_rows'] for row in cursor.fetchall()}
+    if not products['total'] or sales['first_sale'] is None:
+        raise SystemExit("No products or sales found; run python -m benchmarks.generate_data first.")
+    return {
+        "first_product_id": products['first_id'], "last_product_id": products['last_id'],
+        "category_ids": category_ids,
+        "first_sale": sales['first_sale'], "last_sale": sales['last_sale'],
+        "approx_rows": approx_rows,
+    }
+
+
+def _date_range(rng: random.Random, data: dict, days: int) -> Tuple[str, str]:
+    span = max((data['last_sale'] - data['first_sale']).days - days, 0)
+    start = data['first_sale'].date() + timedelta(days=rng.randint(0, span))
+    return start.isoformat(), (start + timedelta(days=days - 1)).isoformat()
+
+
+def _product_id(rng: random.Random, data: dict) -> int:
+    return rng.randint(data['first_product_id'], data['last_product_id'])
+
+
+def sales_list(rng, data) -> Request:
+    date_from, date_to = _date_range(rng, data, 30)
+    return "GET", f"{API}/sales/", {"date_from": date_from, "date_to": date_to, "limit": 200}, None
+
+def sales_list_deep_page(rng, data) -> Request:
+    return "GET", f"{API}/sales/", {"skip": rng.randint(1000, 20000), "limit": 100}, None
+
+def sales_list_by_category(rng, data) -> Request:
+    date_from, date_to = _date_range(rng, data, 90)
+    return "GET", f"{API}/sales/", {
+        "date_from": date_from, "date_to": date_to, "category_id": rng.choice(data['category_ids']), "limit": 100
+    }, None
+
+def revenue_daily(rng, data) -> Request:
+    start_date, end_date = _date_range(rng, data, 90)
+    return "GET", f"{API}/sales/revenue/analysis", {
+        "period_type": "daily", "start_date": start_date, "end_date": end_date
+    }, None
+
+def revenue_monthly_by_category(rng, data) -> Request:
+    start_date, end_date = _date_range(rng, data, 365)
+    return "GET", f"{API}/sales/revenue/analysis", {
+        "period_type": "monthly", "start_date": start_date, "end_date": end_date,
+        "category_id": rng.choice(data['category_ids'])
+    }, None
+
+def products_list(rng, data) -> Request:
+    return "GET", f"{API}/products/", {"category_id": rng.choice(data['category_ids']), "limit": 100}, None
+
+def products_search(rng, data) -> Request:
+    return "GET", f"{API}/products/", {"name": rng.choice(SEARCH_TERMS), "limit": 50}, None
+
+def product_by_id(rng, data) -> Request:
+    return "GET", f"{API}/products/{_product_id(rng, data)}", None, None
+
+def low_stock(rng, data) -> Request:
+    return "GET", f"{API}/inventory/low-stock", None, None
+
+def record_sale(rng, data) -> Request:
+    return "POST", f"{API}/sales/", None, {"product_id": _product_id(rng, data), "quantity_sold": 1}
+
+
+READ_SCENARIOS: Dict[str, Callable[[random.Random, dict], Request]] = {
+    "sales_list": sales_list,
+    "sales_list_deep_page": sales_list_deep_page,
+    "sales_list_by_category": sales_list_by_category,
+    "revenue_daily": revenue_daily,
+    "revenue_monthly_by_category": revenue_monthly_by_category,
+    "products_list": products_list,
+    "products_search": products_search,
+    "product_by_id": product_by_id,
+    "low_stock": low_stock,
+}
+# Writes change the dataset (stock, sales, rollup); only run when asked
+WRITE_SCENARIOS: Dict[str, Callable[[random.Random, dict], Request]] = {
+    "record_sale": record_sale,
+}
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def run_scenario(client: httpx.AsyncClient, make_request, data: dict, seed: int,
+                       requests: int, concurrency: int, warmup: int) -> dict:
+    rng = random.Random(seed)
+    planned = [make_request(rng, data) for _ in range(warmup + requests)]
+    latencies = []
+    statuses: Dict[int, int] = {}
+    # Status 400 (e.g. not enough stock) and 404 are part of the workload; 5xx counts as an error
+    errors = 0
+
+    async def send(request: Request, record: bool):
+        nonlocal errors
+        method, path, params, body = request
+        started = time.perf_counter()
+        response = await client.request(method, path, params=params, json=body)
+        await response.aread()
+        if record:
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code >= 500:
+                errors += 1
+
+    for request in planned[:warmup]:
+        await send(request, record=False)
+
+    queue = iter(planned[warmup:])
+
+    async def worker():
+        for request in queue:
+            await send(request, record=True)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 2) if duration else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 3),
+            "p50": round(_percentile(latencies, 0.50), 3),
+            "p90": round(_percentile(latencies, 0.90), 3),
+            "p99": round(_percentile(latencies, 0.99), 3),
+            "max": round(latencies[-1], 3),
+        },
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    available = {**READ_SCENARIOS, **WRITE_SCENARIOS}
+    if args.scenarios:
+        names = args.scenarios.split(",")
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}. Available: {', '.join(available)}")
+    else:
+        names = list(READ_SCENARIOS) + (list(WRITE_SCENARIOS) if args.include_writes else [])
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        data = load_dataset()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for index, name in enumerate(names):
+                result = await run_scenario(
+                    client, available[name], data, args.seed + index,
+                    args.requests, args.concurrency, args.warmup
+                )
+                results[name] = result
+                latency = result['latency_ms']
+                print(f"{name:<28} {result['throughput_rps']:>9.1f} req/s  p50 {latency['p50']:>8.2f} ms  "
+                      f"p99 {latency['p99']:>8.2f} ms  errors {result['errors']}")
+        pool_stats = db.get_pool_stats()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "dataset_rows": data['approx_rows'],
+            "settings": {
+                "DB_POOL_MAX_SIZE": config.DB_POOL_MAX_SIZE,
+                "ASYNC_DB_POOL_MAX_SIZE": config.ASYNC_DB_POOL_MAX_SIZE,
+                "REVENUE_ROLLUP_ENABLED": config.REVENUE_ROLLUP_ENABLED,
+                "REVENUE_CACHE_ENABLED": config.REVENUE_CACHE_ENABLED,
+                "PRODUCT_CACHE_ENABLED": config.PRODUCT_CACHE_ENABLED,
+                "FAST_JSON_RESPONSES": config.FAST_JSON_RESPONSES,
+            },
+            "db_pool": pool_stats,
+        },
+        "scenarios": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run per-endpoint benchmark scenarios in-process.")
+    parser.add_argument("--scenarios", default=None, help="Comma-separated scenario names (default: all reads)")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests sent first")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--include-writes", action="store_true", help="Also run scenarios that modify data")
+    parser.add_argument("--output", default=None, help="Write JSON results here (default: stdout)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    payload = json.dumps(results, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(payload + "\n")
+        print(f"Results written to {args.output}")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+-- sql/migrations/001_inventory_stock_deficit.sql
+-- Indexable low-stock state: get_low_stock_alerts reads idx_inventory_deficit instead of
+-- scanning and sorting the whole inventory table.
+
+USE ecom_admin_db;
+
+ALTER TABLE inventory
+    ADD COLUMN stock_deficit INT AS (quantity - low_stock_threshold) STORED,
+    ADD INDEX idx_inventory_deficit (stock_deficit);
@@ -0,0 +1,12 @@
+-- sql/migrations/002_products_name_fulltext.sql
+-- Product name search through an ngram FULLTEXT index instead of LIKE '%term%' table scans.
+-- The ngram size comes from the server's ngram_token_size (default 2); keep
+-- PRODUCT_SEARCH_NGRAM_SIZE in the app config in sync with it.
+
+USE ecom_admin_db;
+
+-- Stopword filtering would drop common two-letter ngrams ("in", "on", ...) from the index
+SET SESSION innodb_ft_enable_stopword = OFF;
+
+ALTER TABLE products
+    ADD FULLTEXT INDEX ft_product_name (name) WITH PARSER ngram;
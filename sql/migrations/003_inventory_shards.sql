@@ -0,0 +1,23 @@
+-- sql/migrations/003_inventory_shards.sql
+-- Sub-counter rows for hot products: their sales lock one of several inventory_shards rows
+-- (and rollup rows) instead of all waiting on the same inventory row.
+
+USE ecom_admin_db;
+
+ALTER TABLE inventory
+    ADD COLUMN shard_count TINYINT UNSIGNED NOT NULL DEFAULT 0,
+    ADD INDEX idx_inventory_sharded (shard_count);
+
+CREATE TABLE IF NOT EXISTS inventory_shards (
+    product_id INT NOT NULL,
+    shard TINYINT UNSIGNED NOT NULL,
+    quantity INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, shard),
+    CHECK (quantity >= 0),
+    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
+);
+
+ALTER TABLE sales_daily_rollup
+    ADD COLUMN shard TINYINT UNSIGNED NOT NULL DEFAULT 0 AFTER category_id,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (day, product_id, category_id, shard);
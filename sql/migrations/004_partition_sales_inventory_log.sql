@@ -0,0 +1,36 @@
+-- sql/migrations/004_partition_sales_inventory_log.sql
+-- Monthly RANGE partitioning of sales (sale_date) and inventory_log (timestamp).
+-- MySQL requires the partitioning column in every unique key and doesn't allow foreign keys
+-- on partitioned tables, so the primary keys gain the date column and the FKs to products go.
+-- Both tables are rebuilt: run it in a maintenance window. Afterwards:
+--   python -m app.scripts.manage_partitions create --since <month of the oldest row, YYYY-MM-01>
+-- splits the history and creates the upcoming months.
+-- The foreign key names are the ones MySQL generated for sql/schema.sql; check
+-- SHOW CREATE TABLE if yours differ.
+
+USE ecom_admin_db;
+
+ALTER TABLE sales
+    DROP FOREIGN KEY sales_ibfk_1,
+    MODIFY sale_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, sale_date);
+
+ALTER TABLE sales
+    PARTITION BY RANGE (UNIX_TIMESTAMP(sale_date)) (
+        PARTITION p_start VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+        PARTITION p_future VALUES LESS THAN MAXVALUE
+    );
+
+ALTER TABLE inventory_log
+    DROP FOREIGN KEY inventory_log_ibfk_1,
+    RENAME INDEX product_id TO idx_inventory_log_product,
+    MODIFY timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, timestamp);
+
+ALTER TABLE inventory_log
+    PARTITION BY RANGE (UNIX_TIMESTAMP(timestamp)) (
+        PARTITION p_start VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+        PARTITION p_future VALUES LESS THAN MAXVALUE
+    );
@@ -0,0 +1,9 @@
+-- sql/migrations/005_inventory_log_product_time.sql
+-- Per-product stock history (GET /inventory/{product_id}/history) as a range scan in timestamp
+-- order. The composite index also serves every lookup the product_id index did.
+
+USE ecom_admin_db;
+
+ALTER TABLE inventory_log
+    ADD INDEX idx_inventory_log_product_time (product_id, timestamp),
+    DROP INDEX idx_inventory_log_product;
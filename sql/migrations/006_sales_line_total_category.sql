@@ -0,0 +1,16 @@
+-- sql/migrations/006_sales_line_total_category.sql
+-- Revenue aggregation without the per-row multiply or the join to products:
+-- line_total is computed by MySQL, category_id is captured when the sale is recorded, and
+-- idx_sales_revenue covers revenue queries filtered by date and category (index-only scan).
+-- Adding the stored column rebuilds the table; run it in a maintenance window. Then fill
+-- category_id for existing rows in small batches (safe to re-run, resumes where it stopped):
+--   python -m app.scripts.backfill_sales_category --batch-size 10000
+-- Until it finishes, category-filtered raw revenue (REVENUE_ROLLUP_ENABLED=false) misses the
+-- rows still at NULL.
+
+USE ecom_admin_db;
+
+ALTER TABLE sales
+    ADD COLUMN category_id INT NULL,
+    ADD COLUMN line_total DECIMAL(14, 2) AS (quantity_sold * sale_price_at_time_of_sale) STORED,
+    ADD INDEX idx_sales_revenue (sale_date, category_id, line_total);
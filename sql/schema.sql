@@ -11,6 +11,7 @@ CREATE TABLE IF NOT EXISTS categories (
 );
 
 -- Products Table
+SET SESSION innodb_ft_enable_stopword = OFF; -- Index every ngram of product names, including stopword-like ones
 CREATE TABLE IF NOT EXISTS products (
     id INT AUTO_INCREMENT PRIMARY KEY,
     name VARCHAR(255) NOT NULL,
@@ -21,7 +22,8 @@ CREATE TABLE IF NOT EXISTS products (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE SET NULL,
     INDEX idx_product_name (name),
-    INDEX idx_product_category (category_id)
+    INDEX idx_product_category (category_id),
+    FULLTEXT INDEX ft_product_name (name) WITH PARSER ngram -- Name search (substring/prefix, ranked)
 );
 
 -- Inventory Table
@@ -31,30 +33,73 @@ CREATE TABLE IF NOT EXISTS inventory (
     quantity INT NOT NULL DEFAULT 0,
     low_stock_threshold INT NOT NULL DEFAULT 10,
     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    stock_deficit INT AS (quantity - low_stock_threshold) STORED, -- <= 0 means low stock
+    shard_count TINYINT UNSIGNED NOT NULL DEFAULT 0, -- > 0: hot product, stock lives in inventory_shards and quantity stays 0
     FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
-    INDEX idx_inventory_product (product_id)
+    INDEX idx_inventory_product (product_id),
+    INDEX idx_inventory_deficit (stock_deficit),
+    INDEX idx_inventory_sharded (shard_count)
+);
+
+-- Inventory Shards (stock of hot products split over several rows; see PUT /inventory/{product_id}/shards)
+CREATE TABLE IF NOT EXISTS inventory_shards (
+    product_id INT NOT NULL,
+    shard TINYINT UNSIGNED NOT NULL,
+    quantity INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, shard),
+    CHECK (quantity >= 0),
+    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
 );
 
 -- Sales Table
+-- Partitioned by month on sale_date (maintained by `python -m app.scripts.manage_partitions`).
+-- Partitioned InnoDB tables can't have foreign keys and every unique key must include sale_date,
+-- hence PRIMARY KEY (id, sale_date) and no FK to products (the API never deletes products).
 CREATE TABLE IF NOT EXISTS sales (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     product_id INT NOT NULL,
     quantity_sold INT NOT NULL,
     sale_price_at_time_of_sale DECIMAL(10, 2) NOT NULL, -- Price at the time of sale
-    sale_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sale_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     order_id VARCHAR(255), -- Optional: to group items in a single order
-    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE RESTRICT, -- Don't delete product if sales exist
+    category_id INT, -- Product's category at time of sale, 0 = uncategorized (NULL only for rows not yet backfilled)
+    line_total DECIMAL(14, 2) AS (quantity_sold * sale_price_at_time_of_sale) STORED,
+    PRIMARY KEY (id, sale_date),
     INDEX idx_sales_product (product_id),
     INDEX idx_sales_date (sale_date),
-    INDEX idx_sales_order_id (order_id)
+    INDEX idx_sales_order_id (order_id),
+    INDEX idx_sales_revenue (sale_date, category_id, line_total) -- Covers revenue aggregation by date and category
+)
+PARTITION BY RANGE (UNIX_TIMESTAMP(sale_date)) (
+    PARTITION p_start VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
 );
 
 -- Optional: Inventory Log Table (to track changes over time more explicitly)
+-- Partitioned by month on timestamp, same scheme and constraints as sales
 CREATE TABLE IF NOT EXISTS inventory_log (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     product_id INT NOT NULL,
     change_in_quantity INT NOT NULL, -- e.g., -5 for sale, +20 for restock
     reason VARCHAR(255), -- e.g., "Sale (Order #123)", "Restock", "Manual Adjustment"
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
-);
\ No newline at end of file
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp),
+    INDEX idx_inventory_log_product_time (product_id, timestamp) -- Per-product history, newest first
+)
+PARTITION BY RANGE (UNIX_TIMESTAMP(timestamp)) (
+    PARTITION p_start VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+-- Daily Revenue Rollup (updated inside every sale transaction; rebuild with `python -m app.scripts.rebuild_revenue_rollup`)
+CREATE TABLE IF NOT EXISTS sales_daily_rollup (
+    day DATE NOT NULL,
+    product_id INT NOT NULL,
+    category_id INT NOT NULL DEFAULT 0, -- Category at time of sale, 0 = uncategorized
+    shard TINYINT UNSIGNED NOT NULL DEFAULT 0, -- Inventory shard of sharded products' sales, 0 otherwise
+    units_sold INT NOT NULL DEFAULT 0,
+    sale_count INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, product_id, category_id, shard),
+    INDEX idx_rollup_category_day (category_id, day)
+);
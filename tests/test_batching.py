@@ -0,0 +1,92 @@
+import threading
+import time
+import pytest
+from app.core.batching import MicroBatcher, QueueFullError
+
+
+def _wait_for(predicate, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_items_are_processed_in_batches():
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        return [("committed", item * 10, None) for item in items]
+
+    batcher = MicroBatcher("test", process, max_queue=100, batch_size=4, max_wait=0.2)
+    ids = [batcher.submit(item) for item in range(10)] # Queued before the worker starts
+    batcher.start()
+    batcher.stop()
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert [item for batch in batches for item in batch] == list(range(10))
+    assert batcher.status(ids[3]) == {"status": "committed", "result": 30, "error": None}
+    assert batcher.stats()["batches"] == 3
+    assert batcher.stats()["committed"] == 10
+
+
+def test_submit_rejects_when_the_queue_is_full():
+    batcher = MicroBatcher("test", lambda items: [], max_queue=2, batch_size=10, max_wait=0)
+    first = batcher.submit("a")
+    batcher.submit("b")
+    with pytest.raises(QueueFullError):
+        batcher.submit("c")
+    assert batcher.status(first)["status"] == "queued"
+    assert batcher.stats()["rejected_full"] == 1
+    assert batcher.stats()["queued"] == 2
+
+
+def test_a_failing_batch_marks_every_item_failed():
+    def process(items):
+        raise ConnectionError("database is down")
+
+    batcher = MicroBatcher("test", process, max_queue=10, batch_size=10, max_wait=0)
+    ids = [batcher.submit(item) for item in range(3)]
+    batcher.start()
+    batcher.stop()
+    for tracking_id in ids:
+        assert batcher.status(tracking_id) == {"status": "failed", "result": None, "error": "database is down"}
+    assert batcher.stats()["failed"] == 3
+
+
+def test_per_item_statuses_are_kept():
+    batcher = MicroBatcher(
+        "test", lambda items: [("committed", 1, None), ("rejected", None, "Not enough stock")],
+        max_queue=10, batch_size=2, max_wait=1
+    )
+    batcher.start()
+    try:
+        committed, rejected = batcher.submit("a"), batcher.submit("b")
+        _wait_for(lambda: batcher.status(rejected)["status"] != "queued")
+    finally:
+        batcher.stop()
+    assert batcher.status(committed)["status"] == "committed"
+    assert batcher.status(rejected) == {"status": "rejected", "result": None, "error": "Not enough stock"}
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    processed = threading.Event()
+
+    def process(items):
+        processed.set()
+        return [("committed", None, None)] * len(items)
+
+    batcher = MicroBatcher("test", process, max_queue=10, batch_size=100, max_wait=0.05)
+    batcher.start()
+    try:
+        batcher.submit("only one")
+        assert processed.wait(5)
+    finally:
+        batcher.stop()
+
+
+def test_old_statuses_are_forgotten():
+    batcher = MicroBatcher("test", lambda items: [], max_queue=10, batch_size=1, max_wait=0, status_size=2)
+    oldest = batcher.submit("a")
+    batcher.submit("b")
+    batcher.submit("c")
+    assert batcher.status(oldest) is None
@@ -0,0 +1,114 @@
+from datetime import date
+from app.core import cache
+from app.core.cache import LRUCache
+
+
+def _covers(day):
+    return lambda ranges: any(start <= day <= end for start, end in ranges)
+
+
+def test_least_recently_used_entry_is_evicted():
+    lru = LRUCache(2, None)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+    assert lru.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    lru = LRUCache(10, 60)
+    lru.set("default", 1)
+    lru.set("short", 2, ttl=5)
+    lru.set("forever", 3, ttl=None)
+    now[0] += 30
+    assert (lru.get("default"), lru.get("short"), lru.get("forever")) == (1, None, 3)
+    now[0] += 3600
+    assert (lru.get("default"), lru.get("forever")) == (None, 3)
+
+
+def test_invalidate_where_only_drops_matching_entries():
+    lru = LRUCache(10, None)
+    lru.set("march", 1, meta=[(date(2026, 3, 1), date(2026, 3, 31))])
+    lru.set("april", 2, meta=[(date(2026, 4, 1), date(2026, 4, 30))])
+    assert lru.invalidate_where(_covers(date(2026, 3, 15))) == 1
+    assert (lru.get("march"), lru.get("april")) == (None, 2)
+
+
+def test_fill_raced_by_a_matching_invalidation_is_not_cached():
+    lru = LRUCache(10, None)
+    march = [(date(2026, 3, 1), date(2026, 3, 31))]
+    generation = lru.generation # Read before computing the report
+    lru.invalidate_where(_covers(date(2026, 3, 15))) # A sale lands meanwhile
+    assert not lru.set("march", 1, meta=march, if_generation=generation)
+    assert lru.get("march") is None
+
+
+def test_fill_raced_by_an_unrelated_invalidation_is_cached():
+    lru = LRUCache(10, None)
+    march = [(date(2026, 3, 1), date(2026, 3, 31))]
+    generation = lru.generation
+    lru.invalidate_where(_covers(date(2026, 4, 15)))
+    assert lru.set("march", 1, meta=march, if_generation=generation)
+    assert lru.get("march") == 1
+
+
+def test_fill_raced_by_clear_is_not_cached():
+    lru = LRUCache(10, None)
+    generation = lru.generation
+    lru.clear()
+    assert not lru.set("march", 1, meta=[], if_generation=generation)
+
+
+def test_fill_older_than_the_invalidation_log_is_refused():
+    lru = LRUCache(1, None)
+    generation = lru.generation
+    for _ in range(lru._log_size + 1):
+        lru.invalidate_where(lambda meta: False)
+    assert not lru.set("march", 1, meta=[], if_generation=generation)
+    assert lru.set("march", 1, meta=[], if_generation=lru.generation)
+
+
+def test_fill_raced_by_invalidating_its_key_is_not_cached():
+    lru = LRUCache(10, None)
+    generation = lru.generation # get_product_by_id misses and reads the row
+    lru.invalidate(7) # The product is updated before the row is cached
+    assert not lru.set(7, "stale row", if_generation=generation)
+    assert lru.get(7) is None
+
+
+def test_fill_raced_by_invalidating_another_key_is_cached():
+    lru = LRUCache(10, None)
+    generation = lru.generation
+    lru.invalidate(8)
+    assert lru.set(7, "row", if_generation=generation)
+    assert lru.get(7) == "row"
+
+
+def test_invalidate_if_checks_the_cached_metadata():
+    lru = LRUCache(10, None)
+    lru.set(7, "row", meta={"category_id": 3})
+    assert not lru.invalidate_if(7, lambda meta: meta["category_id"] == 4)
+    assert lru.get(7) == "row"
+    assert lru.invalidate_if(7, lambda meta: meta["category_id"] == 3)
+    assert lru.get(7) is None
+
+
+def test_fill_raced_by_invalidate_if_is_not_cached():
+    lru = LRUCache(10, None)
+    lru.set(7, "old row", meta={"category_id": 3})
+    generation = lru.generation
+    lru.invalidate_if(7, lambda meta: True)
+    assert not lru.set(7, "row read before the write", if_generation=generation)
+
+
+def test_fill_older_than_the_key_log_is_refused():
+    lru = LRUCache(1, None)
+    generation = lru.generation
+    for key in range(lru._log_size + 1):
+        lru.invalidate(key)
+    assert not lru.set("other", 1, if_generation=generation)
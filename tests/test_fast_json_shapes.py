@@ -0,0 +1,49 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from app.core import config, responses
+from app.crud import crud_inventory, crud_products
+
+# Rows as mysql-connector returns them: DECIMAL columns (price, and stock totals computed with
+# SUM) come back as Decimal
+NOW = datetime(2026, 1, 2, 3, 4, 5)
+
+PRODUCT_ROW = {
+    "id": 7, "name": "Hot item", "description": None, "price": Decimal("19.99"), "category_id": None,
+    "created_at": NOW, "updated_at": NOW,
+    "inventory_quantity": Decimal("42"), "low_stock_threshold": 5, "inventory_last_updated": NOW,
+}
+
+INVENTORY_ROW = {
+    "id": 3, "product_id": 7, "quantity": Decimal("42"), "low_stock_threshold": 5, "last_updated": NOW,
+    "p_id": 7, "p_name": "Hot item", "p_description": None, "p_price": Decimal("19.99"),
+    "p_category_id": None, "p_created_at": NOW, "p_updated_at": NOW,
+}
+
+
+def _render(items: list) -> list:
+    response = responses.list_response(items, Response())
+    assert isinstance(response, ORJSONResponse)
+    return json.loads(response.body)
+
+
+def test_product_listing_rows_serialize(monkeypatch):
+    monkeypatch.setattr(config, "FAST_JSON_RESPONSES", True)
+    body = _render([crud_products._shape_product_with_inventory(PRODUCT_ROW)])
+    assert body[0]["inventory_quantity"] == 42
+    assert body[0]["price"] == 19.99
+
+
+def test_product_without_inventory_serializes(monkeypatch):
+    monkeypatch.setattr(config, "FAST_JSON_RESPONSES", True)
+    row = {**PRODUCT_ROW, "inventory_quantity": None, "low_stock_threshold": None}
+    assert _render([crud_products._shape_product_with_inventory(row)])[0]["inventory_quantity"] is None
+
+
+def test_inventory_listing_rows_serialize(monkeypatch):
+    monkeypatch.setattr(config, "FAST_JSON_RESPONSES", True)
+    body = _render([crud_inventory._shape_inventory(INVENTORY_ROW)])
+    assert body[0]["quantity"] == 42
+    assert body[0]["product"]["price"] == 19.99
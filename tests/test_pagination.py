@@ -0,0 +1,38 @@
+import base64
+from datetime import datetime
+import pytest
+from app.core import pagination
+
+
+def test_cursor_round_trip():
+    sold_at = datetime(2026, 3, 1, 12, 30, 15)
+    token = pagination.encode_cursor(sold_at, 42)
+    assert "=" not in token
+    assert pagination.decode_cursor(token, [datetime, int]) == [sold_at, 42]
+
+
+def test_cursor_round_trip_with_text_key():
+    token = pagination.encode_cursor("Hot item", 7)
+    assert pagination.decode_cursor(token, [str, int]) == ["Hot item", 7]
+
+
+@pytest.mark.parametrize("token, types", [
+    ("not base64 at all!", [int, int]),
+    (base64.urlsafe_b64encode(b'{"id": 1}').decode(), [int]), # Not a list
+    (pagination.encode_cursor(1), [int, int]), # Too few values
+    (pagination.encode_cursor(1, 2, 3), [int, int]), # Too many values
+    (pagination.encode_cursor("x", 1), [int, int]), # Wrong type
+    (pagination.encode_cursor(True, 1), [int, int]), # bool is not an int here
+    (pagination.encode_cursor("yesterday", 1), [datetime, int]), # Not a timestamp
+])
+def test_tampered_cursor_is_rejected(token, types):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        pagination.decode_cursor(token, types)
+
+
+def test_next_cursor_only_after_a_full_page():
+    rows = [{"id": 1}, {"id": 2}]
+    assert pagination.next_cursor(rows, 3, lambda row: (row["id"],)) is None
+    assert pagination.next_cursor([], 3, lambda row: (row["id"],)) is None
+    token = pagination.next_cursor(rows, 2, lambda row: (row["id"],))
+    assert pagination.decode_cursor(token, [int]) == [2]
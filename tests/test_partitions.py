@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+from datetime import date
+import pytest
+from app.crud import crud_partitions
+
+
+@pytest.mark.parametrize("month, months, expected", [
+    (date(2026, 1, 1), 1, date(2026, 2, 1)),
+    (date(2026, 11, 1), 2, date(2027, 1, 1)),
+    (date(2026, 12, 1), 1, date(2027, 1, 1)),
+    (date(2026, 1, 1), -1, date(2025, 12, 1)),
+    (date(2026, 3, 1), -15, date(2024, 12, 1)),
+    (date(2026, 3, 1), 0, date(2026, 3, 1)),
+])
+def test_add_months_crosses_year_boundaries(month, months, expected):
+    assert crud_partitions._add_months(month, months) == expected
+
+
+def test_month_start():
+    assert crud_partitions._month_start(date(2026, 2, 28)) == date(2026, 2, 1)
+    assert crud_partitions._month_start(date(2026, 2, 1)) == date(2026, 2, 1)
+
+
+def test_partition_name_and_bound():
+    assert crud_partitions._partition_name(date(2026, 1, 1)) == "p202601"
+    # A month's partition holds everything before the first second of the next month
+    assert crud_partitions._partition_definition(date(2026, 12, 1)) == (
+        "PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00'))"
+    )
+
+
+class FakeCursor:
+    def __init__(self, lock_acquired: bool):
+        self.lock_acquired = lock_acquired
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append(query)
+
+    def fetchone(self):
+        return {"acquired": 1 if self.lock_acquired else 0}
+
+    def fetchall(self):
+        return []
+
+
+def _fake_db(monkeypatch, cursor: FakeCursor):
+    @contextmanager
+    def db_cursor():
+        yield cursor
+    monkeypatch.setattr(crud_partitions, "db_cursor", db_cursor)
+
+
+def test_maintenance_is_skipped_while_another_process_holds_the_lock(monkeypatch):
+    cursor = FakeCursor(lock_acquired=False)
+    _fake_db(monkeypatch, cursor)
+    assert crud_partitions.ensure_partitions() == []
+    assert crud_partitions.archive_partitions({"sales": 12}) == []
+    assert all("GET_LOCK" in statement for statement in cursor.statements)
+
+
+def test_maintenance_releases_the_lock(monkeypatch):
+    cursor = FakeCursor(lock_acquired=True)
+    _fake_db(monkeypatch, cursor)
+    crud_partitions.ensure_partitions() # No partitions reported: both tables are skipped
+    assert "GET_LOCK" in cursor.statements[0]
+    assert "RELEASE_LOCK" in cursor.statements[-1]
@@ -0,0 +1,257 @@
+import copy
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from app.crud import crud_sales
+from app.models import schemas
+
+NOW = datetime(2026, 3, 14, 9, 30)
+
+
+class FakeDatabase:
+    """
+    Just enough of MySQL for the sale paths: inventory rows with their conditional UPDATEs, and
+    the sales, inventory_log and rollup INSERTs. Writes go to the working state right away and
+    are undone when the transaction rolls back.
+    """
+
+    def __init__(self, products: dict):
+        self.products = products # id -> {"name", "price", "quantity", "threshold", "shard_count", "shards"}
+        self.sales = []
+        self.log = []
+        self.rollup = []
+        self.locked_inventory = [] # Product ids whose inventory row was read FOR UPDATE
+        self.locked_shards = [] # Product ids whose shards were all read FOR UPDATE
+        self.commits = 0
+        self.rollbacks = 0
+
+    def state(self) -> tuple:
+        return copy.deepcopy((self.products, self.sales, self.log, self.rollup))
+
+    @contextmanager
+    def db_cursor(self, commit: bool = False, **kwargs):
+        snapshot = self.state()
+        try:
+            yield FakeCursor(self)
+        except BaseException:
+            self.products, self.sales, self.log, self.rollup = snapshot
+            self.rollbacks += 1
+            raise
+        self.commits += 1
+
+
+class FakeCursor:
+    def __init__(self, db: FakeDatabase):
+        self.db = db
+        self.rows = []
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def _product_row(self, product_id: int) -> dict:
+        product = self.db.products[product_id]
+        stock = product["quantity"] + sum(product["shards"].values())
+        return {
+            "id": product_id, "name": product["name"], "description": None, "price": product["price"],
+            "category_id": None, "created_at": NOW, "updated_at": NOW,
+            "inventory_quantity": stock, "low_stock_threshold": product["threshold"],
+            "shard_count": product["shard_count"], "sale_date": NOW, "id_step": 1,
+        }
+
+    def execute(self, query: str, params: tuple = ()):
+        query = " ".join(query.split())
+        products = self.db.products
+        self.rows, self.rowcount = [], 0
+        if query.startswith("UPDATE inventory SET quantity = quantity - %s"):
+            quantity, product_id, _ = params
+            product = products.get(product_id)
+            if product and product["shard_count"] == 0 and product["quantity"] >= quantity:
+                product["quantity"] -= quantity
+                self.rowcount = 1
+        elif query.startswith("UPDATE inventory SET quantity = quantity - CASE product_id"):
+            pairs = len(params) // 3
+            for product_id, quantity in zip(params[:pairs * 2:2], params[1:pairs * 2:2]):
+                products[product_id]["quantity"] -= quantity
+                assert products[product_id]["quantity"] >= 0, "CHECK (quantity >= 0) failed"
+            self.rowcount = pairs
+        elif "FROM products p" in query:
+            self.rows = [self._product_row(pid) for pid in sorted(params) if pid in products]
+        elif query.startswith("SELECT product_id, quantity, shard_count FROM inventory"):
+            assert query.endswith("FOR UPDATE")
+            self.db.locked_inventory.extend(params)
+            self.rows = [
+                {"product_id": pid, "quantity": products[pid]["quantity"], "shard_count": products[pid]["shard_count"]}
+                for pid in params
+            ]
+        elif query.startswith("SELECT shard, quantity FROM inventory_shards"):
+            self.rows = [{"shard": shard, "quantity": qty} for shard, qty in products[params[0]]["shards"].items()]
+        elif query.startswith("UPDATE inventory_shards SET quantity = quantity - %s"):
+            quantity, product_id, shard, _ = params
+            shards = products[product_id]["shards"]
+            if shards.get(shard, 0) >= quantity:
+                shards[shard] -= quantity
+                self.rowcount = 1
+        elif query.startswith("SELECT product_id, shard, quantity FROM inventory_shards"):
+            self.db.locked_shards.extend(params)
+            self.rows = [
+                {"product_id": pid, "shard": shard, "quantity": qty}
+                for pid in params for shard, qty in sorted(products[pid]["shards"].items())
+            ]
+        elif query.startswith("UPDATE inventory_shards SET quantity = quantity - CASE shard"):
+            taken = len(params) // 3
+            product_id = params[taken * 2]
+            for shard, quantity in zip(params[:taken * 2:2], params[1:taken * 2:2]):
+                products[product_id]["shards"][shard] -= quantity
+        elif query.startswith("INSERT INTO sales "):
+            self.executemany(query, [params])
+        elif query.startswith("INSERT INTO inventory_log"):
+            self.db.log.append(params)
+        elif query.startswith("INSERT INTO sales_daily_rollup"):
+            self.db.rollup.append(params)
+        else:
+            raise AssertionError(f"Unexpected query: {query}")
+
+    def executemany(self, query: str, seq_params: list):
+        query = " ".join(query.split())
+        if query.startswith("INSERT INTO sales "):
+            self.lastrowid = len(self.db.sales) + 1
+            self.db.sales.extend(seq_params)
+        else:
+            for params in seq_params:
+                self.execute(query, params)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+def _product(quantity: int, name: str = "Widget", price: str = "2.50", threshold: int = 5) -> dict:
+    return {"name": name, "price": Decimal(price), "quantity": quantity, "threshold": threshold,
+            "shard_count": 0, "shards": {}}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    database = FakeDatabase({1: _product(10), 2: _product(3, name="Gadget", price="10.00")})
+    monkeypatch.setattr(crud_sales, "db_cursor", database.db_cursor)
+    return database
+
+
+def test_sale_takes_stock_and_records_everything(db):
+    sale = crud_sales.record_sale(schemas.SaleCreate(product_id=1, quantity_sold=4, order_id="A-1"))
+    assert sale.id == 1
+    assert sale.sale_price_at_time_of_sale == Decimal("2.50")
+    assert db.products[1]["quantity"] == 6
+    assert len(db.sales) == len(db.log) == len(db.rollup) == 1
+    assert db.commits == 1
+
+
+def test_sale_cannot_oversell(db):
+    before = db.state()
+    with pytest.raises(ValueError, match="Not enough stock for product Gadget"):
+        crud_sales.record_sale(schemas.SaleCreate(product_id=2, quantity_sold=4))
+    assert db.state() == before
+    assert db.commits == 0
+
+
+def test_sale_of_the_last_units_succeeds(db):
+    crud_sales.record_sale(schemas.SaleCreate(product_id=2, quantity_sold=3))
+    assert db.products[2]["quantity"] == 0
+    with pytest.raises(ValueError):
+        crud_sales.record_sale(schemas.SaleCreate(product_id=2, quantity_sold=1))
+    assert len(db.sales) == 1
+
+
+def test_sale_of_unknown_product_writes_nothing(db):
+    before = db.state()
+    with pytest.raises(ValueError, match="Product with ID 99 not found"):
+        crud_sales.record_sale(schemas.SaleCreate(product_id=99, quantity_sold=1))
+    assert db.state() == before
+
+
+def test_failed_sale_insert_rolls_back_the_stock(db, monkeypatch):
+    def no_id(self, query, seq_params):
+        self.lastrowid = 0
+    monkeypatch.setattr(FakeCursor, "executemany", no_id)
+    before = db.state()
+    with pytest.raises(Exception, match="Failed to record sale"):
+        crud_sales.record_sale(schemas.SaleCreate(product_id=1, quantity_sold=4))
+    assert db.state() == before
+    assert db.rollbacks == 1
+
+
+def _order(*lines, order_id: str = "ORD-1") -> schemas.OrderCreate:
+    return schemas.OrderCreate(order_id=order_id, items=[
+        schemas.SaleCreate(product_id=product_id, quantity_sold=quantity) for product_id, quantity in lines
+    ])
+
+
+def test_order_records_every_line_in_one_transaction(db):
+    order = crud_sales.record_order(_order((2, 1), (1, 4), (2, 2)))
+    assert [sale.id for sale in order.items] == [1, 2, 3]
+    assert {sale.order_id for sale in order.items} == {"ORD-1"}
+    assert order.total_amount == 40.0
+    assert (db.products[1]["quantity"], db.products[2]["quantity"]) == (6, 0)
+    assert len(db.log) == 3
+    assert len(db.rollup) == 2 # One row per product
+    assert db.commits == 1
+
+
+def test_order_checks_stock_against_the_total_of_its_lines(db):
+    before = db.state()
+    with pytest.raises(ValueError, match=r"Gadget \(Available: 3, Requested: 4\)"):
+        crud_sales.record_order(_order((1, 1), (2, 2), (2, 2)))
+    assert db.state() == before
+    assert db.commits == 0
+
+
+def test_order_with_an_unknown_product_writes_nothing(db):
+    before = db.state()
+    with pytest.raises(ValueError, match="Products not found: 99"):
+        crud_sales.record_order(_order((1, 1), (99, 1)))
+    assert db.state() == before
+
+
+def test_order_locks_inventory_rows_in_product_order(db):
+    crud_sales.record_order(_order((2, 1), (1, 1)))
+    assert db.locked_inventory == [1, 2]
+
+
+@pytest.fixture
+def hot_db(db, monkeypatch):
+    monkeypatch.setattr(crud_sales.crud_inventory_shards, "_hot_products", {})
+    db.products[3] = {**_product(0, name="Hot item", price="1.00"), "shard_count": 3, "shards": {0: 4, 1: 4, 2: 4}}
+    return db
+
+
+def test_order_takes_hot_product_stock_from_one_shard(hot_db):
+    crud_sales.record_order(_order((3, 4), (1, 1)))
+    assert hot_db.locked_inventory == [1] # Not the hot product's row
+    assert hot_db.locked_shards == []
+    assert sorted(hot_db.products[3]["shards"].values()) == [0, 4, 4]
+
+
+def test_order_splits_a_line_no_shard_can_cover(hot_db):
+    crud_sales.record_order(_order((3, 10)))
+    assert hot_db.locked_shards == [3]
+    assert sum(hot_db.products[3]["shards"].values()) == 2
+
+
+def test_order_cannot_oversell_a_hot_product(hot_db):
+    before = hot_db.state()
+    with pytest.raises(ValueError, match="Hot item"):
+        crud_sales.record_order(_order((1, 1), (3, 13)))
+    assert hot_db.state() == before
+
+
+def test_sale_batch_takes_hot_product_stock_line_by_line(hot_db):
+    results = crud_sales.record_sales_batch([
+        schemas.SaleCreate(product_id=3, quantity_sold=4),
+        schemas.SaleCreate(product_id=3, quantity_sold=9), # Only 8 left
+        schemas.SaleCreate(product_id=3, quantity_sold=8),
+    ])
+    assert [status for status, _, _ in results] == ["committed", "rejected", "committed"]
+    assert sum(hot_db.products[3]["shards"].values()) == 0
+    assert hot_db.locked_inventory == []
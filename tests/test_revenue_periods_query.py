@@ -0,0 +1,75 @@
+from datetime import date, datetime
+import pytest
+from app.core import config
+from app.crud import crud_sales
+from app.models.schemas import RevenueComparisonPeriod
+
+
+def _periods(*ranges, category_ids=None):
+    category_ids = category_ids or [None] * len(ranges)
+    return [
+        RevenueComparisonPeriod(start_date=start, end_date=end, category_id=category_id)
+        for (start, end), category_id in zip(ranges, category_ids)
+    ]
+
+def _scanned_ranges(periods, params):
+    # Each period's CASE bounds come first, then one (from, to) pair per scanned range
+    per_period = sum(3 if p.category_id is not None else 2 for p in periods)
+    bounds = params[per_period:]
+    if None not in {p.category_id for p in periods}:
+        bounds = bounds[:-len({p.category_id for p in periods})]
+    return list(zip(bounds[::2], bounds[1::2]))
+
+
+@pytest.fixture(autouse=True)
+def rollup_enabled(monkeypatch):
+    monkeypatch.setattr(config, "REVENUE_ROLLUP_ENABLED", True)
+
+
+def test_overlapping_periods_are_scanned_once():
+    periods = _periods((date(2026, 3, 1), date(2026, 3, 20)), (date(2026, 3, 10), date(2026, 4, 5)))
+    query, params = crud_sales._revenue_periods_query(periods)
+    assert _scanned_ranges(periods, params) == [(date(2026, 3, 1), date(2026, 4, 6))]
+    assert " OR " not in query
+
+
+def test_adjacent_periods_are_merged():
+    periods = _periods((date(2026, 4, 1), date(2026, 4, 30)), (date(2026, 3, 1), date(2026, 3, 31)))
+    _, params = crud_sales._revenue_periods_query(periods)
+    assert _scanned_ranges(periods, params) == [(date(2026, 3, 1), date(2026, 5, 1))]
+
+
+def test_contained_period_does_not_shrink_the_range():
+    periods = _periods((date(2026, 1, 1), date(2026, 12, 31)), (date(2026, 6, 1), date(2026, 6, 30)))
+    _, params = crud_sales._revenue_periods_query(periods)
+    assert _scanned_ranges(periods, params) == [(date(2026, 1, 1), date(2027, 1, 1))]
+
+
+def test_disjoint_periods_skip_the_gap():
+    periods = _periods((date(2025, 3, 1), date(2025, 3, 31)), (date(2026, 3, 1), date(2026, 3, 31)))
+    query, params = crud_sales._revenue_periods_query(periods)
+    assert _scanned_ranges(periods, params) == [
+        (date(2025, 3, 1), date(2025, 4, 1)), (date(2026, 3, 1), date(2026, 4, 1))
+    ]
+    assert query.count(" OR ") == 1
+
+
+def test_categories_are_filtered_only_when_every_period_has_one():
+    filtered = _periods((date(2026, 3, 1), date(2026, 3, 31)), (date(2026, 3, 1), date(2026, 3, 31)),
+                        category_ids=[5, 2])
+    query, params = crud_sales._revenue_periods_query(filtered)
+    assert "r.category_id IN (%s, %s)" in query
+    assert params[-2:] == [2, 5]
+
+    mixed = _periods((date(2026, 3, 1), date(2026, 3, 31)), (date(2026, 3, 1), date(2026, 3, 31)),
+                     category_ids=[5, None])
+    query, _ = crud_sales._revenue_periods_query(mixed)
+    assert " IN (" not in query
+
+
+def test_raw_sales_path_uses_timestamp_bounds(monkeypatch):
+    monkeypatch.setattr(config, "REVENUE_ROLLUP_ENABLED", False)
+    periods = _periods((date(2026, 3, 1), date(2026, 3, 31)))
+    query, params = crud_sales._revenue_periods_query(periods)
+    assert "FROM sales s" in query
+    assert _scanned_ranges(periods, params) == [(datetime(2026, 3, 1), datetime(2026, 4, 1))]